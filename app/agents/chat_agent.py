@@ -1,7 +1,17 @@
+import os
 import threading
 from typing import List
 from pathlib import Path
 
+from app import retrieval, storage, vector_index
+from app.conversation_memory import ConversationMemory
+from integrations import telemetry, tokens
+
+# Material up to this size is sent whole (uploaded once as a cached context);
+# larger selections are indexed and only the relevant chunks are sent per turn
+SMALL_CORPUS_TOKENS = int(os.getenv("STUDYAI_CHAT_FULL_CONTEXT_TOKENS", "20000"))
+RETRIEVAL_TOKENS = int(os.getenv("STUDYAI_CHAT_RETRIEVAL_TOKENS", "3000"))
+
 # Simple ChatAgent skeleton that loads files and maintains history
 class ChatAgent:
     def __init__(self, llm_client=None):
@@ -10,9 +20,20 @@ class ChatAgent:
         self.loaded_texts: List[str] = []
         self.class_name = None
         self.files = []
+        # Loaded notes uploaded once per session (see LLMClient.create_context)
+        self._context = None
+        # Chunk index over the loaded notes when they are too large to send whole
+        self._index: retrieval.BM25Index | None = None
+        # The class's semantic index, restricted to the session files it covers
+        self._semantic: vector_index.VectorIndex | None = None
+        self._semantic_paths: List[Path] = []
+        # Last turns verbatim + a background summary of older ones, bounded in size
+        self.memory = ConversationMemory(self._summarize_history if llm_client else None)
 
     def start_session(self, class_name: str, file_paths: List[str] | None = None):
+        self.end_session()
         self.history = []
+        self.memory.clear()
         self.loaded_texts = []
         self.class_name = class_name
         self.files = file_paths or []
@@ -28,6 +49,22 @@ class ChatAgent:
             except Exception:
                 self.loaded_texts.append(f"[Failed to load: {p}]")
 
+        corpus = "\n\n".join(self.loaded_texts)
+        if tokens.estimate_tokens(corpus) > SMALL_CORPUS_TOKENS:
+            # Too large to send every turn: retrieve the relevant chunks per question
+            names = [Path(p).name for p in self.files]
+            self._index = retrieval.BM25Index.from_sources(list(zip(names, self.loaded_texts)))
+            self._open_semantic()
+        elif self.llm and hasattr(self.llm, "create_context"):
+            # Upload the notes once so each turn only sends the new message
+            corpus = "Context:\n" + tokens.fit_into("Context:\n", corpus)
+            try:
+                with telemetry.call_context("ChatAgent.start_session", class_name=self.class_name):
+                    self._context = self.llm.create_context(corpus, task="chat")
+            except Exception as e:
+                print(f"⚠️ Could not cache chat context, sending it inline: {e}")
+                self._context = None
+
         # Intro message
         intro = "Hi! I\'ve loaded your selected notes. Do you want a summary, key topics, or quiz-style questions?"
         self.history.append({'role': 'assistant', 'content': intro})
@@ -37,14 +74,25 @@ class ChatAgent:
         # Append user message
         self.history.append({'role': 'user', 'content': user_message})
 
-        # Build prompt from history + loaded_texts (very simple concatenation for now)
-        context = "\n\n".join(self.loaded_texts[-5:])  # include last few loaded texts
-        prompt = f"Context:\n{context}\n\nUser: {user_message}\nAssistant:" 
-
         # If llm client present, call it (expected to be blocking); otherwise, return a mocked reply
         if self.llm:
             try:
-                response = self.llm.call(prompt)
+                with telemetry.call_context("ChatAgent.chat", class_name=self.class_name):
+                    turn = self.memory.render() + f"User: {user_message}\nAssistant:"
+                    if self._context is not None:
+                        # Notes were uploaded at start_session; only send the history and new turn
+                        response = self.llm.generate(turn, context=self._context, task="chat")
+                    else:
+                        if self._index is not None:
+                            # Only the chunks relevant to this question, bounded in size:
+                            # keyword matches first, then passages similar in meaning
+                            semantic = self._semantic_context(user_message, RETRIEVAL_TOKENS // 3)
+                            budget = RETRIEVAL_TOKENS - tokens.estimate_tokens(semantic)
+                            context = "\n\n".join(x for x in (self._index.context_for(user_message, budget), semantic) if x)
+                        else:
+                            context = tokens.fit_into(f"Context:\n\n\n{turn}", "\n\n".join(self.loaded_texts))
+                        prompt = f"Context:\n{context}\n\n{turn}"
+                        response = self.llm.generate(prompt, task="chat")
             except Exception as e:
                 response = f"[LLM error: {e}]"
         else:
@@ -53,7 +101,47 @@ class ChatAgent:
 
         # Append assistant response
         self.history.append({'role': 'assistant', 'content': response})
+        if not response.startswith("[LLM error"):
+            self.memory.add(user_message, response)
         return response
 
+    def _open_semantic(self) -> None:
+        """Use the class's semantic index for the session files inside the class folder."""
+        self._semantic, self._semantic_paths = None, []
+        if not self.class_name or not storage.class_dir(self.class_name).exists():
+            return
+        try:
+            index = vector_index.get_index(self.class_name)
+            inside = [Path(p) for p in self.files if Path(p).resolve().is_relative_to(index.root)]
+            if inside:
+                index.update(inside)  # only new or changed files are embedded
+                self._semantic, self._semantic_paths = index, inside
+        except Exception as e:
+            print(f"⚠️ Semantic index unavailable, using keyword retrieval only: {e}")
+
+    def _semantic_context(self, question: str, budget_tokens: int) -> str:
+        if self._semantic is None:
+            return ""
+        try:
+            return self._semantic.context_for(question, budget_tokens, paths=self._semantic_paths)
+        except Exception as e:
+            print(f"⚠️ Semantic search failed, using keyword retrieval only: {e}")
+            return ""
+
+    def _summarize_history(self, prompt: str) -> str:
+        with telemetry.call_context("ChatAgent.memory", class_name=self.class_name):
+            return self.llm.generate(prompt, task="chat:memory")
+
+    def end_session(self):
+        """Release the cached context (if any) held for the current session."""
+        if self._context is not None and self.llm and hasattr(self.llm, "release_context"):
+            try:
+                self.llm.release_context(self._context)
+            except Exception:
+                pass
+        self._context = None
+        self._index = None
+        self._semantic, self._semantic_paths = None, []
+
     def get_history(self) -> List[dict]:
         return self.history
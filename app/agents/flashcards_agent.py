@@ -1,6 +1,7 @@
 import json
 from typing import List, Dict
 from app.integrations.llm_client import LLMClient
+from integrations import telemetry, tokens
 
 
 class FlashcardsAgent:
@@ -13,23 +14,39 @@ class FlashcardsAgent:
         except Exception:
             self.client = None
 
-    def generate_flashcards(self, notes: str, count: int = 5) -> List[Dict[str, str]]:
-        """
-        Ask the LLM to generate `count` flashcards from `notes` and return a list of
-        {"question": str, "answer": str} dictionaries. Returns an empty list on error.
-        """
-        prompt = f"""
+    @staticmethod
+    def build_prompt(notes: str, count: int = 5) -> str:
+        frame = f"""
 You are a flashcard generator.
 Create {count} study flashcards from these notes.
 Format your response STRICTLY as a JSON array of objects with fields "question" and "answer".
 
 Notes:
-{notes}
 """
+        # Trim notes to the prompt budget instead of letting the API reject them
+        return f"{frame}{tokens.fit_into(frame, notes)}\n"
+
+    @staticmethod
+    def parse(resp: str) -> List[Dict[str, str]]:
+        """Extract {"question", "answer"} dicts from a model response (raises on bad JSON)."""
+        data = json.loads(resp)
+        out: List[Dict[str, str]] = []
+        for item in data:
+            if isinstance(item, dict) and 'question' in item and 'answer' in item:
+                out.append({'question': str(item['question']), 'answer': str(item['answer'])})
+        return out
+
+    def generate_flashcards(self, notes: str, count: int = 5) -> List[Dict[str, str]]:
+        """
+        Ask the LLM to generate `count` flashcards from `notes` and return a list of
+        {"question": str, "answer": str} dictionaries. Returns an empty list on error.
+        """
+        prompt = self.build_prompt(notes, count)
 
         try:
             if self.client:
-                resp = self.client.generate_text(prompt)
+                with telemetry.call_context("FlashcardsAgent.generate_flashcards"):
+                    resp = self.client.generate(prompt, task="flashcards")
             else:
                 # fallback mock response
                 resp = json.dumps([
@@ -37,12 +54,7 @@ Notes:
                 ])
 
             # Try to extract JSON from the response
-            data = json.loads(resp)
-            out: List[Dict[str, str]] = []
-            for item in data:
-                if isinstance(item, dict) and 'question' in item and 'answer' in item:
-                    out.append({'question': str(item['question']), 'answer': str(item['answer'])})
-            return out
+            return self.parse(resp)
         except json.JSONDecodeError:
             return []
         except Exception:
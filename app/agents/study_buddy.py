@@ -0,0 +1,44 @@
+import os
+
+from app import storage, vector_index
+from integrations import telemetry
+
+# Passages taken from the class's semantic index for one question
+CONTEXT_TOKENS = int(os.getenv("STUDYAI_STUDY_BUDDY_TOKENS", "2500"))
+
+_PROMPT = """You are a study buddy. Answer the student's question using the class material below.
+Mention the file a fact comes from in [brackets]. If the material does not cover the question, say so.
+
+CLASS MATERIAL:
+{context}
+
+QUESTION: {question}
+ANSWER:"""
+
+
+# Answers questions about a class from the passages most similar to the question
+class StudyBuddy:
+    def __init__(self, llm_client=None):
+        self.llm = llm_client
+
+    def ask(self, class_name: str, question: str, k: int = 8) -> str:
+        question = (question or "").strip()
+        if not question:
+            return ""
+        if not class_name or not storage.class_dir(class_name).exists():
+            return "⚠ Please select a class first!"
+        try:
+            # Re-checks the class files, so notes added since the last summary are found too
+            context = vector_index.get_index(class_name).context_for(question, CONTEXT_TOKENS, k=k, refresh=True)
+        except Exception as e:
+            print(f"⚠️ Study Buddy search failed: {e}")
+            context = ""
+        if not context:
+            return "No notes, transcripts or summaries of this class match the question yet."
+        if not self.llm:
+            return f"Most relevant passages:\n\n{context}"
+        try:
+            with telemetry.call_context("StudyBuddy.ask", class_name=class_name):
+                return self.llm.generate(_PROMPT.format(context=context, question=question), task="chat")
+        except Exception as e:
+            return f"[LLM error: {e}]"
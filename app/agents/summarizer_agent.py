@@ -1,5 +1,14 @@
+import contextvars
+import json
 import os
-from typing import List, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app import storage
+from integrations import telemetry, tokens
 
 # Try to import a generic LLM client wrapper if present; fallback to a simple placeholder
 try:
@@ -9,15 +18,17 @@ except Exception:
 
 
 class SummarizerAgent:
-    def __init__(self):
-        if LLMClient is not None:
-            self.llm = LLMClient(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, llm_client=None):
+        if llm_client is not None:
+            self.llm = llm_client
+        elif LLMClient is not None:
+            self.llm = LLMClient()
         else:
             self.llm = None
 
     def _find_file_path(self, class_name: str, filename: str) -> str | None:
         """Try to locate a file name under the class folder across common subfolders."""
-        base = os.path.join("data", "classes", class_name)
+        base = str(storage.class_dir(class_name))
         # direct path
         p = os.path.join(base, filename)
         if os.path.exists(p):
@@ -72,10 +83,8 @@ class SummarizerAgent:
         except Exception:
             return ""
 
-    def summarize(self, class_name: str, sources: List[str], query: Optional[str] = None, mode: str = "key_topics") -> str:
-        """
-        Summarize a list of source filenames (notes, transcripts, pdfs, audio) for a class.
-        """
+    def _gather_text(self, class_name: str, sources: List[str]) -> str:
+        """Concatenated text of the selected sources (notes, transcripts, pdfs, audio)."""
         texts: list[str] = []
         for src in sources:
             path = self._find_file_path(class_name, src)
@@ -97,16 +106,25 @@ class SummarizerAgent:
             # normal text/pdf handling
             texts.append(self._load_file_text(path))
 
-        combined = "\n\n".join([t for t in texts if t])
+        return "\n\n".join([t for t in texts if t])
+
+    def summarize(self, class_name: str, sources: List[str], query: Optional[str] = None, mode: str = "key_topics") -> str:
+        """
+        Summarize a list of source filenames (notes, transcripts, pdfs, audio) for a class.
+        """
+        combined = self._gather_text(class_name, sources)
 
         prompt = f"Summarize these class materials in {mode} style.\n"
         if query:
             prompt += f"User request: {query}\n\n"
-        prompt += combined or "[No textual content found in selected sources]"
+        # Keep the request inside the model's prompt budget
+        prompt += tokens.fit_into(prompt, combined) or "[No textual content found in selected sources]"
 
         if self.llm is not None:
             try:
-                return self.llm.generate(prompt)
+                with telemetry.call_context("SummarizerAgent.summarize", class_name=class_name):
+                    # mode is the UI's sum_mode ("Topics", "Q&A", "Detailed")
+                    return self.llm.generate(prompt, task=f"summary:{mode}")
             except Exception as e:
                 # Surface the error for debugging but return a safe message
                 print(f"[LLM error] {e}")
@@ -116,3 +134,93 @@ class SummarizerAgent:
         if not combined:
             return "[No content available]"
         return "[LLM disabled - preview]\n" + (combined[:2000] + ("..." if len(combined) > 2000 else ""))
+
+    def summarize_all_modes(self, class_name: str, sources: List[str], query: Optional[str] = None) -> Dict[str, str]:
+        """
+        Produce every summary mode (MODES) for the same material in one request.
+
+        The model is asked for one response with a marked section per mode,
+        which is split locally. Any section that comes back missing is
+        regenerated concurrently, all calls sharing the material as one
+        cached context. The results are saved together under
+        summaries/modes/<timestamp>/ and returned as {mode: text}.
+        """
+        combined = self._gather_text(class_name, sources)
+        if self.llm is None or not combined:
+            preview = self.summarize(class_name, sources, query)
+            return {mode: preview for mode in MODES}
+
+        header = "Summarize these class materials.\n"
+        if query:
+            header += f"User request: {query}\n"
+        sections = "\n".join(f"{_MARKERS[m]}\n<{MODE_INSTRUCTIONS[m]}>" for m in MODES)
+        frame = f"{header}Write ALL of the following sections, each starting with its marker line exactly as shown:\n{sections}\n\nMATERIALS:\n"
+        prompt = frame + tokens.fit_into(frame, combined, reserve_output=2400)
+
+        results: Dict[str, str] = {}
+        try:
+            with telemetry.call_context("SummarizerAgent.summarize_all_modes", class_name=class_name):
+                results = split_modes(self.llm.generate(prompt, {"max_output_tokens": 2400}, task="summary:Detailed"))
+                missing = [m for m in MODES if not results.get(m)]
+                if missing:
+                    results.update(self._modes_concurrently(combined, query, missing))
+        except Exception as e:
+            print(f"[LLM error] {e}")
+            return {mode: f"[LLM error] Could not generate summary. Details: {e}" for mode in MODES}
+
+        self._save_modes(class_name, sources, query, results)
+        return results
+
+    def _modes_concurrently(self, combined: str, query: Optional[str], modes: List[str]) -> Dict[str, str]:
+        material = "Class materials:\n" + tokens.fit_into("Class materials:\n", combined)
+        context = self.llm.create_context(material, task="summary") if hasattr(self.llm, "create_context") else None
+
+        def _one(mode: str) -> str:
+            ask = f"{MODE_INSTRUCTIONS[mode]}\n" + (f"User request: {query}\n" if query else "")
+            if context is not None:
+                return self.llm.generate(ask, context=context, task="summary")
+            return self.llm.generate(f"{material}\n\n{ask}", task="summary")
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(modes)) as pool:
+                futures = {m: pool.submit(contextvars.copy_context().run, _one, m) for m in modes}
+                return {m: f.result() for m, f in futures.items()}
+        finally:
+            if context is not None:
+                self.llm.release_context(context)
+
+    @staticmethod
+    def _save_modes(class_name: str, sources: List[str], query: Optional[str], results: Dict[str, str]) -> Path:
+        out_dir = storage.class_dir(class_name) / "summaries" / "modes" / datetime.now().strftime("%Y%m%d-%H%M%S")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for mode, text in results.items():
+            (out_dir / f"{_slug(mode)}.txt").write_text(text, encoding="utf-8")
+        meta = {"sources": sources, "query": query, "modes": list(results)}
+        (out_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+        return out_dir
+
+
+# Summary modes offered by the UI's sum_mode dropdown
+MODES = ("Topics", "Q&A", "Detailed")
+MODE_INSTRUCTIONS = {
+    "Topics": "Key topics: a bulleted list of the main topics, each with a one-line explanation",
+    "Q&A": "Q&A: the questions these materials answer, each followed by a short answer",
+    "Detailed": "Detailed summary: a thorough, well-structured summary in paragraphs",
+}
+_MARKERS = {m: f"=== {m.upper()} ===" for m in MODES}
+
+
+def _slug(mode: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "", mode) or "mode"
+
+
+def split_modes(text: str) -> Dict[str, str]:
+    """Split a multi-section response on the === MODE === marker lines."""
+    out: Dict[str, str] = {}
+    positions = sorted((text.find(marker), mode) for mode, marker in _MARKERS.items() if marker in text)
+    for i, (pos, mode) in enumerate(positions):
+        end = positions[i + 1][0] if i + 1 < len(positions) else len(text)
+        body = text[pos + len(_MARKERS[mode]):end].strip()
+        if body:
+            out[mode] = body
+    return out
@@ -0,0 +1,319 @@
+"""Durable queue for non-interactive LLM work.
+
+Nightly jobs (summarize every transcript, regenerate flashcards for every
+note, build quizzes) do not need interactive latency. They are submitted
+here instead of being called one by one:
+
+    q = batch_queue.get_queue()
+    q.submit_summary("data/classes/Math_201/transcripts/lec1.mp3.txt", "Math_201")
+    q.start_drainer()
+
+Every change is appended (and fsynced) to data/batch/queue.jsonl before it
+takes effect, so a restart replays the log and resumes whatever was still
+pending. A background drainer sends pending prompts in small paced groups
+through gemini_api.batch_generate (which already applies the shared rate
+limit, retries and failover) and writes each result back to the class
+folder. Results are written before the job is marked done, so a crash can
+at worst redo a job, never lose one.
+
+CLI:
+    python -m app.batch_queue submit --class Math_201 [--kinds summary,flashcards,quiz]
+    python -m app.batch_queue drain
+    python -m app.batch_queue status
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
+
+from app import manifest, storage
+from integrations import routing, telemetry, tokens
+
+QUEUE_PATH = Path(os.getenv("STUDYAI_BATCH_LOG", "data/batch/queue.jsonl"))
+# Prompts sent per drain step, and pause between steps (on top of the rate limiter)
+BATCH_SIZE = int(os.getenv("STUDYAI_BATCH_SIZE", "4"))
+PACE_S = float(os.getenv("STUDYAI_BATCH_PACE_S", "2"))
+# A job that failed this many times is given up on (logged as "failed")
+MAX_ATTEMPTS = 3
+
+QUIZ_TEMPLATE = """You are a quiz writer for a university course.
+Write {count} multiple-choice questions (A-D) that test the key ideas in these notes.
+After each question put the correct letter on its own line as "Answer: <letter>".
+Use plain text only.
+
+Notes:
+"""
+
+# kind -> writer(result_text, job) -> output path; registered below
+_writers: dict[str, Callable[[str, dict], Path]] = {}
+
+
+def register_writer(kind: str, writer: Callable[[str, dict], Path]) -> None:
+    """Make a job kind known to the drainer."""
+    _writers[kind] = writer
+
+
+class BatchQueue:
+    """Append-only JSONL job log with an in-memory view of pending jobs."""
+
+    def __init__(self, path: Path = QUEUE_PATH):
+        self.path = Path(path)
+        self._pending: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._drainer: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._replay()
+
+    # ---------- log ----------
+
+    def _replay(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a crash
+                job_id = event.get("id")
+                if event.get("event") == "submit":
+                    self._pending[job_id] = event["job"]
+                elif event.get("event") == "retry" and job_id in self._pending:
+                    self._pending[job_id]["attempts"] = event.get("attempts", 0)
+                elif event.get("event") in ("done", "failed"):
+                    self._pending.pop(job_id, None)
+
+    def _append(self, event: dict) -> None:
+        event["ts"] = round(time.time(), 3)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _compact(self) -> None:
+        """Rewrite the log with only pending jobs (atomic replace)."""
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for job_id, job in self._pending.items():
+                f.write(json.dumps({"event": "submit", "id": job_id, "job": job, "ts": job.get("submitted")},
+                                   ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    # ---------- submission ----------
+
+    def submit(self, kind: str, prompt: str, target: dict, generation_config: dict | None = None) -> str | None:
+        """
+        Queue one prompt. `target` tells the writer for `kind` where the result goes.
+        Returns the job id, or None if an identical job (same kind and source)
+        is already pending.
+        """
+        if kind not in _writers:
+            raise ValueError(f"Unknown batch job kind: {kind}")
+        if target.get("source"):
+            # Absolute, so the same file always dedupes and writers find it from any cwd
+            target = {**target, "source": str(Path(target["source"]).resolve())}
+        dedupe = f"{kind}:{target.get('source', '')}"
+        with self._lock:
+            if any(j.get("dedupe") == dedupe for j in self._pending.values()):
+                return None
+            job_id = uuid.uuid4().hex[:12]
+            job = {"kind": kind, "prompt": prompt, "target": target, "config": generation_config,
+                   "dedupe": dedupe, "attempts": 0, "submitted": round(time.time(), 3)}
+            self._append({"event": "submit", "id": job_id, "job": job})
+            self._pending[job_id] = job
+        return job_id
+
+    def submit_summary(self, transcript: str | Path, class_name: str) -> str | None:
+        from app import summarizer
+        text = Path(transcript).read_text(encoding="utf-8")
+        return self.submit("summary", summarizer.summary_prompt(text),
+                           {"source": str(transcript), "class_name": class_name},
+                           summarizer._SUMMARY_CONFIG)
+
+    def submit_flashcards(self, notes: str | Path, class_name: str, count: int = 10) -> str | None:
+        from app.agents.flashcards_agent import FlashcardsAgent
+        text = Path(notes).read_text(encoding="utf-8")
+        return self.submit("flashcards", FlashcardsAgent.build_prompt(text, count),
+                           {"source": str(notes), "class_name": class_name})
+
+    def submit_quiz(self, notes: str | Path, class_name: str, count: int = 10) -> str | None:
+        frame = QUIZ_TEMPLATE.format(count=count)
+        text = Path(notes).read_text(encoding="utf-8")
+        return self.submit("quiz", frame + tokens.fit_into(frame, text),
+                           {"source": str(notes), "class_name": class_name})
+
+    def submit_class(self, class_name: str, kinds: tuple[str, ...] = ("summary", "flashcards", "quiz")) -> int:
+        """Queue the nightly work for every transcript / note of a class. Returns jobs added."""
+        base = storage.class_dir(class_name)
+        added = 0
+        if "summary" in kinds:
+            for p in sorted((base / "transcripts").glob("*.txt")):
+                added += self.submit_summary(p, class_name) is not None
+        notes = sorted(p for p in (base / "notes").rglob("*") if p.suffix.lower() in (".txt", ".md"))
+        for p in notes:
+            if "flashcards" in kinds:
+                added += self.submit_flashcards(p, class_name) is not None
+            if "quiz" in kinds:
+                added += self.submit_quiz(p, class_name) is not None
+        return added
+
+    # ---------- draining ----------
+
+    def pending(self) -> list[tuple[str, dict]]:
+        with self._lock:
+            return list(self._pending.items())
+
+    def drain_once(self, batch_size: int = BATCH_SIZE) -> int:
+        """Run up to `batch_size` pending jobs. Returns how many were attempted."""
+        from integrations import gemini_api
+
+        jobs = self.pending()[:batch_size]
+        if not jobs:
+            return 0
+        # Group by kind and config so one batch_generate call serves each group
+        groups: dict[str, list[tuple[str, dict]]] = {}
+        for job_id, job in jobs:
+            key = job["kind"] + json.dumps(job.get("config"), sort_keys=True)
+            groups.setdefault(key, []).append((job_id, job))
+
+        for group in groups.values():
+            kind, config = group[0][1]["kind"], group[0][1].get("config")
+            prompts = [job["prompt"] for _, job in group]
+            models = routing.models_for(kind, max(tokens.estimate_tokens(p) for p in prompts))
+            with telemetry.call_context("batch_queue.drain"):
+                results = gemini_api.batch_generate(prompts, config, models)
+            for (job_id, job), result in zip(group, results):
+                self._finish(job_id, job, result)
+        return len(jobs)
+
+    def _finish(self, job_id: str, job: dict, result) -> None:
+        error = result if isinstance(result, Exception) else None
+        if error is None:
+            try:
+                with telemetry.call_context(f"batch_queue.{job['kind']}", class_name=job["target"].get("class_name")):
+                    out = _writers[job["kind"]](result, job)
+            except Exception as e:
+                error = e
+            else:
+                with self._lock:
+                    self._append({"event": "done", "id": job_id, "output": str(out)})
+                    self._pending.pop(job_id, None)
+                print(f"✅ Batch {job['kind']} written: {out}")
+                return
+
+        attempts = job.get("attempts", 0) + 1
+        with self._lock:
+            if attempts >= MAX_ATTEMPTS:
+                self._append({"event": "failed", "id": job_id, "error": repr(error)[:300]})
+                self._pending.pop(job_id, None)
+                print(f"❌ Batch {job['kind']} for {job['target'].get('source')} failed: {error}")
+            else:
+                self._append({"event": "retry", "id": job_id, "attempts": attempts})
+                job["attempts"] = attempts
+
+    def drain(self, pace_s: float = PACE_S) -> None:
+        """Run until nothing is pending (or stop() is called)."""
+        while not self._stop.is_set() and self.drain_once():
+            self._stop.wait(pace_s)
+        with self._lock:
+            if not self._pending:
+                self._compact()
+
+    def start_drainer(self, pace_s: float = PACE_S, idle_s: float = 30.0) -> threading.Thread:
+        """Drain in a daemon thread, checking for new jobs every `idle_s` seconds."""
+        if self._drainer and self._drainer.is_alive():
+            return self._drainer
+
+        def _loop():
+            while not self._stop.is_set():
+                try:
+                    self.drain(pace_s)
+                except Exception as e:
+                    print(f"⚠️ Batch drainer error: {e}")
+                self._stop.wait(idle_s)
+
+        self._stop.clear()
+        self._drainer = threading.Thread(target=_loop, name="studyai-batch", daemon=True)
+        self._drainer.start()
+        return self._drainer
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# ---------- result writers ----------
+
+def _class_dir(job: dict, sub: str) -> Path:
+    # Same folder save_summary and the manifest use for this class
+    return storage.class_dir(job["target"]["class_name"]) / sub
+
+
+def _write_summary(result: str, job: dict) -> Path:
+    from app import summarizer
+    return summarizer.save_summary(result.strip(), job["target"]["class_name"],
+                                   source=Path(job["target"]["source"]))
+
+
+def _write_flashcards(result: str, job: dict) -> Path:
+    from app.agents.flashcards_agent import FlashcardsAgent
+    cards = FlashcardsAgent.parse(result)
+    out = _class_dir(job, "flashcards") / (Path(job["target"]["source"]).stem + ".json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(cards, indent=2, ensure_ascii=False), encoding="utf-8")
+    manifest.get_manifest(job["target"]["class_name"]).record(
+        out, "flashcards", job["target"]["source"], manifest.current_steps()["flashcards"]["template"])
+    return out
+
+
+def _write_quiz(result: str, job: dict) -> Path:
+    out = _class_dir(job, "quizzes") / (Path(job["target"]["source"]).stem + ".txt")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(result.strip(), encoding="utf-8")
+    return out
+
+
+register_writer("summary", _write_summary)
+register_writer("flashcards", _write_flashcards)
+register_writer("quiz", _write_quiz)
+
+
+_queue: BatchQueue | None = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> BatchQueue:
+    """Process-wide queue (replays the log on first use)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = BatchQueue()
+        return _queue
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline batch generation queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sp = sub.add_parser("submit", help="queue nightly work for a class")
+    sp.add_argument("--class", dest="class_name", required=True)
+    sp.add_argument("--kinds", default="summary,flashcards,quiz")
+    sub.add_parser("drain", help="run every pending job, then exit")
+    sub.add_parser("status", help="list pending jobs")
+    args = parser.parse_args()
+
+    q = get_queue()
+    if args.command == "submit":
+        n = q.submit_class(args.class_name, tuple(k.strip() for k in args.kinds.split(",") if k.strip()))
+        print(f"📥 Queued {n} jobs for {args.class_name} ({len(q.pending())} pending)")
+    elif args.command == "drain":
+        q.drain()
+        print(f"📤 Drained, {len(q.pending())} jobs still pending")
+    else:
+        for job_id, job in q.pending():
+            print(f"{job_id}  {job['kind']:<10} attempts={job.get('attempts', 0)}  {job['target'].get('source')}")
@@ -21,6 +21,8 @@ from app.handlers import (
 from app.agents.summarizer_agent import SummarizerAgent
 from app.agents.chat_agent import ChatAgent
 from app.agents.flashcards_agent import FlashcardsAgent
+from app.agents.study_buddy import StudyBuddy
+from app.integrations.llm_client import LLMClient
 
 
 def open_file(path: str):
@@ -55,21 +57,26 @@ class ButtonManager:
         self.ai_handler = ai_handlers.AIHandler(page)
         self.google_drive_handler = google_drive_handlers.GoogleDriveHandler(page)
 
+        # One LLM client shared by every agent (same provider / connection pool)
+        self.llm_client = LLMClient()
+
         # Summarizer agent (lightweight)
         try:
-            self.summarizer_agent = SummarizerAgent()
+            self.summarizer_agent = SummarizerAgent(llm_client=self.llm_client)
         except Exception:
             self.summarizer_agent = None
         # Chat agent for interactive summarizer/chat
         try:
-            self.chat_agent = ChatAgent()
+            self.chat_agent = ChatAgent(llm_client=self.llm_client)
         except Exception:
             self.chat_agent = None
         # Flashcards agent
         try:
-            self.flashcards_agent = FlashcardsAgent()
+            self.flashcards_agent = FlashcardsAgent(llm_client=self.llm_client)
         except Exception:
             self.flashcards_agent = None
+        # Study Buddy: questions answered from the class's semantic index
+        self.study_buddy = StudyBuddy(llm_client=self.llm_client)
 
     def on_model_change(self, e: Any = None):
         """Update shared whisper model setting and forward event to AI handler."""
@@ -163,7 +170,10 @@ class ButtonManager:
             # AI Features
             'summarize_content': self.ai_handler.summarize_content,
             'generate_summary': self.summarizer_agent.summarize if self.summarizer_agent else (lambda *a, **k: ""),
+            # All summary modes from one request: {"Topics": ..., "Q&A": ..., "Detailed": ...}
+            'generate_all_summaries': (lambda class_name, notes, query=None: self.summarizer_agent.summarize_all_modes(class_name, notes, query)) if self.summarizer_agent else (lambda *a, **k: {}),
             'ask_ai': self.ai_handler.ask_ai,
+            'study_buddy_ask': lambda class_name, question: self.study_buddy.ask(class_name, question),
             'generate_quiz': self.ai_handler.generate_quiz,
             # Flashcards generation
             'generate_flashcards': (lambda notes, n: self.flashcards_agent.generate_flashcards(notes, n)) if self.flashcards_agent else (lambda *a, **k: []),
@@ -176,6 +186,7 @@ class ButtonManager:
             # Chat agent session management (wrapped to update UI)
             'start_session': (lambda class_name, files, chat_ref: self._start_session_ui(class_name, files, chat_ref)) if self.chat_agent else (lambda *a, **k: ""),
             'send_message': (lambda msg, chat_ref, input_ref: self._send_message_ui(msg, chat_ref, input_ref)) if self.chat_agent else (lambda *a, **k: ""),
+            'end_session': self.end_chat_session,
 
             # Google Drive
             'connect_drive': self.google_drive_handler.connect_drive,
@@ -256,6 +267,11 @@ class ButtonManager:
             self.show_error(f"Failed to start session: {e}")
             return ""
 
+    def end_chat_session(self, e: Any = None):
+        """Release the chat session's cached context (chat panel closed / page disconnected)."""
+        if self.chat_agent:
+            self.chat_agent.end_session()
+
     def _send_message_ui(self, msg: str, chat_ref, input_ref):
         try:
             if not msg or not msg.strip():
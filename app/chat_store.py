@@ -0,0 +1,219 @@
+"""Append-only chat log per class.
+
+    store = chat_store.get_store("Math_201")
+    session = store.new_session()
+    store.append(session, "user", "what is an eigenvalue?")
+    store.read(session, limit=50)          # last 50 messages of that session
+    store.compact(keep_sessions=20)        # drop old sessions, rewrite the log
+
+Messages go to data/classes/<Class>/ai_sessions/chat_log.jsonl, one JSON
+object per line ({"ts", "session", "role", "text"}), so writing a message
+costs the same however long the log is. The file is flushed on every append
+and fsync'ed in batches (every FSYNC_EVERY messages or FSYNC_INTERVAL_S
+seconds, and on flush()/exit).
+
+chat_log.idx.json maps each session to the byte offsets of its messages, so
+loading one session seeks straight to its lines. The index is saved on
+flush; anything appended after the last save is re-scanned from the log on
+open (a torn last line from a crash is cut off). compact() rewrites the log
+with only the kept sessions, grouped together.
+
+An old chat_log.json (a JSON array rewritten on every message) is imported
+once as session "legacy" and renamed to chat_log.json.migrated.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app import storage
+
+FSYNC_EVERY = 32
+FSYNC_INTERVAL_S = 1.0
+
+
+class ChatStore:
+    def __init__(self, class_name: str, root: Path | None = None):
+        self.class_name = class_name
+        base = (Path(root) if root is not None else storage.class_dir(class_name)).resolve() / "ai_sessions"
+        self.log_path = base / "chat_log.jsonl"
+        self.index_path = base / "chat_log.idx.json"
+        self._lock = threading.RLock()
+        self._file = None
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        self._index: dict[str, list[int]] = {}
+        self._indexed_size = 0
+        self._open()
+        self._migrate_legacy(base / "chat_log.json")
+
+    # ---------- open / recover ----------
+
+    def _open(self) -> None:
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.index_path.exists():
+            try:
+                saved = json.loads(self.index_path.read_text(encoding="utf-8"))
+                self._index, self._indexed_size = saved["sessions"], saved["size"]
+            except Exception as e:
+                print(f"⚠️ Rebuilding chat index, unreadable {self.index_path}: {e}")
+                self._index, self._indexed_size = {}, 0
+        size = self.log_path.stat().st_size if self.log_path.exists() else 0
+        if self._indexed_size > size:  # log replaced behind our back
+            self._index, self._indexed_size = {}, 0
+        if size > self._indexed_size:
+            self._scan(self._indexed_size)
+        self._file = open(self.log_path, "ab")
+
+    def _scan(self, start: int) -> None:
+        """Index the lines from byte `start` to the end; cut off a torn last line."""
+        end = start
+        with open(self.log_path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    session = json.loads(line)["session"]
+                    self._index.setdefault(session, []).append(end)
+                except Exception:
+                    pass  # unreadable line: skipped, compaction drops it
+                end += len(line)
+        if end < self.log_path.stat().st_size:
+            print(f"⚠️ Dropping a partially written chat message at the end of {self.log_path}")
+            os.truncate(self.log_path, end)
+        self._indexed_size = end
+        self._save_index()
+
+    def _migrate_legacy(self, legacy: Path) -> None:
+        if not legacy.exists():
+            return
+        try:
+            for entry in json.loads(legacy.read_text(encoding="utf-8") or "[]"):
+                self.append("legacy", entry.get("role", "user"), entry.get("text", ""), ts=entry.get("timestamp"))
+            self.flush()
+            legacy.rename(legacy.with_name(legacy.name + ".migrated"))
+        except Exception as e:
+            print(f"⚠️ Could not import {legacy}: {e}")
+
+    # ---------- writes ----------
+
+    @staticmethod
+    def new_session() -> str:
+        return datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+    def append(self, session: str, role: str, text: str, ts: str | None = None) -> int:
+        """Append one message; returns its byte offset in the log."""
+        record = {"ts": ts or datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+                  "session": session, "role": role, "text": text}
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self._index.setdefault(session, []).append(offset)
+            self._indexed_size = offset + len(line)
+            self._unsynced += 1
+            if self._unsynced >= FSYNC_EVERY or time.monotonic() - self._synced_at >= FSYNC_INTERVAL_S:
+                self._sync()
+            return offset
+
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._unsynced, self._synced_at = 0, time.monotonic()
+
+    def _save_index(self) -> None:
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"size": self._indexed_size, "sessions": self._index}), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    def flush(self) -> None:
+        """fsync pending messages and save the session index."""
+        with self._lock:
+            if self._file is None:
+                return
+            if self._unsynced:
+                self._sync()
+            self._save_index()
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ---------- reads ----------
+
+    def sessions(self) -> list[str]:
+        """Session ids, oldest first."""
+        with self._lock:
+            return sorted(self._index, key=lambda s: self._index[s][0] if self._index[s] else 0)
+
+    def read(self, session: str, limit: int | None = None) -> list[dict]:
+        """Messages of one session in order (only the last `limit` if given)."""
+        with self._lock:
+            offsets = list(self._index.get(session, []))
+        if limit is not None:
+            offsets = offsets[-limit:] if limit > 0 else []
+        out = []
+        with open(self.log_path, "rb") as f:
+            for off in offsets:
+                f.seek(off)
+                out.append(json.loads(f.readline()))
+        return out
+
+    # ---------- maintenance ----------
+
+    def compact(self, keep_sessions: int | None = None, drop: set[str] | None = None) -> int:
+        """Rewrite the log with the newest `keep_sessions` sessions (minus `drop`). Returns bytes freed."""
+        with self._lock:
+            keep = [s for s in self.sessions() if s not in (drop or set())]
+            if keep_sessions is not None:
+                keep = keep[-keep_sessions:] if keep_sessions > 0 else []
+            before = self._indexed_size
+            tmp = self.log_path.with_suffix(".compact")
+            index, pos = {}, 0
+            with open(self.log_path, "rb") as src, open(tmp, "wb") as dst:
+                for session in keep:
+                    for off in self._index[session]:
+                        src.seek(off)
+                        line = src.readline()
+                        index.setdefault(session, []).append(pos)
+                        dst.write(line)
+                        pos += len(line)
+                dst.flush()
+                os.fsync(dst.fileno())
+            self._file.close()
+            os.replace(tmp, self.log_path)
+            self._index, self._indexed_size = index, pos
+            self._save_index()
+            self._file = open(self.log_path, "ab")
+            self._unsynced = 0
+            return before - pos
+
+
+_stores: dict[str, ChatStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(class_name: str, root: Path | None = None) -> ChatStore:
+    """One shared store per class folder (all appends go through the same file handle)."""
+    key = str((Path(root) if root is not None else storage.class_dir(class_name)).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ChatStore(class_name, root)
+        return _stores[key]
+
+
+@atexit.register
+def _flush_all() -> None:
+    for store in list(_stores.values()):
+        try:
+            store.close()
+        except Exception:
+            pass
@@ -0,0 +1,134 @@
+"""Rolling conversation memory for chat sessions.
+
+Follow-up questions need the earlier conversation, but sending the whole
+history would make every turn slower than the last. The memory keeps the
+last KEEP_TURNS exchanges verbatim. Older exchanges are folded into a short
+running summary in a background thread, never while the user waits:
+
+    memory = ConversationMemory(summarize=lambda p: llm.generate(p, task="chat:memory"))
+    prompt = memory.render() + f"User: {question}\\nAssistant:"
+    memory.add(question, answer)      # may schedule a fold of older turns
+
+render() never exceeds `budget_tokens`: the summary gets at most a third of
+it and the newest verbatim turns fill the rest. If summarizing fails (or no
+summarizer is given), older turns are condensed locally to their first line.
+"""
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from integrations import tokens
+
+KEEP_TURNS = int(os.getenv("STUDYAI_CHAT_KEEP_TURNS", "6"))
+HISTORY_TOKENS = int(os.getenv("STUDYAI_CHAT_HISTORY_TOKENS", "1500"))
+SUMMARY_TOKENS = 300
+
+_FOLD_TEMPLATE = """Update the running summary of a study conversation between a student and a tutor.
+Keep what the student asked, the answers given, definitions and anything they said they will do next.
+Plain text, at most 8 short lines.
+
+CURRENT SUMMARY:
+{summary}
+
+NEW EXCHANGES:
+{turns}
+
+UPDATED SUMMARY:"""
+
+# One background worker shared by all sessions; folds are cheap and rare
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-memory")
+
+
+def _format(turns: list[tuple[str, str]]) -> str:
+    return "\n".join(f"User: {u}\nAssistant: {a}" for u, a in turns)
+
+
+def _condense(turns: list[tuple[str, str]]) -> str:
+    """Local fallback: the first line of each question and answer."""
+    def first(text: str) -> str:
+        line = text.strip().splitlines()[0] if text.strip() else ""
+        return line[:120] + ("…" if len(line) > 120 else "")
+    return "\n".join(f"- Q: {first(u)} / A: {first(a)}" for u, a in turns)
+
+
+class ConversationMemory:
+    def __init__(self, summarize: Callable[[str], str] | None = None,
+                 keep_turns: int = KEEP_TURNS, budget_tokens: int = HISTORY_TOKENS):
+        self.summarize = summarize
+        self.keep_turns = max(1, keep_turns)
+        self.budget_tokens = budget_tokens
+        self.turns: list[tuple[str, str]] = []
+        self.summary = ""
+        self._folded = 0  # turns[:_folded] are covered by `summary`
+        self._pending: Future | None = None
+        self._generation = 0  # bumped by clear(); folds of an older session are discarded
+        self._lock = threading.Lock()
+
+    def add(self, user: str, assistant: str) -> None:
+        with self._lock:
+            self.turns.append((user, assistant))
+            self._maybe_fold()
+
+    def _maybe_fold(self) -> None:
+        upto = len(self.turns) - self.keep_turns
+        if upto <= self._folded or (self._pending is not None and not self._pending.done()):
+            return
+        batch, summary = self.turns[self._folded:upto], self.summary
+        self._pending = _executor.submit(self._fold, batch, summary, upto, self._generation)
+
+    def _fold(self, batch: list[tuple[str, str]], summary: str, upto: int, generation: int) -> None:
+        new_summary = None
+        if self.summarize is not None:
+            prompt = _FOLD_TEMPLATE.format(summary=summary or "(none)", turns=_format(batch))
+            try:
+                new_summary = (self.summarize(prompt) or "").strip()
+            except Exception as e:
+                print(f"⚠️ Chat memory not summarized, condensing locally: {e}")
+        if not new_summary:
+            new_summary = "\n".join(x for x in (summary, _condense(batch)) if x)
+        # Bounded whatever the model returned (or however long the fallback grew)
+        new_summary = tokens.fit(new_summary, SUMMARY_TOKENS, keep="tail")
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.summary, self._folded, self._pending = new_summary, upto, None
+            # Turns may have piled up while this fold ran
+            self._maybe_fold()
+
+    def render(self) -> str:
+        """History block for the next prompt, within budget_tokens (empty if no history)."""
+        with self._lock:
+            summary, recent = self.summary, self.turns[self._folded:]
+        parts = []
+        used = 0
+        if summary:
+            summary = tokens.fit(summary, self.budget_tokens // 3, keep="tail")
+            parts.append(f"Conversation summary:\n{summary}\n")
+            used = tokens.estimate_tokens(parts[0])
+        # Newest turns first until the budget is spent (turns not yet folded are included too)
+        kept: list[str] = []
+        for u, a in reversed(recent):
+            text = f"User: {u}\nAssistant: {a}\n"
+            cost = tokens.estimate_tokens(text)
+            if used + cost > self.budget_tokens:
+                break
+            kept.append(text)
+            used += cost
+        if kept:
+            parts.append("Recent conversation:\n" + "".join(reversed(kept)))
+        return "\n".join(parts) + ("\n" if parts else "")
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Block until a running fold finished (tests, shutdown)."""
+        while True:
+            with self._lock:
+                pending = self._pending
+            if pending is None or pending.done():
+                return
+            pending.result(timeout)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.turns, self.summary, self._folded, self._pending = [], "", 0, None
+            self._generation += 1
@@ -0,0 +1,209 @@
+"""Course digest ("course so far"): every lecture summary of a class merged by topic.
+
+The digest is maintained incrementally instead of being regenerated from
+every transcript:
+
+1. merge (local, no LLM) - summarize_file feeds each new summary in. Its
+   discussion points are assigned to the most similar existing topic (bag of
+   words cosine) or start a new one; near-duplicates of points already in a
+   topic are dropped. Topics that gained or lost points are marked dirty.
+   Re-merging a rebuilt summary first removes that lecture's old points.
+2. synthesize (LLM) - only dirty topics are rewritten into a short outline,
+   in one batch_generate call; clean topics keep their stored text.
+
+    course_digest.merge(Path("data/classes/Math_201/summaries/Math_201_09-14-25.json"))
+    path = course_digest.build("Math_201")    # synthesize dirty topics, write the digest
+    python -m app.course_digest --class Math_201
+
+State and output live in data/classes/<Class>/digest/.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from app import storage, summary_model
+from app.extractive import DUPLICATE_SIM, content_words
+from integrations import gemini_api, routing, telemetry, tokens
+
+# A point joins the most similar topic if at least this similar, else starts a topic
+TOPIC_SIM = 0.2
+MAX_POINTS_PER_TOPIC = 40
+
+_TOPIC_TEMPLATE = """You maintain one section of a running course digest.
+Merge the POINTS (collected from several lectures) into a short outline for this topic.
+
+RULES:
+- Plain text only. First line: "Topic: <short topic name>".
+- Then at most 8 lines starting with "- ". Merge points that say the same thing.
+- Keep definitions, formulas and examples. Mention the lecture date when it matters.
+
+POINTS:
+{points}"""
+
+_TOPIC_CONFIG = {"temperature": 0.2, "top_p": 0.9, "max_output_tokens": 500}
+
+_lock = threading.Lock()
+
+
+def _terms(text: str) -> Counter:
+    return Counter(content_words(text))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(v * b.get(k, 0) for k, v in a.items())
+    return dot / (math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values())))
+
+
+def _dirs(class_dir: Path) -> tuple[Path, Path]:
+    out = class_dir / "digest"
+    return out / "state.json", out / f"{class_dir.name}_digest.txt"
+
+
+def _load(state_path: Path) -> dict:
+    if state_path.exists():
+        try:
+            return json.loads(state_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Starting a new digest, unreadable state {state_path}: {e}")
+    return {"lectures": {}, "topics": []}
+
+
+def _save(state_path: Path, state: dict) -> None:
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = state_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, state_path)
+
+
+_DATE_RE = re.compile(r"_(\d{2})-(\d{2})-(\d{2})(?:_(\d+))?$")
+
+
+def _label(lecture: str) -> str:
+    m = _DATE_RE.search(lecture)
+    return f"{m.group(1)}/{m.group(2)}/{m.group(3)}" if m else lecture
+
+
+def _lecture_order(lecture: str) -> tuple:
+    """<Course>_<MM-DD-YY>[_n] names in date order (undated ones last)."""
+    m = _DATE_RE.search(lecture)
+    if not m:
+        return ("999999", 0, lecture)
+    month, day, year, n = m.groups()
+    return (f"{year}{month}{day}", int(n or 1), lecture)
+
+
+def merge(summary_json: Path) -> int:
+    """Fold one summary (its JSON next to the .txt) into its class digest. Returns dirty topics."""
+    summary_json = Path(summary_json)
+    class_dir = summary_json.parent.parent
+    state_path, _ = _dirs(class_dir)
+    summary = summary_model.load(summary_json)
+    lecture = summary_json.stem
+    signature = hashlib.sha256(json.dumps(summary.to_dict(), sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    with _lock:
+        state = _load(state_path)
+        if state["lectures"].get(lecture) == signature:
+            return sum(t["dirty"] for t in state["topics"])
+
+        # A rebuilt summary replaces its earlier points
+        for topic in state["topics"]:
+            kept = [p for p in topic["points"] if p["lecture"] != lecture]
+            if len(kept) != len(topic["points"]):
+                topic["points"], topic["dirty"] = kept, True
+
+        vectors = [_terms(" ".join(p["text"] for p in t["points"]) + " " + t["title"]) for t in state["topics"]]
+        for text in summary.discussion + [f"{t}: {d}" if d else t for t, d in summary.glossary]:
+            terms = _terms(text)
+            if not terms:
+                continue
+            scores = [_cosine(terms, v) for v in vectors]
+            best = max(range(len(scores)), key=scores.__getitem__) if scores else -1
+            if best >= 0 and scores[best] >= TOPIC_SIM:
+                topic = state["topics"][best]
+                if any(_cosine(terms, _terms(p["text"])) >= DUPLICATE_SIM for p in topic["points"]):
+                    continue  # already covered by an earlier lecture
+                topic["points"] = (topic["points"] + [{"text": text, "lecture": lecture}])[-MAX_POINTS_PER_TOPIC:]
+                topic["dirty"] = True
+                vectors[best] += terms
+            else:
+                title = " ".join(w for w, _ in terms.most_common(3))
+                state["topics"].append({"title": title, "text": "", "dirty": True,
+                                        "points": [{"text": text, "lecture": lecture}]})
+                vectors.append(terms)
+
+        state["topics"] = [t for t in state["topics"] if t["points"]]
+        state["lectures"][lecture] = signature
+        state["updated"] = round(time.time(), 3)
+        _save(state_path, state)
+        return sum(t["dirty"] for t in state["topics"])
+
+
+def _synthesize(state: dict, class_name: str) -> None:
+    dirty = [t for t in state["topics"] if t["dirty"]]
+    if not dirty:
+        return
+    frame = _TOPIC_TEMPLATE.format(points="")
+    prompts = []
+    for topic in dirty:
+        points = "\n".join(f"- ({_label(p['lecture'])}) {p['text']}" for p in topic["points"])
+        prompts.append(frame + tokens.fit_into(frame, points, reserve_output=_TOPIC_CONFIG["max_output_tokens"]))
+    try:
+        with telemetry.call_context("course_digest.synthesize", class_name=class_name):
+            results = gemini_api.batch_generate(prompts, _TOPIC_CONFIG,
+                                                routing.models_for("summary", max(map(tokens.estimate_tokens, prompts))))
+    except gemini_api.LLMError as e:
+        print(f"⚠️ LLM unavailable ({e}); digest topics keep their raw points")
+        return
+    for topic, result in zip(dirty, results):
+        if isinstance(result, gemini_api.LLMError):
+            print(f"⚠️ Digest topic '{topic['title']}' kept stale: {result}")
+            continue
+        lines = [ln.strip() for ln in result.strip().splitlines() if ln.strip()]
+        if lines and lines[0].startswith("Topic:"):
+            topic["title"] = lines.pop(0)[len("Topic:"):].strip() or topic["title"]
+        topic["text"], topic["dirty"] = "\n".join(lines), False
+
+
+def build(class_name: str, class_dir: Path | None = None) -> Path:
+    """Re-synthesize dirty topics and write <Class>_digest.txt. Returns its path."""
+    class_dir = Path(class_dir) if class_dir is not None else storage.class_dir(class_name)
+    state_path, out_path = _dirs(class_dir)
+    with _lock:
+        state = _load(state_path)
+        _synthesize(state, class_name)
+        _save(state_path, state)
+
+    # Topics in the order they first came up in the course
+    order = sorted(state["lectures"], key=_lecture_order)
+    def first_seen(topic: dict) -> int:
+        return min(order.index(p["lecture"]) if p["lecture"] in order else len(order) for p in topic["points"])
+
+    sections = [f"Course so far: {class_name.replace('_', ' ')} ({len(order)} lectures)"]
+    for topic in sorted(state["topics"], key=first_seen):
+        body = topic["text"] or "\n".join(f"- {p['text']}" for p in topic["points"])
+        sections.append(f"{topic['title']}:\n{body}")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text("\n\n".join(sections) + "\n", encoding="utf-8")
+    print(f"🧭 Course digest: {out_path}")
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the course-so-far digest of a class")
+    parser.add_argument("--class", dest="class_name", required=True)
+    parser.add_argument("--remerge", action="store_true", help="merge every summary JSON again first")
+    args = parser.parse_args()
+    if args.remerge:
+        for path in sorted((storage.class_dir(args.class_name) / "summaries").glob("*.json")):
+            merge(path)
+    build(args.class_name)
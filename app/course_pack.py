@@ -0,0 +1,173 @@
+"""Course pack: every lecture summary of a class in one PDF.
+
+The per-lecture PDFs in data/classes/<Class>/summaries/ are concatenated
+(never re-rendered) behind a generated table of contents, with one bookmark
+per lecture:
+
+    path = course_pack.build("Math_201")
+    python -m app.course_pack --class Math_201 [--force]
+
+The pack lives in data/classes/<Class>/course_pack/ next to a small state
+file listing the lectures already in it (name, content hash, page count).
+When new lectures are added after the last one, the lecture pages of the
+existing pack are copied as they are and only the new PDFs are read; just
+the TOC page(s) are drawn again. If an included lecture changed, was
+removed, or a new one sorts before the end, the pack is rebuilt from the
+per-lecture PDFs.
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+from app import pdf_render, storage, summary_model
+
+try:
+    from PyPDF2 import PdfReader, PdfWriter
+except Exception:  # optional: document parsing extra in requirements.txt
+    PdfReader = PdfWriter = None
+
+_DATE_RE = re.compile(r"_(\d{2})-(\d{2})-(\d{2})(?:_(\d+))?$")
+
+
+def _paths(class_name: str) -> tuple[Path, Path, Path]:
+    """(summaries dir, pack pdf, state json) for a class."""
+    base = storage.class_dir(class_name)
+    out_dir = base / "course_pack"
+    return base / "summaries", out_dir / f"{class_name}_course_pack.pdf", out_dir / "state.json"
+
+
+def _sort_key(pdf: Path) -> tuple:
+    """Lecture order: date in the <Course>_<MM-DD-YY>[_n] name, then suffix, then name."""
+    m = _DATE_RE.search(pdf.stem)
+    if not m:
+        return (datetime.fromtimestamp(pdf.stat().st_mtime).strftime("%y%m%d"), 0, pdf.name)
+    month, day, year, n = m.groups()
+    return (f"{year}{month}{day}", int(n or 1), pdf.name)
+
+
+def _digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _title(pdf: Path) -> str:
+    try:
+        title = summary_model.load(pdf.with_suffix(".json")).title
+    except Exception:
+        title = ""
+    m = _DATE_RE.search(pdf.stem)
+    date = f"{m.group(1)}/{m.group(2)}/{m.group(3)}" if m else ""
+    return " — ".join(x for x in (date, title or pdf.stem) if x)
+
+
+def _toc(class_name: str, lectures: list[dict], toc_pages: int) -> bytes:
+    """TOC as PDF bytes; page numbers assume the TOC itself takes `toc_pages` pages."""
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle("PackTitle", parent=styles["Heading1"], fontSize=20, alignment=1, spaceAfter=12)
+    rows = [[Paragraph(lec["title"], styles["Normal"]), str(toc_pages + lec["start"] + 1)] for lec in lectures]
+    table = Table(rows or [["No lectures yet", ""]], colWidths=[5.8 * inch, 0.7 * inch])
+    table.setStyle(TableStyle([
+        ("ALIGN", (1, 0), (1, -1), "RIGHT"),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LINEBELOW", (0, 0), (-1, -1), 0.25, "#CCCCCC"),
+    ]))
+    buf = io.BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+    doc.build([Paragraph(f"{class_name.replace('_', ' ')} — Course Pack", title_style), table])
+    return buf.getvalue()
+
+
+def _toc_reader(class_name: str, lectures: list[dict]):
+    """Render the TOC until its page count is stable (entries point past it)."""
+    pages = 1
+    while True:
+        reader = PdfReader(io.BytesIO(_toc(class_name, lectures, pages)))
+        if len(reader.pages) == pages:
+            return reader
+        pages = len(reader.pages)
+
+
+def build(class_name: str, force: bool = False) -> Path | None:
+    """Create or extend the class's course pack. Returns its path (None if no summaries)."""
+    if PdfWriter is None:
+        raise RuntimeError("PyPDF2 is required for course packs (pip install PyPDF2)")
+    pdf_render.wait()  # summaries still rendering in the background
+    summaries_dir, pack_path, state_path = _paths(class_name)
+    pdfs = sorted(summaries_dir.glob("*.pdf"), key=_sort_key)
+    if not pdfs:
+        return None
+
+    state = {"lectures": [], "toc_pages": 0}
+    if state_path.exists() and pack_path.exists() and not force:
+        try:
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Rebuilding course pack, unreadable state: {e}")
+
+    by_name = {p.name: p for p in pdfs}
+    old = state["lectures"]
+    # The existing pack is reusable if every lecture in it is unchanged and still first in order
+    reusable = (bool(old) and [p.name for p in pdfs[:len(old)]] == [lec["pdf"] for lec in old]
+                and all(_digest(by_name[lec["pdf"]]) == lec["hash"] for lec in old))
+    if not reusable:
+        old = []
+    new = pdfs[len(old):]
+    if reusable and not new:
+        print(f"📚 Course pack up to date: {pack_path}")
+        return pack_path
+
+    lectures = [dict(lec) for lec in old]
+    new_readers = []
+    start = sum(lec["pages"] for lec in lectures)
+    for pdf in new:
+        reader = PdfReader(str(pdf))
+        lectures.append({"pdf": pdf.name, "hash": _digest(pdf), "pages": len(reader.pages),
+                         "start": start, "title": _title(pdf)})
+        new_readers.append(reader)
+        start += len(reader.pages)
+
+    writer = PdfWriter()
+    toc = _toc_reader(class_name, lectures)
+    for page in toc.pages:
+        writer.add_page(page)
+    if old:
+        # Lecture pages of the existing pack are copied unchanged
+        previous = PdfReader(str(pack_path))
+        for page in previous.pages[state["toc_pages"]:]:
+            writer.add_page(page)
+    for reader in new_readers:
+        for page in reader.pages:
+            writer.add_page(page)
+
+    toc_pages = len(toc.pages)
+    writer.add_outline_item("Contents", 0)
+    for lec in lectures:
+        writer.add_outline_item(lec["title"], toc_pages + lec["start"])
+
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = pack_path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        writer.write(f)
+    os.replace(tmp, pack_path)
+    state_path.write_text(json.dumps({"lectures": lectures, "toc_pages": toc_pages}, indent=2, ensure_ascii=False),
+                          encoding="utf-8")
+    print(f"📚 Course pack: {len(new)} lecture(s) {'appended' if old else 'packed'}, "
+          f"{len(lectures)} in total: {pack_path}")
+    return pack_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a class's course pack PDF")
+    parser.add_argument("--class", dest="class_name", required=True)
+    parser.add_argument("--force", action="store_true", help="rebuild from the per-lecture PDFs")
+    args = parser.parse_args()
+    build(args.class_name, args.force)
@@ -0,0 +1,178 @@
+"""Extractive pre-summarization (NumPy only).
+
+Lecture transcripts are full of filler, repetition and tangents that the
+summarizer prompt tells the model to drop anyway. This module picks the
+sentences worth sending before the network call:
+
+1. split into sentences and drop filler-only fragments
+2. TF-IDF sentence vectors (L2-normalised, float32)
+3. score = TextRank centrality over the cosine-similarity graph, blended
+   with similarity to the whole-document centroid
+4. MMR selection (relevance vs. redundancy) until the target share of the
+   original tokens is reached, skipping near-repeats of kept sentences;
+   kept sentences stay in lecture order
+
+    short = extractive.compress(transcript, ratio=0.5)
+    fallback = extractive.offline_summary(transcript)   # no LLM needed
+"""
+import re
+
+import numpy as np
+
+from integrations import tokens
+
+# Transcripts shorter than this are sent as-is
+MIN_TOKENS = 1500
+# Vocabulary cap (most frequent terms) to bound matrix size on long lectures
+MAX_VOCAB = 4096
+DAMPING = 0.85
+# Weight of relevance vs. redundancy in MMR
+MMR_LAMBDA = 0.7
+# Sentences at least this similar to one already kept are dropped as repeats
+DUPLICATE_SIM = 0.85
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+_WORD_RE = re.compile(r"[a-zA-Z][a-zA-Z'-]+|\d+")
+_FILLER_RE = re.compile(r"\b(um+|uh+|erm|you know|i mean|kind of|sort of|okay so|alright so)\b[,]?\s*", re.I)
+
+_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers him his how i if in into is it its itself just let me more most my no nor not
+now of off on once only or other our ours out over own same she should so some such than that the
+their them then there these they this those through to too under until up very was we were what when
+where which while who whom why will with would you your yours yeah okay right like gonna wanna got
+get going thing things really actually basically something anything
+""".split())
+
+
+def split_sentences(text: str) -> list[str]:
+    """Sentences with filler words removed; fragments under 4 words are dropped."""
+    out = []
+    for raw in _SENTENCE_RE.split(text or ""):
+        sentence = _FILLER_RE.sub("", raw).strip()
+        if len(sentence.split()) >= 4:
+            out.append(sentence)
+    return out
+
+
+def content_words(text: str) -> list[str]:
+    """Lower-cased words of `text` without stopwords."""
+    return [w for w in (m.group(0).lower() for m in _WORD_RE.finditer(text)) if w not in _STOPWORDS]
+
+
+def _tfidf(sentences: list[str]) -> np.ndarray:
+    """Row-normalised TF-IDF matrix (n_sentences x vocab), float32."""
+    docs = [content_words(s) for s in sentences]
+    counts: dict[str, int] = {}
+    for doc in docs:
+        for w in set(doc):
+            counts[w] = counts.get(w, 0) + 1
+    vocab = {w: i for i, (w, _) in enumerate(sorted(counts.items(), key=lambda kv: -kv[1])[:MAX_VOCAB])}
+    if not vocab:
+        return np.zeros((len(sentences), 1), dtype=np.float32)
+
+    rows, cols = [], []
+    for r, doc in enumerate(docs):
+        for w in doc:
+            c = vocab.get(w)
+            if c is not None:
+                rows.append(r)
+                cols.append(c)
+    tf = np.zeros((len(sentences), len(vocab)), dtype=np.float32)
+    np.add.at(tf, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+
+    df = (tf > 0).sum(axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + df)).astype(np.float32) + 1.0
+    x = np.log1p(tf) * idf
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.maximum(norms, 1e-9)
+
+
+def _textrank(sim: np.ndarray, iterations: int = 50, tol: float = 1e-6) -> np.ndarray:
+    """PageRank over the similarity graph (power iteration)."""
+    n = sim.shape[0]
+    w = sim.copy()
+    np.fill_diagonal(w, 0.0)
+    row_sums = w.sum(axis=1, keepdims=True)
+    # Sentences with no neighbours link uniformly
+    transition = np.where(row_sums > 0, w / np.maximum(row_sums, 1e-9), 1.0 / n)
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(iterations):
+        updated = (1 - DAMPING) / n + DAMPING * transition.T @ scores
+        if np.abs(updated - scores).sum() < tol:
+            return updated
+        scores = updated
+    return scores
+
+
+def rank_sentences(sentences: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """(scores in [0, 1], cosine-similarity matrix) for `sentences`."""
+    x = _tfidf(sentences)
+    sim = x @ x.T
+    tr = _textrank(sim)
+    centroid = x.mean(axis=0)
+    central = x @ (centroid / max(float(np.linalg.norm(centroid)), 1e-9))
+
+    def _unit(v: np.ndarray) -> np.ndarray:
+        span = float(v.max() - v.min())
+        return (v - v.min()) / span if span > 0 else np.ones_like(v)
+
+    return 0.6 * _unit(tr) + 0.4 * _unit(central), sim
+
+
+def select(sentences: list[str], budget_tokens: int) -> list[int]:
+    """Indices (in original order) chosen by MMR until `budget_tokens` is used."""
+    if not sentences:
+        return []
+    scores, sim = rank_sentences(sentences)
+    lengths = np.array([tokens.estimate_tokens(s) for s in sentences])
+    chosen: list[int] = []
+    available = np.ones(len(sentences), dtype=bool)
+    max_sim = np.zeros(len(sentences), dtype=np.float32)
+    used = 0
+    while available.any():
+        mmr = MMR_LAMBDA * scores - (1 - MMR_LAMBDA) * max_sim
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        available[best] = False
+        if max_sim[best] >= DUPLICATE_SIM:
+            continue  # the lecturer said this already
+        if chosen and used + lengths[best] > budget_tokens:
+            continue
+        chosen.append(best)
+        used += int(lengths[best])
+        max_sim = np.maximum(max_sim, sim[best])
+        if used >= budget_tokens:
+            break
+    return sorted(chosen)
+
+
+def compress(text: str, ratio: float = 0.5, min_tokens: int = MIN_TOKENS) -> str:
+    """Keep about `ratio` of the transcript's tokens, most informative sentences first."""
+    total = tokens.estimate_tokens(text)
+    if ratio >= 1 or total < min_tokens:
+        return text
+    sentences = split_sentences(text)
+    if len(sentences) < 3:
+        return text
+    return " ".join(sentences[i] for i in select(sentences, int(total * ratio)))
+
+
+def offline_summary(text: str, points: int = 8) -> str:
+    """Extractive summary in the summarizer's plain-text layout, for when no LLM is reachable."""
+    sentences = split_sentences(text)
+    if not sentences:
+        return "Title: Lecture notes\nTL;DR: No usable content in the transcript."
+    scores, _ = rank_sentences(sentences)
+    top = sentences[int(np.argmax(scores))]
+    typical = float(np.median([tokens.estimate_tokens(s) for s in sentences]))
+    picked = select(sentences, int(typical * points))
+    lines = [
+        "Title: Lecture notes (offline extractive summary)",
+        f"TL;DR: {top}",
+        "",
+        "Key points:",
+    ]
+    lines += [f"- {sentences[i]}" for i in picked[:points]]
+    return "\n".join(lines)
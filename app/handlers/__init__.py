@@ -1,19 +1,32 @@
 """
 Handler modules for button functionality
+
+Handler classes are resolved lazily (PEP 562) so importing this package does
+not pull in Whisper, the Google client libraries or ReportLab at startup.
 """
 
-from .class_handlers import ClassHandler
-from .notes_handlers import NotesHandler
-from .document_handlers import DocumentHandler
-from .transcription_handlers import TranscriptionHandler
-from .ai_handlers import AIHandler
-from .google_drive_handlers import GoogleDriveHandler
-
-__all__ = [
-    'ClassHandler', 
-    'NotesHandler', 
-    'DocumentHandler', 
-    'TranscriptionHandler', 
-    'AIHandler', 
-    'GoogleDriveHandler'
-]
\ No newline at end of file
+from importlib import import_module
+
+_HANDLER_MODULES = {
+    'ClassHandler': 'class_handlers',
+    'NotesHandler': 'notes_handlers',
+    'DocumentHandler': 'document_handlers',
+    'TranscriptionHandler': 'transcription_handlers',
+    'AIHandler': 'ai_handlers',
+    'GoogleDriveHandler': 'google_drive_handlers',
+}
+
+__all__ = list(_HANDLER_MODULES)
+
+
+def __getattr__(name):
+    module_name = _HANDLER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -16,18 +16,23 @@ from pathlib import Path
 import shutil
 import tempfile
 
-# Optional OCRAgent import (preferred) or fallback to pytesseract
-try:
-    from app.agents.ocr_agent import OCRAgent
-    OCR_AGENT_AVAILABLE = True
-except Exception:
-    OCR_AGENT_AVAILABLE = False
+
+def _run_ocr(image_path: Path) -> str:
+    """OCR an image via OCRAgent (preferred) or pytesseract directly.
+
+    Imported lazily so pytesseract/Pillow are only loaded when an image is imported.
+    """
+    try:
+        from app.agents.ocr_agent import OCRAgent
+        return OCRAgent().run(str(image_path))
+    except ImportError:
+        pass
     try:
         import pytesseract
         from PIL import Image
-        OCR_AVAILABLE = True
+        return pytesseract.image_to_string(Image.open(image_path))
     except Exception:
-        OCR_AVAILABLE = False
+        return ""  # OCR not available in this environment
 
 
 class DocumentHandler:
@@ -105,20 +110,10 @@ class DocumentHandler:
                     extracted_text = ""
             elif suffix in ['.jpg', '.jpeg', '.png']:
                 # run OCR via OCRAgent if available, otherwise try pytesseract directly
-                if OCR_AGENT_AVAILABLE:
-                    try:
-                        agent = OCRAgent()
-                        extracted_text = agent.run(str(target_path))
-                    except Exception:
-                        extracted_text = ""
-                elif OCR_AVAILABLE:
-                    try:
-                        img = Image.open(target_path)
-                        extracted_text = pytesseract.image_to_string(img)
-                    except Exception:
-                        extracted_text = ""
-                else:
-                    extracted_text = ""  # OCR not available in this environment
+                try:
+                    extracted_text = _run_ocr(target_path)
+                except Exception:
+                    extracted_text = ""
 
             # Save extracted text as a .txt next to the imported file for future reference
             try:
@@ -2,12 +2,9 @@
 import flet as ft
 import threading
 from typing import Any, List, Dict
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 
-# Your integrations
-from integrations.oauth import get_credentials
-from integrations.drive_api import MIME, list_files, download_file
+# googleapiclient / oauth / drive_api are imported where used so the Google
+# client stack is not loaded at app startup.
 
 
 class GoogleDriveHandler:
@@ -25,6 +22,10 @@ class GoogleDriveHandler:
         threading.Thread(target=self._do_connect, daemon=True).start()
 
     def _do_connect(self):
+        from googleapiclient.discovery import build
+        from googleapiclient.errors import HttpError
+        from integrations.oauth import get_credentials
+
         try:
             creds = get_credentials()  # opens browser; returns when finished
             self.user_credentials = creds
@@ -61,6 +62,8 @@ class GoogleDriveHandler:
 
     def _open_drive_picker_and_download(self):
         """List files via drive_api and render a picker dialog; download on selection."""
+        from integrations.drive_api import MIME, list_files, download_file
+
         try:
             payload = list_files(
                 q_text=None,
@@ -130,6 +133,8 @@ class GoogleDriveHandler:
 
     def _show_drive_files_dialog(self):
         """Fetch Drive files (PDF/Docs/Slides/Sheets) and show a picker dialog."""
+        from integrations.drive_api import MIME, list_files, download_file
+
         try:
             payload = list_files(
                 q_text=None,
@@ -5,9 +5,7 @@ This allows team members to work on different features independently.
 """
 
 from app import audio
-from app.transcription import Transcriber
 from app.handlers.class_handlers import ClassHandler
-from app import summarizer
 import flet as ft
 from pathlib import Path
 import re
@@ -42,6 +40,11 @@ class TranscriptionHandler:
         file = e.files[0]
         class_name = self.class_handler.get_current_class()
 
+        # Whisper/torch and ReportLab are heavy; load them on first use (or from
+        # the background warm-up started in main.py) instead of at app startup
+        from app.transcription import Transcriber
+        from app import summarizer
+
         try:
             # 1. Save audio file
             saved_audio = audio.save_audio_file(file.path, file.name, class_name)
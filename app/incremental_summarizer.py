@@ -0,0 +1,119 @@
+"""Incremental summarization for growing transcripts.
+
+Re-summarizing a live transcript from the start every few minutes costs
+O(n^2) tokens over a lecture. IncrementalSummarizer keeps a rolling state
+instead: running notes plus the byte offset of transcript already folded in.
+Each update() sends only the new span and the (bounded) running notes, and
+finalize() turns the notes into the usual structured summary with
+summarizer.summarize_text.
+
+    inc = IncrementalSummarizer(transcript_path, class_name="Math_201")
+    inc.update()            # call whenever the transcript has grown
+    path = inc.finalize()   # .txt + .json + .pdf in the class summaries folder
+
+State lives next to the transcript (<name>.state.json), so a restarted app
+continues where it left off.
+"""
+import json
+import time
+from pathlib import Path
+
+from app import extractive, summarizer
+from integrations import gemini_api, routing, telemetry, tokens
+
+# Don't call the model for less new text than this (unless finalizing)
+MIN_NEW_TOKENS = 400
+# Upper bound for the running notes, so each fold costs about the same
+NOTES_BUDGET = 1200
+
+_FOLD_TEMPLATE = """You maintain running study notes for a lecture that is still in progress.
+Merge the NEW TRANSCRIPT into the CURRENT NOTES.
+
+RULES:
+- Plain text only, one point per line starting with "- ".
+- Keep definitions, formulas, examples, dates and assignments. Drop filler and repetition.
+- Merge points that say the same thing; keep the order in which topics came up.
+- At most {max_words} words in total.
+
+CURRENT NOTES:
+{notes}
+
+NEW TRANSCRIPT:
+\"\"\"{new_text}\"\"\""""
+
+_FOLD_CONFIG = {"temperature": 0.2, "top_p": 0.9, "max_output_tokens": NOTES_BUDGET}
+
+
+class IncrementalSummarizer:
+    def __init__(self, transcript_path: str | Path, class_name: str = "",
+                 min_new_tokens: int = MIN_NEW_TOKENS):
+        self.transcript_path = Path(transcript_path)
+        self.class_name = class_name
+        self.min_new_tokens = min_new_tokens
+        self.state_path = self.transcript_path.with_name(self.transcript_path.name + ".state.json")
+        self.state = {"offset": 0, "notes": "", "folds": 0, "updated": None}
+        if self.state_path.exists():
+            try:
+                self.state.update(json.loads(self.state_path.read_text(encoding="utf-8")))
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable summary state {self.state_path}: {e}")
+
+    @property
+    def notes(self) -> str:
+        return self.state["notes"]
+
+    def _save_state(self) -> None:
+        tmp = self.state_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.state, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(self.state_path)
+
+    def _new_span(self, final: bool) -> tuple[str, int]:
+        """(new text, offset after it). Unless final, stop at the last sentence end."""
+        with open(self.transcript_path, "rb") as f:
+            f.seek(self.state["offset"])
+            raw = f.read()
+        if not final:
+            cut = max(raw.rfind(b". "), raw.rfind(b"? "), raw.rfind(b"! "), raw.rfind(b"\n"))
+            if cut < 0:
+                return "", self.state["offset"]
+            raw = raw[:cut + 1]
+        return raw.decode("utf-8", errors="ignore"), self.state["offset"] + len(raw)
+
+    def update(self, final: bool = False) -> bool:
+        """Fold new transcript text into the notes. Returns True if the model was called."""
+        if not self.transcript_path.exists():
+            raise FileNotFoundError(f"Transcript not found: {self.transcript_path}")
+        new_text, new_offset = self._new_span(final)
+        new_tokens = tokens.estimate_tokens(new_text)
+        if not new_text.strip() or (not final and new_tokens < self.min_new_tokens):
+            return False
+
+        # Long spans (e.g. after a pause in updates) are trimmed locally first
+        new_text = extractive.compress(new_text, summarizer.EXTRACTIVE_RATIO)
+        max_words = NOTES_BUDGET * 3 // 4
+        frame = _FOLD_TEMPLATE.format(max_words=max_words, notes=self.notes or "(none yet)", new_text="")
+        prompt = _FOLD_TEMPLATE.format(max_words=max_words, notes=self.notes or "(none yet)",
+                                       new_text=tokens.fit_into(frame, new_text, reserve_output=NOTES_BUDGET))
+        with telemetry.call_context("IncrementalSummarizer.update", class_name=self.class_name or None):
+            notes = gemini_api.generate_text(prompt, _FOLD_CONFIG,
+                                             routing.models_for("summary", tokens.estimate_tokens(prompt)))
+
+        self.state.update({
+            "offset": new_offset,
+            "notes": tokens.fit(notes.strip(), NOTES_BUDGET),
+            "folds": self.state["folds"] + 1,
+            "updated": round(time.time(), 3),
+        })
+        self._save_state()
+        return True
+
+    def finalize(self) -> Path:
+        """Fold the remaining text, then write the structured summary (.txt + .json + .pdf)."""
+        self.update(final=True)
+        with telemetry.call_context("IncrementalSummarizer.finalize", class_name=self.class_name or None):
+            summary = summarizer.summarize_text(self.notes)
+        return summarizer.save_summary(summary, self.class_name, source=self.transcript_path)
+
+    def reset(self) -> None:
+        self.state = {"offset": 0, "notes": "", "folds": 0, "updated": None}
+        self.state_path.unlink(missing_ok=True)
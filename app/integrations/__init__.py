@@ -1,9 +1,11 @@
 # shim package to expose top-level `integrations` modules under `app.integrations`
 # This keeps imports like `from app.integrations import gemini_api` working while
 # the real integration modules live in the repo-level `integrations/` folder.
+#
+# Modules are loaded lazily (PEP 562) on first attribute access, so importing
+# this package (e.g. for llm_client) does not pull in the Google client stack.
 
 from importlib import import_module
-from types import ModuleType
 import sys
 
 # Map of available integration module names to their package path
@@ -11,19 +13,32 @@ _integration_names = [
     'calendar_api',
     'docs_api',
     'drive_api',
+    'fake_llm',
     'gemini_api',
     'oauth',
+    'providers',
+    'resilience',
+    'telemetry',
     'translate_api',
     'vertex_ai',
 ]
 
-# Dynamically import each integration module from the top-level `integrations` package
-for name in _integration_names:
+
+def __getattr__(name):
+    if name not in _integration_names:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Import from the top-level `integrations` package and cache it
     mod = import_module(f'integrations.{name}')
     # expose as attribute in this package
     globals()[name] = mod
-    # also set sys.modules entry so `from app.integrations import gemini_api` works
+    # also set sys.modules entry so later `import app.integrations.<name>` works
     sys.modules[f'app.integrations.{name}'] = mod
+    return mod
+
+
+def __dir__():
+    return sorted(list(globals()) + _integration_names)
+
 
 # Optionally export names
 __all__ = _integration_names
@@ -1,60 +1,95 @@
 """LLM client wrapper.
-Tries to use google.generativeai (Gemini). Falls back to a simple dummy client
-that echoes prompts when the SDK is not available.
+Thin, agent-facing client over integrations/gemini_api, which in turn talks to
+the shared provider (Gemini REST over a pooled session, or the local fake with
+STUDYAI_LLM_BACKEND=fake). Every agent gets the same surface:
+
+    generate(prompt) -> str, stream(prompt) -> iterator, batch(prompts) -> list
+
+plus create_context / release_context for material reused across calls
+(uploaded once as a Gemini context cache where possible). Pass `task=`
+("chat", "flashcards", "summary:Detailed", ...) to route the call to the
+model tier for that task (integrations/routing.py).
+
+Falls back to a simple dummy client that echoes prompts when no backend is
+configured (e.g. no API key), so the UI still works offline.
 """
-import os
 import logging
-from typing import Optional
+from typing import Iterator, Optional
 
-try:
-    import google.generativeai as genai
-    GENAI_AVAILABLE = True
-except Exception:
-    GENAI_AVAILABLE = False
+from integrations import gemini_api, routing, tokens
+from integrations.providers import CachedContext
+from integrations.resilience import LLMConfigError, LLMError
 
 
 class LLMClient:
-    """Simple wrapper exposing generate(prompt) -> str
+    """Simple wrapper exposing generate / stream / batch.
 
-    If the Gemini SDK is available, calls it. Otherwise provides a local
-    deterministic fallback for development.
+    Retries, failover, rate limiting and telemetry are handled by gemini_api;
+    connections come from the process-wide provider, so every LLMClient shares
+    one pool.
     """
 
-    def __init__(self, api_key: Optional[str] = None, model: str = "gemini-1.5-mini"):
-        self.api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("OPENAI_API_KEY")
+    def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None,
+                 generation_config: Optional[dict] = None):
+        # api_key is kept for backwards compatibility; the provider reads GEMINI_API_KEY
+        self.api_key = api_key
         self.model_name = model
-        if GENAI_AVAILABLE:
-            try:
-                genai.configure(api_key=self.api_key)
-                # model can be a string name used by the wrapper later
-                self._model = model
-            except Exception as e:
-                logging.getLogger(__name__).exception("Failed to configure Gemini client: %s", e)
-                self._model = None
-        else:
-            self._model = None
-
-    def generate(self, prompt: str) -> str:
-        if GENAI_AVAILABLE and self._model:
-            try:
-                # Using the GenerativeModel convenience wrapper if present
-                model = genai.get_model(self._model) if hasattr(genai, 'get_model') else None
-                if model is not None:
-                    # Newer SDKs may have different call shapes; attempt best-effort
-                    resp = model.generate(prompt)
-                    if hasattr(resp, 'text'):
-                        return resp.text
-                    return str(resp)
-                # Fallback attempt using older helper
-                resp = genai.generate_text(model=self._model, input=prompt)
-                # Try to extract text
-                if isinstance(resp, dict) and 'candidates' in resp and resp['candidates']:
-                    return resp['candidates'][0].get('content', '')
-                return str(resp)
-            except Exception as e:
-                logging.getLogger(__name__).exception("Gemini generate failed: %s", e)
-                raise
+        self.generation_config = generation_config
+        self.offline = False
 
+    def _models(self, task: Optional[str] = None, prompt: str = "") -> list[str] | None:
+        if not self.model_name:
+            # No pinned model: route by task, or use the default order
+            return routing.models_for(task, tokens.estimate_tokens(prompt)) if task else None
+        # Preferred model first, then the usual failover order
+        return [self.model_name] + [m for m in gemini_api.DEFAULT_MODELS if m != self.model_name]
+
+    @staticmethod
+    def _preview(prompt: str) -> str:
         # Fallback: return a deterministic preview so UI works offline
         preview = prompt[:2000]
         return "[LLM disabled - local preview]\n" + (preview + ("..." if len(prompt) > 2000 else ""))
+
+    def generate(self, prompt: str, generation_config: Optional[dict] = None,
+                 context: Optional[CachedContext] = None, task: Optional[str] = None) -> str:
+        try:
+            models = self._models(task, context.inline(prompt) if context else prompt)
+            return gemini_api.generate_text(prompt, generation_config or self.generation_config,
+                                            models, context=context)
+        except LLMConfigError as e:
+            if not self.offline:
+                logging.getLogger(__name__).warning("LLM backend not configured, using local preview: %s", e)
+                self.offline = True
+            return self._preview(context.inline(prompt) if context else prompt)
+
+    def stream(self, prompt: str, generation_config: Optional[dict] = None,
+               context: Optional[CachedContext] = None, task: Optional[str] = None) -> Iterator[str]:
+        try:
+            models = self._models(task, context.inline(prompt) if context else prompt)
+            yield from gemini_api.stream_text(prompt, generation_config or self.generation_config,
+                                              models, context=context)
+        except LLMConfigError:
+            self.offline = True
+            yield self._preview(context.inline(prompt) if context else prompt)
+
+    def create_context(self, text: str, task: Optional[str] = None) -> CachedContext:
+        """Upload `text` once for reuse across generate(..., context=...) calls.
+        Use the same `task` as those calls so the cache lives on their model."""
+        try:
+            return gemini_api.create_context_cache(text, self._models(task, text))
+        except LLMConfigError:
+            self.offline = True
+            return CachedContext(text=text)
+
+    def release_context(self, context: Optional[CachedContext]) -> None:
+        gemini_api.release_context_cache(context)
+
+    def batch(self, prompts: list[str], generation_config: Optional[dict] = None,
+              max_workers: int = 4, task: Optional[str] = None) -> list[str | LLMError]:
+        try:
+            models = self._models(task, max(prompts, key=len, default=""))
+            return gemini_api.batch_generate(prompts, generation_config or self.generation_config,
+                                             models, max_workers=max_workers)
+        except LLMConfigError:
+            self.offline = True
+            return [self._preview(p) for p in prompts]
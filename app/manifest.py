@@ -0,0 +1,290 @@
+"""Per-class freshness manifest for derived artifacts.
+
+Every artifact we derive from a class file records what it was built from,
+in data/classes/<Class>/manifest.json:
+
+    transcript --summary--> <Course>_<date>.txt/.json --pdf--> <Course>_<date>.pdf
+    notes      --flashcards--> flashcards/<stem>.json
+
+Each entry stores the content hash of its input, a fingerprint of the prompt
+template (or renderer version) and the generation config. An artifact is
+stale when its output is missing or any of those changed, so a rebuild only
+redoes what is actually out of date, like make:
+
+    m = manifest.get_manifest("Math_201")
+    m.stale()                       # [(output, entry, reason), ...]
+    manifest.rebuild("Math_201")    # redo stale nodes, in parallel
+
+    python -m app.manifest status --class Math_201
+    python -m app.manifest rebuild --class Math_201 [--workers 4]
+
+File hashes are cached in the manifest by (mtime, size), so a status check
+does not re-read unchanged transcripts.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app import storage
+
+MANIFEST_NAME = "manifest.json"
+# LLM-backed rebuilds run this many at a time (on top of the shared rate limiter)
+REBUILD_WORKERS = int(os.getenv("STUDYAI_REBUILD_WORKERS", "4"))
+
+
+def fingerprint(value) -> str:
+    """Short stable hash of a template string or a JSON-serializable config."""
+    raw = value if isinstance(value, str) else json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class Manifest:
+    """Dependency records for one class (output path -> entry)."""
+
+    def __init__(self, class_name: str, root: Path | None = None):
+        # Real class name ("Math 201"), used for metadata lookups on rebuild
+        self.class_name = storage.class_name(class_name)
+        self.root = (Path(root) if root is not None else storage.class_dir(class_name)).resolve()
+        self.path = self.root / MANIFEST_NAME
+        self._lock = threading.RLock()
+        self.data = {"artifacts": {}, "files": {}}
+        if self.path.exists():
+            try:
+                self.data.update(json.loads(self.path.read_text(encoding="utf-8")))
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable manifest {self.path}: {e}")
+
+    # ---------- hashing ----------
+
+    def _key(self, path: str | Path) -> str:
+        """Paths inside the class folder are stored relative to it, others absolute."""
+        p = Path(path).resolve()
+        try:
+            return p.relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(p)
+
+    def _abs(self, key: str) -> Path:
+        p = Path(key)
+        return p if p.is_absolute() else self.root / p
+
+    def file_hash(self, path: str | Path) -> str | None:
+        """sha256 of the file (cached by mtime and size); None if it does not exist."""
+        p = Path(path)
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            return None
+        key = self._key(p)
+        with self._lock:
+            cached = self.data["files"].get(key)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+        with self._lock:
+            self.data["files"][key] = [st.st_mtime_ns, st.st_size, digest]
+        return digest
+
+    # ---------- records ----------
+
+    def save(self) -> None:
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    def record(self, output: str | Path, kind: str, source: str | Path,
+               template: str = "", config=None, offline: bool = False) -> None:
+        """Note that `output` was just built by step `kind` from `source`.
+
+        `offline` marks a local stand-in (e.g. an extractive summary written while
+        no model was reachable); it stays stale until built properly.
+        """
+        entry = {
+            "kind": kind,
+            "class": self.class_name,
+            "source": self._key(source),
+            "source_hash": self.file_hash(source),
+            "template": template,
+            "config": fingerprint(config) if config is not None else "",
+            "built": round(time.time(), 3),
+        }
+        if offline:
+            entry["offline"] = True
+        with self._lock:
+            self.data["artifacts"][self._key(output)] = entry
+            self.save()
+
+    def entry(self, output: str | Path) -> dict | None:
+        with self._lock:
+            return self.data["artifacts"].get(self._key(output))
+
+    def output_for(self, kind: str, source: str | Path) -> Path | None:
+        """Existing output of step `kind` built from `source`, if any."""
+        key = self._key(source)
+        with self._lock:
+            for out, e in self.data["artifacts"].items():
+                if e["kind"] == kind and e["source"] == key:
+                    return self._abs(out)
+        return None
+
+    def owner(self, output: str | Path) -> str | None:
+        """Source recorded for `output` (None if unknown)."""
+        e = self.entry(output)
+        return e["source"] if e else None
+
+    # ---------- freshness ----------
+
+    def reason(self, output: str | Path, current: dict | None = None) -> str | None:
+        """Why `output` is stale, or None if it is fresh. `current` = {"template", "config"} now."""
+        e = self.entry(output)
+        if e is None:
+            return "not recorded"
+        if not self._abs(self._key(output)).exists():
+            return "output missing"
+        if e.get("offline"):
+            return "offline fallback"
+        source_hash = self.file_hash(self._abs(e["source"]))
+        if source_hash is None:
+            return "source missing"
+        if source_hash != e["source_hash"]:
+            return "source changed"
+        if current:
+            if current.get("template", e["template"]) != e["template"]:
+                return "template changed"
+            if current.get("config", e["config"]) != e["config"]:
+                return "config changed"
+        return None
+
+    def stale(self) -> list[tuple[Path, dict, str]]:
+        """Every recorded artifact that needs rebuilding, with the reason."""
+        steps = current_steps()
+        with self._lock:
+            items = list(self.data["artifacts"].items())
+        out = []
+        for key, e in items:
+            output = self._abs(key)
+            why = self.reason(output, steps.get(e["kind"]))
+            if why and why != "source missing":
+                out.append((output, e, why))
+        return out
+
+    def untracked_transcripts(self) -> list[Path]:
+        """Transcripts that have never been summarized."""
+        return [p for p in sorted((self.root / "transcripts").glob("*.txt"))
+                if self.output_for("summary", p) is None]
+
+
+def current_steps() -> dict[str, dict]:
+    """Template / config fingerprints each build step would use right now."""
+    from app import pdf_render, summarizer
+    from app.agents.flashcards_agent import FlashcardsAgent
+    return {
+        "summary": {"template": fingerprint(summarizer.summary_prompt("")),
+                    "config": fingerprint(summarizer.summary_config())},
+        "pdf": {"template": fingerprint(f"render-v{pdf_render.RENDER_VERSION}"), "config": ""},
+        "flashcards": {"template": fingerprint(FlashcardsAgent.build_prompt("", 10)), "config": ""},
+    }
+
+
+_manifests: dict[str, Manifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_manifest(class_name: str, root: Path | None = None) -> Manifest:
+    """One shared Manifest per class folder (all writers go through the same lock)."""
+    root = (Path(root) if root is not None else storage.class_dir(class_name)).resolve()
+    with _manifests_lock:
+        if str(root) not in _manifests:
+            _manifests[str(root)] = Manifest(class_name, root)
+        return _manifests[str(root)]
+
+
+# ---------- rebuild ----------
+
+def _rebuild_one(class_name: str, output: Path | None, entry: dict) -> str:
+    from app import pdf_render, summarizer
+    m = get_manifest(class_name)
+    source = m._abs(entry["source"])
+    # The class the artifact was built for, not the folder name ("Math 201", not "Math_201")
+    class_name = entry.get("class") or m.class_name
+    if entry["kind"] == "summary":
+        # Same output path as before (None for a transcript never summarized)
+        return f"summary {summarizer.summarize_file(source, output, class_name=class_name, wait_pdf=True, allow_offline=False)}"
+    if entry["kind"] == "pdf":
+        pdf_render.submit(source, output).result()  # course and date come from the summary JSON
+        m.record(output, "pdf", source, current_steps()["pdf"]["template"])
+        return f"pdf {output}"
+    if entry["kind"] == "flashcards":
+        from app import batch_queue
+        batch_queue.get_queue().submit_flashcards(source, class_name)
+        return f"flashcards {output} (queued on the batch queue)"
+    raise ValueError(f"Unknown artifact kind: {entry['kind']}")
+
+
+def rebuild(class_name: str, workers: int = REBUILD_WORKERS, include_new: bool = True) -> tuple[int, int]:
+    """
+    Redo the stale artifacts of a class, `workers` at a time. Summaries go
+    first; rebuilding a summary also re-renders its PDF, so only PDFs whose
+    summary is fresh are rendered separately. Stale flashcards are queued on
+    the batch queue. With include_new, transcripts never summarized are
+    summarized too. Returns (rebuilt, failed).
+    """
+    m = get_manifest(class_name)
+    class_name = m.class_name
+    stale = m.stale()
+    summaries = [(out, e) for out, e, _ in stale if e["kind"] == "summary"]
+    redone_json = {m._key(out.with_suffix(".json")) for out, _ in summaries}
+    others = [(out, e) for out, e, _ in stale if e["kind"] != "summary" and e["source"] not in redone_json]
+    if include_new:
+        summaries += [(None, {"kind": "summary", "source": m._key(p)}) for p in m.untracked_transcripts()]
+
+    done = failed = 0
+    for stage in (summaries, others):
+        if not stage:
+            continue
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [(pool.submit(_rebuild_one, class_name, out, e), out, e) for out, e in stage]
+            for future, out, e in futures:
+                try:
+                    print(f"🔁 Rebuilt {future.result()}")
+                    done += 1
+                except Exception as err:
+                    failed += 1
+                    print(f"❌ Rebuild of {out or e['source']} failed: {err}")
+    return done, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Freshness of derived class artifacts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("status", "rebuild"):
+        sp = sub.add_parser(name)
+        sp.add_argument("--class", dest="class_name", required=True)
+        if name == "rebuild":
+            sp.add_argument("--workers", type=int, default=REBUILD_WORKERS)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        m = get_manifest(args.class_name)
+        stale = m.stale()
+        new = m.untracked_transcripts()
+        for out, e, why in stale:
+            print(f"{e['kind']:<11} {why:<17} {out}")
+        for p in new:
+            print(f"{'summary':<11} {'new transcript':<17} {p}")
+        m.save()  # keep the refreshed hash cache
+        print(f"📋 {len(stale)} stale, {len(new)} new")
+    else:
+        ok, bad = rebuild(args.class_name, args.workers)
+        print(f"🔁 Rebuilt {ok} artifacts ({bad} failed)")
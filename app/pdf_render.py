@@ -0,0 +1,224 @@
+"""Summary PDF rendering in a process pool.
+
+ReportLab layout is pure CPU work, so it does not belong on the thread that
+handles an upload. save_summary writes the .txt and .json, hands the PDF to
+this module and returns right away:
+
+    future = pdf_render.submit(json_path, pdf_path, metadata)
+    pdf_render.wait()          # block until every submitted PDF is written
+
+Workers build the paragraph styles once (`_styles`) and reuse them for every
+PDF they render. If the pool cannot be used (e.g. a worker crashed), the PDF
+is rendered in the calling thread instead.
+
+Re-render every summary PDF from its JSON, using all cores:
+
+    python -m app.pdf_render [--root data/classes] [--workers N]
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import (
+    ListFlowable, ListItem, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+)
+
+from app import storage, summary_model
+
+# Bump when the layout changes so the manifest marks existing PDFs stale
+RENDER_VERSION = 1
+# Workers for PDFs rendered in the background of the app (bulk re-render uses all cores)
+PDF_WORKERS = int(os.getenv("STUDYAI_PDF_WORKERS", "2"))
+
+_style_cache: dict | None = None
+
+
+def _styles() -> dict:
+    """Paragraph and table styles, built once per process."""
+    global _style_cache
+    if _style_cache is None:
+        base = getSampleStyleSheet()
+        _style_cache = {
+            "title": ParagraphStyle("TitleStyle", parent=base["Heading1"], fontSize=20, spaceAfter=4, alignment=1),
+            "header": ParagraphStyle("HeaderStyle", parent=base["Heading2"], fontSize=14, spaceBefore=12, spaceAfter=6),
+            "body": base["Normal"],
+            "table": TableStyle([
+                ("ALIGN", (0, 0), (0, 0), "LEFT"),
+                ("ALIGN", (1, 0), (1, 0), "RIGHT"),
+                ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+            ]),
+        }
+    return _style_cache
+
+
+def _add_footer(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica", 9)
+    canvas.drawString(40, 20, "Generated by LectureAI")
+    canvas.drawRightString(550, 20, f"Page {doc.page}")
+    canvas.restoreState()
+
+
+def render(summary: summary_model.Summary, output_path: Path, metadata: dict | None = None) -> Path:
+    """Render `summary` into a styled PDF at `output_path`."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    styles = _styles()
+
+    doc = SimpleDocTemplate(str(output_path), pagesize=letter,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=72)
+    story = []
+
+    # Title
+    if summary.title:
+        story.append(Paragraph(summary.title, styles["title"]))
+
+    # Course left / Date right
+    course = metadata.get("course_name", "") if metadata else ""
+    date_str = (metadata or {}).get("date") or datetime.now().strftime("%m/%d/%y")
+    header_table = Table([[f"Course: {course}", date_str]], colWidths=[3.5 * inch, 3.5 * inch])
+    header_table.setStyle(styles["table"])
+    story.append(header_table)
+
+    # Body
+    sections = [
+        ("Discussion:", summary.discussion),
+        ("Implications:", summary.implications),
+        ("Advice/Actions:", summary.actions),
+        ("Glossary:", [f"{t} — {d}" if d else t for t, d in summary.glossary]),
+    ] + [(f"{h}:" if h else "", items) for h, items in summary.extra.items()]
+    for header, items in sections:
+        if not items:
+            continue
+        if header:
+            story.append(Paragraph(header, styles["header"]))
+        story.append(ListFlowable([ListItem(Paragraph(item, styles["body"])) for item in items], bulletType='bullet'))
+        story.append(Spacer(1, 0.15 * inch))
+
+    if summary.tldr:
+        story.append(Spacer(1, 0.3 * inch))
+        story.append(Paragraph("Conclusion / TL;DR", styles["header"]))
+        story.append(Paragraph(summary.tldr, styles["body"]))
+
+    doc.build(story, onFirstPage=_add_footer, onLaterPages=_add_footer)
+    return output_path
+
+
+def render_file(json_path: str, pdf_path: str, metadata: dict | None = None) -> str:
+    """Worker entry point: load the summary JSON and render it (paths as str for pickling).
+
+    Without `metadata`, the course name and date stored in the summary are used
+    (older summaries without them: the class's current metadata).
+    """
+    summary = summary_model.load(json_path)
+    if metadata is None:
+        metadata = summary.metadata or storage.class_metadata(Path(json_path).parent.parent.name)
+    render(summary, Path(pdf_path), metadata)
+    return pdf_path
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_pending: set[Future] = set()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(1, PDF_WORKERS))
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def submit(json_path: Path, pdf_path: Path, metadata: dict | None = None) -> Future:
+    """Render the PDF for `json_path` in the background. The future resolves to the PDF path."""
+    # Absolute paths: workers keep the working directory they were started in
+    json_path, pdf_path = Path(json_path).resolve(), Path(pdf_path).resolve()
+    try:
+        future = _get_pool().submit(render_file, str(json_path), str(pdf_path), metadata)
+    except (BrokenProcessPool, RuntimeError) as e:
+        print(f"⚠️ PDF pool unavailable ({e}); rendering in this thread")
+        _reset_pool()
+        future = Future()
+        try:
+            future.set_result(render_file(str(json_path), str(pdf_path), metadata))
+        except Exception as err:
+            future.set_exception(err)
+        return future
+
+    def _done(f: Future) -> None:
+        _pending.discard(f)
+        if f.cancelled():
+            return
+        error = f.exception()
+        if error is None:
+            print(f"📄 Summary (PDF) generated: {f.result()}")
+        else:
+            print(f"❌ PDF rendering failed for {pdf_path}: {error}")
+
+    _pending.add(future)
+    future.add_done_callback(_done)
+    return future
+
+
+def wait(timeout: float | None = None) -> bool:
+    """Block until every submitted PDF is done. Returns False on timeout."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    for future in list(_pending):
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            future.result(remaining)
+        except FutureTimeout:
+            return False
+        except Exception:
+            pass  # already reported by the done callback
+    return True
+
+
+def rerender_all(root: str | Path = "data/classes", workers: int | None = None) -> tuple[int, int]:
+    """Re-render every summary PDF under `root` from its JSON (and the metadata stored in it)."""
+    jobs = [(str(p), str(p.with_suffix(".pdf"))) for p in sorted(Path(root).rglob("summaries/*.json"))]
+    if not jobs:
+        return 0, 0
+
+    rendered = failed = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(render_file, *job): job[1] for job in jobs}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                rendered += 1
+            except Exception as e:
+                failed += 1
+                print(f"❌ {futures[future]}: {e}")
+    return rendered, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-render summary PDFs from their JSON")
+    parser.add_argument("--root", default="data/classes")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    ok, bad = rerender_all(args.root, args.workers)
+    print(f"📄 Re-rendered {ok} PDFs ({bad} failed) in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,110 @@
+"""Keyword retrieval (BM25) over chunked session material.
+
+ChatAgent used to paste the last few loaded files into every prompt. For a
+large selection it now indexes everything once per session and sends only
+the chunks relevant to the current question:
+
+    index = retrieval.BM25Index.from_sources([("lec1.txt", text1), ("notes.md", text2)])
+    context = index.context_for("what is a Fourier series?", budget_tokens=3000)
+
+Sources are split into ~CHUNK_TOKENS pieces (integrations.tokens.chunk). The
+index is a sparse term-by-chunk matrix in CSR layout (term -> chunk ids and
+term frequencies, NumPy arrays). A query touches only the posting lists of
+its terms, and each term's BM25 contribution is added for all its chunks in
+one vectorized step.
+"""
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.extractive import content_words
+from integrations import tokens
+
+CHUNK_TOKENS = 300
+K1 = 1.5
+B = 0.75
+
+
+@dataclass
+class Chunk:
+    source: str
+    text: str
+    tokens: int
+
+
+class BM25Index:
+    def __init__(self, chunks: list[Chunk]):
+        self.chunks = chunks
+        vocab: dict[str, int] = {}
+        rows: list[tuple[int, int, int]] = []  # (term, chunk, tf)
+        lengths = np.zeros(len(chunks), dtype=np.float32)
+        for c, chunk in enumerate(chunks):
+            counts = Counter(content_words(chunk.text))
+            lengths[c] = sum(counts.values())
+            for word, tf in counts.items():
+                rows.append((vocab.setdefault(word, len(vocab)), c, tf))
+        self.vocab = vocab
+
+        # CSR by term: postings of term t are [indptr[t], indptr[t + 1])
+        rows.sort()
+        terms = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        self.doc_ids = np.fromiter((r[1] for r in rows), dtype=np.int32, count=len(rows))
+        self.tfs = np.fromiter((r[2] for r in rows), dtype=np.float32, count=len(rows))
+        self.indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.add.at(self.indptr, terms + 1, 1)
+        np.cumsum(self.indptr, out=self.indptr)
+
+        n = max(len(chunks), 1)
+        df = np.diff(self.indptr).astype(np.float32)
+        self.idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg = float(lengths.mean()) if len(chunks) else 1.0
+        # Per-chunk length normalisation, precomputed once
+        self.norm = (K1 * (1 - B + B * lengths / max(avg, 1.0))).astype(np.float32)
+
+    @classmethod
+    def from_sources(cls, sources: list[tuple[str, str]], chunk_tokens: int = CHUNK_TOKENS) -> "BM25Index":
+        """Index (name, text) pairs, each split into chunks of about `chunk_tokens`."""
+        chunks = []
+        for name, text in sources:
+            for piece in tokens.chunk(text or "", chunk_tokens):
+                if piece.strip():
+                    chunks.append(Chunk(name, piece, tokens.estimate_tokens(piece)))
+        return cls(chunks)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk for `query`."""
+        scores = np.zeros(len(self.chunks), dtype=np.float32)
+        for word in set(content_words(query)):
+            t = self.vocab.get(word)
+            if t is None:
+                continue
+            lo, hi = self.indptr[t], self.indptr[t + 1]
+            docs, tf = self.doc_ids[lo:hi], self.tfs[lo:hi]
+            scores[docs] += self.idf[t] * tf * (K1 + 1) / (tf + self.norm[docs])
+        return scores
+
+    def search(self, query: str, k: int = 8) -> list[tuple[Chunk, float]]:
+        """Top `k` chunks with a positive score, best first."""
+        scores = self.scores(query)
+        hits = np.flatnonzero(scores > 0)
+        if not len(hits):
+            return []
+        top = hits[np.argsort(-scores[hits], kind="stable")[:k]]
+        return [(self.chunks[i], float(scores[i])) for i in top]
+
+    def context_for(self, query: str, budget_tokens: int, k: int = 12) -> str:
+        """Best chunks for `query` that fit in `budget_tokens`, in source order."""
+        picked, used = [], 0
+        for chunk, _ in self.search(query, k):
+            if used + chunk.tokens > budget_tokens:
+                continue
+            picked.append(chunk)
+            used += chunk.tokens
+        order = {id(c): i for i, c in enumerate(self.chunks)}
+        picked.sort(key=lambda c: order[id(c)])
+        return "\n\n".join(f"[{c.source}]\n{c.text}" for c in picked)
+
@@ -0,0 +1,208 @@
+# app/storage.py
+"""Class metadata store (class_data.json).
+
+Summaries, PDFs, the CLI and the UI all need the same few facts (selected
+class, course name / code, lecture date). Instead of each of them re-reading
+and re-parsing class_data.json, they go through one process-wide store:
+
+    store = storage.get_store()
+    store.class_metadata("Math 201")   # {"course_name", "class_code", "lecture_title", "date"}
+    store.selected_class()
+    store.set_selected("Math 201")     # atomic write-through
+
+Class folders are resolved here too, so every module agrees on where a
+class lives (see `class_dir`):
+
+    storage.class_dir("Math 201")      # data/classes/Math 201
+    storage.class_dir("Math_201")      # same folder (underscored file-name form)
+
+Reads come from memory; the file is only re-read when its mtime or size
+changes (e.g. edited by hand). Writes go to a temp file that replaces the
+original, so readers never see a half-written file.
+
+Schema (older layouts with a top-level "classes" dict, or class names as
+top-level keys, are still read):
+
+    {
+      "current_classes": {"classes": ["General", ...], "selected": "General"},
+      "class_data": {
+        "General": {"notes": "", "transcriptions": [], "ai_history": [],
+                    "course_name": "...", "class_code": "...", "lecture_title": "...", "date": "MM/DD/YY"}
+      }
+    }
+"""
+import copy
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+# Searched in order; the first existing file is the one written back
+DEFAULT_PATHS = (Path("class_data.json"), Path("data/class_data.json"))
+# One folder per class, named like the class in the UI ("Math 201")
+CLASSES_DIR = Path("data/classes")
+
+METADATA_FIELDS = ("course_name", "class_code", "lecture_title", "date")
+
+
+class MetadataStore:
+    def __init__(self, paths: tuple[Path, ...] = DEFAULT_PATHS):
+        self.paths = tuple(Path(p) for p in paths)
+        self._lock = threading.RLock()
+        self._path: Path | None = None
+        self._stat: tuple[int, int] | None = None
+        self._data: dict = {}
+
+    # ---------- cache ----------
+
+    def _current_path(self) -> Path:
+        for p in self.paths:
+            if p.exists():
+                return p.resolve()
+        return self.paths[0].resolve()
+
+    def _refresh(self) -> dict:
+        """Cached data, re-read only if the file changed since the last look."""
+        path = self._current_path()
+        try:
+            st = os.stat(path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if path == self._path and stamp == self._stat:
+            return self._data
+
+        data: dict = {}
+        if stamp is not None:
+            try:
+                loaded = json.loads(path.read_text(encoding="utf-8"))
+                data = loaded if isinstance(loaded, dict) else {}
+            except Exception as e:
+                print(f"⚠️ Error reading {path}: {e}")
+        self._path, self._stat, self._data = path, stamp, data
+        return data
+
+    def data(self) -> dict:
+        """A copy of the whole document (for callers that need more than metadata)."""
+        with self._lock:
+            return copy.deepcopy(self._refresh())
+
+    # ---------- reads ----------
+
+    def _class_entry(self, data: dict, class_name: str) -> dict | None:
+        for section in (data.get("class_data"), data.get("classes")):
+            if isinstance(section, dict) and isinstance(section.get(class_name), dict):
+                return section[class_name]
+        entry = data.get(class_name)
+        return entry if isinstance(entry, dict) else None
+
+    def class_metadata(self, class_name: str) -> dict:
+        """Course name, code, lecture title and date for a class (defaults filled in)."""
+        with self._lock:
+            entry = self._class_entry(self._refresh(), class_name) or {}
+            return {
+                "course_name": entry.get("course_name") or class_name,
+                "class_code": entry.get("class_code") or class_name,
+                "lecture_title": entry.get("lecture_title", ""),
+                "date": entry.get("date") or datetime.now().strftime("%m/%d/%y"),
+            }
+
+    def selected_class(self) -> str | None:
+        with self._lock:
+            current = self._refresh().get("current_classes")
+            return current.get("selected") if isinstance(current, dict) else None
+
+    def classes(self) -> list[str]:
+        with self._lock:
+            current = self._refresh().get("current_classes")
+            return list(current.get("classes", [])) if isinstance(current, dict) else []
+
+    def known_classes(self) -> set[str]:
+        """Class names listed in the UI's class list or with stored class data."""
+        with self._lock:
+            data = self._refresh()
+            names = set(self.classes())
+            for section in (data.get("class_data"), data.get("classes")):
+                if isinstance(section, dict):
+                    names.update(section)
+            return names
+
+    # ---------- writes ----------
+
+    def update(self, change: Callable[[dict], None]) -> None:
+        """Apply `change` to the latest document and write it back atomically."""
+        with self._lock:
+            data = copy.deepcopy(self._refresh())
+            change(data)
+            path = self._current_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+            st = os.stat(path)
+            self._path, self._stat, self._data = path, (st.st_mtime_ns, st.st_size), data
+
+    def set_selected(self, class_name: str) -> None:
+        def _change(data: dict) -> None:
+            current = data.setdefault("current_classes", {})
+            current["selected"] = class_name
+            classes = current.setdefault("classes", [])
+            if class_name not in classes:
+                classes.append(class_name)
+        self.update(_change)
+
+    def set_class_metadata(self, class_name: str, **fields) -> None:
+        """Store course_name / class_code / lecture_title / date for a class."""
+        unknown = set(fields) - set(METADATA_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown metadata fields: {', '.join(sorted(unknown))}")
+
+        def _change(data: dict) -> None:
+            data.setdefault("class_data", {}).setdefault(class_name, {}).update(fields)
+        self.update(_change)
+
+
+_store: MetadataStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> MetadataStore:
+    """Process-wide store (paths are relative to the working directory)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MetadataStore()
+        return _store
+
+
+# ---------- class folders ----------
+
+def class_name(name: str) -> str:
+    """Canonical name of a class, accepting the underscored form used in file names.
+
+    "Math_201" resolves to "Math 201" when that is the class known to
+    class_data.json or the folder that exists on disk; otherwise `name` is
+    returned as given.
+    """
+    candidates = [name] + ([name.replace("_", " ")] if "_" in name else [])
+    known = get_store().known_classes()
+    for candidate in candidates:
+        if candidate in known:
+            return candidate
+    for candidate in candidates:
+        if (CLASSES_DIR / candidate).is_dir():
+            return candidate
+    return name
+
+
+def class_dir(name: str) -> Path:
+    """data/classes/<canonical class name>: notes, transcripts, summaries, manifest, indexes."""
+    return CLASSES_DIR / class_name(name)
+
+
+def class_metadata(name: str) -> dict:
+    """Course name, code, lecture title and date of a class ("Math_201" finds "Math 201")."""
+    return get_store().class_metadata(class_name(name))
+
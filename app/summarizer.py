@@ -1,14 +1,8 @@
 from pathlib import Path
 from datetime import datetime
-import json
-from integrations import gemini_api
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer,
-    ListFlowable, ListItem, Table, TableStyle
-)
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
+import os
+from app import course_digest, extractive, manifest, pdf_render, storage, summary_model, vector_index
+from integrations import gemini_api, routing, telemetry, tokens
 
 
 # Strict summarizer template with "mark unsure" rule
@@ -44,17 +38,67 @@ SOURCE MATERIAL:
 \"\"\"{text}\"\"\""""
 
 
+# Share of transcript tokens kept by the local extractive stage (1 = send everything)
+EXTRACTIVE_RATIO = float(os.getenv("STUDYAI_EXTRACTIVE_RATIO", "0.5"))
+
+_SUMMARY_CONFIG = {
+    "temperature": 0.25,
+    "top_p": 0.9,
+    "max_output_tokens": 900,
+}
+
+
+class OfflineSummaryError(gemini_api.LLMError):
+    """No model was reachable; an offline extractive summary was saved at `path` instead."""
+
+    def __init__(self, path: Path, cause: Exception):
+        super().__init__(f"LLM unavailable ({cause}); saved an offline summary: {path}")
+        self.path = path
+
+
 def summarize_text(text: str) -> str:
-    """Summarize text using strict academic rules."""
-    prompt = _TEMPLATE.format(text=text)
-    return gemini_api.generate_text(
-        prompt,
-        generation_config={
-            "temperature": 0.25,
-            "top_p": 0.9,
-            "max_output_tokens": 900,
-        },
-    ).strip()
+    """Summarize text using strict academic rules.
+
+    Long transcripts are first cut down locally to EXTRACTIVE_RATIO of their
+    tokens (app/extractive.py). Text still longer than the prompt budget is
+    split into chunks that are summarized separately; the partial summaries
+    are then summarized once more.
+
+    Raises gemini_api.LLMError if the model could not be reached, so callers
+    never write error text into summary files.
+    Telemetry is labelled by the caller (summarize_file, SummarizerAgent).
+    """
+    compressed = extractive.compress(text, EXTRACTIVE_RATIO)
+    if compressed is not text:
+        print(f"✂️ Extractive stage: ~{tokens.estimate_tokens(text)} → ~{tokens.estimate_tokens(compressed)} tokens")
+        text = compressed
+
+    room = (tokens.budget_for(reserve_output=_SUMMARY_CONFIG["max_output_tokens"])
+            - tokens.estimate_tokens(_TEMPLATE.format(text="")))
+    if tokens.estimate_tokens(text) > room:
+        parts = tokens.chunk(text, room)
+        print(f"✂️ Transcript exceeds the prompt budget, summarizing {len(parts)} chunks")
+        partials = gemini_api.batch_generate([_TEMPLATE.format(text=p) for p in parts], _SUMMARY_CONFIG,
+                                             routing.models_for("summary", room))
+        for partial in partials:
+            if isinstance(partial, gemini_api.LLMError):
+                raise partial
+        text = tokens.fit("\n\n".join(partials), room)
+
+    prompt = summary_prompt(text)
+    return gemini_api.generate_text(prompt, generation_config=_SUMMARY_CONFIG,
+                                    models=routing.models_for("summary", tokens.estimate_tokens(prompt))).strip()
+
+
+def summary_config() -> dict:
+    """Everything besides the template that shapes a summary (recorded in the class manifest)."""
+    return {"generation": _SUMMARY_CONFIG, "extractive_ratio": EXTRACTIVE_RATIO}
+
+
+def summary_prompt(text: str) -> str:
+    """Single-call summary prompt, with the source trimmed to the prompt budget."""
+    frame = _TEMPLATE.format(text="")
+    return _TEMPLATE.format(text=tokens.fit_into(frame, text, reserve_output=_SUMMARY_CONFIG["max_output_tokens"]))
 
 
 def save_summary_txt(summary: str, output_path: Path) -> None:
@@ -63,162 +107,118 @@ def save_summary_txt(summary: str, output_path: Path) -> None:
     output_path.write_text(summary, encoding="utf-8")
 
 
-def _load_class_metadata(class_name: str) -> dict | None:
-    """Load metadata for a given class from class_data.json or data/class_data.json."""
-    if not class_name:
-        return None
+def save_summary_pdf(summary: "str | summary_model.Summary", output_path: Path, metadata: dict | None = None) -> None:
+    """Save the summary into a styled PDF (in this thread). Plain text is parsed into a Summary first."""
+    if isinstance(summary, str):
+        summary = summary_model.parse(summary)
+    pdf_render.render(summary, output_path, metadata)
 
-    candidates = [Path("class_data.json"), Path("data/class_data.json")]
-    for p in candidates:
-        try:
-            if not p.exists():
-                continue
-            data = json.loads(p.read_text(encoding="utf-8"))
-            meta = None
-
-            if isinstance(data, dict):
-                if "classes" in data and isinstance(data["classes"], dict):
-                    meta = data["classes"].get(class_name)
-                if meta is None:  # fallback
-                    meta = data.get(class_name)
-
-            if isinstance(meta, dict):
-                out = {
-                    "course_name": meta.get("course_name") or class_name,
-                    "class_code": meta.get("class_code") or class_name,
-                    "lecture_title": meta.get("lecture_title", ""),
-                    "date": meta.get("date") or datetime.now().strftime("%m/%d/%y"),
-                }
-                return out
-        except Exception as e:
-            print(f"⚠️ Error reading {p}: {e}")
-
-    return {
-        "course_name": class_name,
-        "class_code": class_name,
-        "lecture_title": "",
-        "date": datetime.now().strftime("%m/%d/%y"),
-    }
-
-
-def save_summary_pdf(summary: str, output_path: Path, metadata: dict | None = None) -> None:
-    """Save the summary text into a styled PDF."""
-    output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    doc = SimpleDocTemplate(str(output_path), pagesize=letter,
-                            rightMargin=72, leftMargin=72,
-                            topMargin=72, bottomMargin=72)
-
-    styles = getSampleStyleSheet()
-    story = []
-
-    title_style = ParagraphStyle("TitleStyle", parent=styles["Heading1"],
-                                 fontSize=20, spaceAfter=4, alignment=1)
-    header_style = ParagraphStyle("HeaderStyle", parent=styles["Heading2"],
-                                  fontSize=14, spaceBefore=12, spaceAfter=6)
-    body_style = styles["Normal"]
-
-    # Parse summary
-    lines = summary.splitlines()
-    bullets = []
-    tldr_line = None
-    title_text = None
-
-    for line in lines:
-        if not line.strip():
-            continue
-        if line.startswith("Title:"):
-            title_text = line.replace("Title:", "").strip()
-        elif line.startswith("TL;DR:"):
-            tldr_line = line.replace("TL;DR:", "").strip()
-
-    # Title
-    if title_text:
-        story.append(Paragraph(title_text, title_style))
-
-    # Course left / Date right
-    course = metadata.get("course_name", "") if metadata else ""
-    date_str = metadata.get("date", datetime.now().strftime("%m/%d/%y")) if metadata else datetime.now().strftime("%m/%d/%y")
-
-    header_data = [[f"Course: {course}", date_str]]
-    header_table = Table(header_data, colWidths=[3.5 * inch, 3.5 * inch])
-    header_table.setStyle(TableStyle([
-        ("ALIGN", (0, 0), (0, 0), "LEFT"),
-        ("ALIGN", (1, 0), (1, 0), "RIGHT"),
-        ("FONTNAME", (0, 0), (-1, -1), "Helvetica-Bold"),
-        ("FONTSIZE", (0, 0), (-1, -1), 10),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-    ]))
-    story.append(header_table)
-    #story.append(Spacer(1, 0.15 * inch))
-
-    # Body
-    bullets = []
-    for line in lines:
-        if not line.strip() or line.startswith("Title:") or line.startswith("TL;DR:"):
-            continue
-        if line.endswith(":") and not line.startswith("-"):
-            if bullets:
-                story.append(ListFlowable([ListItem(Paragraph(b[2:].strip(), body_style)) for b in bullets], bulletType='bullet'))
-                story.append(Spacer(1, 0.15 * inch))
-                bullets = []
-            story.append(Paragraph(line.strip(), header_style))
-        elif line.startswith("-"):
-            bullets.append(line)
-        else:
-            story.append(Paragraph(line.strip(), body_style))
-
-    if bullets:
-        story.append(ListFlowable([ListItem(Paragraph(b[2:].strip(), body_style)) for b in bullets], bulletType='bullet'))
-
-    if tldr_line:
-        story.append(Spacer(1, 0.3 * inch))
-        story.append(Paragraph("Conclusion / TL;DR", header_style))
-        story.append(Paragraph(tldr_line, body_style))
-
-    def add_footer(canvas, doc):
-        canvas.saveState()
-        canvas.setFont("Helvetica", 9)
-        canvas.drawString(40, 20, "Generated by LectureAI")
-        canvas.drawRightString(550, 20, f"Page {doc.page}")
-        canvas.restoreState()
-
-    doc.build(story, onFirstPage=add_footer, onLaterPages=add_footer)
-
-
-def summarize_file(input_txt: Path, output_txt: Path, class_name: str = "") -> None:
+def summarize_file(input_txt: Path, output_txt: Path | None, class_name: str = "",
+                   wait_pdf: bool = False, allow_offline: bool = True) -> Path:
     """
-    Summarize transcript → save .txt + .pdf
-    Filenames are metadata-driven: <Course>_<MM-DD-YY>
+    Summarize transcript → save .txt + .json + .pdf
+    Filenames are metadata-driven: <Course>_<MM-DD-YY> unless `output_txt` is given
+    (used when rebuilding a stale summary in place).
+    Returns the path of the .txt summary.
+
+    If no model is reachable, an offline extractive summary is saved instead and
+    recorded as such in the manifest (so it stays stale until summarized again).
+    With allow_offline=False (CLI, rebuilds) OfflineSummaryError is raised after
+    saving it, so the caller reports a failure.
     """
     if not input_txt.exists():
         raise FileNotFoundError(f"Transcript not found: {input_txt}")
 
     raw_text = input_txt.read_text(encoding="utf-8")
-    summary = summarize_text(raw_text)
-
-    # Load metadata
-    if class_name:
-        metadata = _load_class_metadata(class_name)
-    else:
+    llm_error = None
+    with telemetry.call_context("summarizer.summarize_file", class_name=class_name or None):
         try:
-            data = json.loads(Path("class_data.json").read_text(encoding="utf-8"))
-            selected = data.get("current_classes", {}).get("selected")
-            metadata = _load_class_metadata(selected)
-        except Exception:
-            metadata = {"course_name": "General", "date": datetime.now().strftime("%m/%d/%y")}
+            summary = summarize_text(raw_text)
+        except gemini_api.LLMError as e:
+            # No model reachable: keep the lecture usable with a local summary
+            print(f"⚠️ LLM unavailable ({e}); saving an offline extractive summary")
+            summary = extractive.offline_summary(raw_text)
+            llm_error = e
+
+    txt_path = save_summary(summary, class_name, wait_pdf, source=input_txt, output=output_txt,
+                            offline=llm_error is not None)
+    # Fold into the class's course digest (local merge; topics are re-synthesized on build)
+    try:
+        course_digest.merge(txt_path.with_suffix(".json"))
+    except Exception as e:
+        print(f"⚠️ Course digest not updated: {e}")
+    # Keep the class's semantic index current (only these two files are re-embedded)
+    try:
+        index = vector_index.get_index(storage.class_name(txt_path.parent.parent.name))
+        index.update([input_txt, txt_path])
+    except Exception as e:
+        print(f"⚠️ Semantic index not updated: {e}")
+    if llm_error is not None and not allow_offline:
+        raise OfflineSummaryError(txt_path, llm_error)
+    return txt_path
+
+
+def save_summary(summary: str, class_name: str = "", wait_pdf: bool = False,
+                 source: Path | None = None, output: Path | None = None, offline: bool = False) -> Path:
+    """
+    Write an already generated summary as .txt + .json into the class folder and
+    queue its .pdf (app/pdf_render.py). Pass wait_pdf=True to block until the PDF exists.
+
+    Files are named <Course>_<MM-DD-YY>; a second lecture summarized the same
+    day gets _2, _3, ... instead of overwriting the first. `source` (the
+    transcript) is recorded in the class manifest (app/manifest.py) so the
+    summary can be rebuilt when it goes stale; `output` pins the .txt path.
+    `offline` marks a local fallback summary, which the manifest keeps stale.
+    """
+    # Load metadata
+    class_name = storage.class_name(class_name or storage.get_store().selected_class() or "General")
+    metadata = storage.class_metadata(class_name)
 
-    # Build filename from metadata
+    # Files go into the class folder, named from metadata
     course = metadata.get("course_name", "General").replace(" ", "_")
-    date_str = datetime.now().strftime("%m-%d-%y")
-    base_dir = Path(f"data/classes/{course}/summaries")
-    base_dir.mkdir(parents=True, exist_ok=True)
-
-    txt_filename = f"{course}_{date_str}.txt"
-    pdf_filename = f"{course}_{date_str}.pdf"
-
-    save_summary_txt(summary, base_dir / txt_filename)
-    save_summary_pdf(summary, base_dir / pdf_filename, metadata)
-
-    print(f"📝 Summary (text) generated: {base_dir/txt_filename}")
-    print(f"📄 Summary (PDF) generated: {base_dir/pdf_filename}")
+    deps = manifest.get_manifest(class_name)
+    if output is not None:
+        base = Path(output).with_suffix("")
+    else:
+        base = _free_base(storage.class_dir(class_name) / "summaries" / f"{course}_{datetime.now().strftime('%m-%d-%y')}",
+                          deps, source)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    txt_path, json_path, pdf_path = (base.with_name(base.name + ext) for ext in (".txt", ".json", ".pdf"))
+
+    # Parse once; the PDF and the JSON (for search / digests) both use the structure
+    structured = summary_model.parse(summary)
+    # Kept with the summary so re-rendering later shows the same course and date
+    structured.metadata = {**metadata, "class": class_name}
+    save_summary_txt(summary, txt_path)
+    summary_model.save_json(structured, json_path)
+    print(f"📝 Summary (text) generated: {txt_path}")
+
+    # The PDF is rendered in the process pool; the .txt is usable right away
+    future = pdf_render.submit(json_path, pdf_path, metadata)
+    steps = manifest.current_steps()
+    if source is not None:
+        deps.record(txt_path, "summary", source, steps["summary"]["template"], summary_config(), offline=offline)
+    deps.record(pdf_path, "pdf", json_path, steps["pdf"]["template"])
+    if wait_pdf:
+        future.result()
+    return txt_path
+
+
+def _free_base(base: Path, deps: "manifest.Manifest", source: Path | None) -> Path:
+    """`base`, or base_2, base_3, ... if it holds a summary of another transcript."""
+    def taken(candidate: Path) -> bool:
+        txt = candidate.with_name(candidate.name + ".txt")
+        if not txt.exists():
+            return False
+        owner = deps.owner(txt)
+        if source is None:
+            return owner is not None  # unrecorded (older) files are overwritten as before
+        return owner != deps._key(source)
+
+    n = 1
+    candidate = base
+    while taken(candidate):
+        n += 1
+        candidate = base.with_name(f"{base.name}_{n}")
+    return candidate
@@ -0,0 +1,204 @@
+"""Structured lecture summaries.
+
+The summarizer prompt (app/summarizer.py) asks for a fixed plain-text layout:
+
+    Title: ...
+    TL;DR: ...
+    Discussion:
+    - ...
+    Implications: / Advice/Actions: / Glossary:
+
+`parse` turns that text into a `Summary` once, right after the model answers.
+The result is saved as JSON next to the .txt and .pdf, so the PDF renderer and
+anything that searches or aggregates summaries read fields instead of parsing
+text again:
+
+    s = summary_model.parse(text)
+    summary_model.save_json(s, Path(".../Math_201_09-14-25.json"))
+    for path, s in summary_model.load_all("data/classes/Math_201"):
+        print(s.title, len(s.discussion))
+
+`load` / `load_all` keep parsed summaries cached by (mtime, size), so
+repeated scans over thousands of files only re-read the ones that changed.
+"""
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import orjson  # optional: several times faster on large scans
+except Exception:
+    orjson = None
+
+# Bump when the JSON layout changes; older files are re-parsed from their .txt
+SCHEMA_VERSION = 1
+
+# Section header in the text layout -> Summary field
+SECTIONS = {
+    "discussion": "discussion",
+    "implications": "implications",
+    "advice/actions": "actions",
+    "actions": "actions",
+    "glossary": "glossary",
+}
+# Field -> header written back by to_text(), in template order
+_HEADERS = (("discussion", "Discussion"), ("implications", "Implications"),
+            ("actions", "Advice/Actions"), ("glossary", "Glossary"))
+
+
+@dataclass
+class Summary:
+    title: str = ""
+    tldr: str = ""
+    discussion: list[str] = field(default_factory=list)
+    implications: list[str] = field(default_factory=list)
+    actions: list[str] = field(default_factory=list)
+    # (term, definition); definition is "" when the model gave no separator
+    glossary: list[tuple[str, str]] = field(default_factory=list)
+    # Sections the template does not know, plus free lines outside any section
+    extra: dict[str, list[str]] = field(default_factory=dict)
+    # Class metadata when the summary was written (course_name, date, ...), for re-rendering
+    metadata: dict[str, str] = field(default_factory=dict)
+    version: int = SCHEMA_VERSION
+
+    def to_text(self) -> str:
+        """The plain-text layout the summarizer prompt asks for."""
+        lines = []
+        if self.title:
+            lines.append(f"Title: {self.title}")
+        if self.tldr:
+            lines.append(f"TL;DR: {self.tldr}")
+        for name, header in _HEADERS:
+            items = getattr(self, name)
+            if not items:
+                continue
+            lines.append(f"{header}:")
+            if name == "glossary":
+                lines += [f"- {t} — {d}" if d else f"- {t}" for t, d in items]
+            else:
+                lines += [f"- {item}" for item in items]
+        for header, items in self.extra.items():
+            if header:
+                lines.append(f"{header}:")
+            lines += [f"- {item}" for item in items]
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Summary":
+        return cls(
+            title=data.get("title", ""),
+            tldr=data.get("tldr", ""),
+            discussion=list(data.get("discussion", [])),
+            implications=list(data.get("implications", [])),
+            actions=list(data.get("actions", [])),
+            glossary=[(t, d) for t, d in data.get("glossary", [])],
+            extra={k: list(v) for k, v in data.get("extra", {}).items()},
+            metadata=dict(data.get("metadata") or {}),
+            version=data.get("version", SCHEMA_VERSION),
+        )
+
+
+def _split_term(item: str) -> tuple[str, str]:
+    for sep in (" — ", " – ", " - ", ": "):
+        if sep in item:
+            term, definition = item.split(sep, 1)
+            return term.strip(), definition.strip()
+    return item.strip(), ""
+
+
+def parse(text: str) -> Summary:
+    """Parse the summarizer's plain-text layout. Never raises; unknown lines go to `extra`."""
+    summary = Summary()
+    current: list[str] | None = None
+    current_name = ""
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("Title:"):
+            summary.title = line[len("Title:"):].strip()
+            continue
+        if line.startswith("TL;DR:"):
+            summary.tldr = line[len("TL;DR:"):].strip()
+            continue
+        if line.endswith(":") and not line.startswith("-"):
+            header = line[:-1].strip()
+            current_name = SECTIONS.get(header.lower(), "")
+            current = getattr(summary, current_name) if current_name else summary.extra.setdefault(header, [])
+            continue
+        item = line[1:].strip() if line.startswith(("-", "•", "*")) else line
+        if current is None:
+            current = summary.extra.setdefault("", [])
+        if current_name == "glossary":
+            current.append(_split_term(item))
+        else:
+            current.append(item)
+    return summary
+
+
+def _dumps(data: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _loads(raw: bytes) -> dict:
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def save_json(summary: Summary, path: Path) -> Path:
+    """Write `summary` to `path` atomically (tmp file + replace)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_bytes(_dumps(summary.to_dict()))
+    os.replace(tmp, path)
+    return path
+
+
+# path -> ((mtime_ns, size), Summary)
+_cache: dict[str, tuple[tuple[int, int], Summary]] = {}
+_cache_lock = threading.Lock()
+
+
+def load(path: str | Path) -> Summary:
+    """Load one summary JSON. Falls back to parsing the sibling .txt for old or broken files."""
+    path = Path(path)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return parse(path.with_suffix(".txt").read_text(encoding="utf-8"))
+    key = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        hit = _cache.get(str(path))
+    if hit and hit[0] == key:
+        return hit[1]
+
+    try:
+        data = _loads(path.read_bytes())
+        if data.get("version") != SCHEMA_VERSION:
+            raise ValueError(f"schema version {data.get('version')}")
+        summary = Summary.from_dict(data)
+    except Exception as e:
+        txt = path.with_suffix(".txt")
+        if not txt.exists():
+            raise
+        print(f"⚠️ Re-parsing {txt.name} ({e})")
+        summary = parse(txt.read_text(encoding="utf-8"))
+    with _cache_lock:
+        _cache[str(path)] = (key, summary)
+    return summary
+
+
+def load_all(root: str | Path = "data/classes") -> Iterator[tuple[Path, Summary]]:
+    """(json path, Summary) for every summary JSON under `root`, sorted by path."""
+    for path in sorted(Path(root).rglob("summaries/*.json")):
+        try:
+            yield path, load(path)
+        except Exception as e:
+            print(f"⚠️ Skipping unreadable summary {path}: {e}")
@@ -22,8 +22,6 @@ import flet as ft
 
 from .landing_page import create_landing_page
 from pathlib import Path
-import json
-import datetime
 
 
 # ============================================================================
@@ -1665,6 +1663,23 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
         icon=ft.icons.SUMMARIZE,
         style=ft.ButtonStyle(bgcolor=PASTEL_PURPLE, color=ft.colors.ON_PRIMARY)
     )
+    # Generate every mode in one request; switching sum_mode then shows the cached text
+    # Off by default: all modes costs about three summaries' worth of output
+    sum_all_modes = ft.Checkbox(label="All modes", value=False)
+    # (class, notes with mtime/size, query) -> {mode: summary}; only successful results
+    summary_cache: dict = {}
+    summary_last = {"key": None}  # selection shown last (read by _show_cached_mode)
+
+    def _notes_stamp(notes: list) -> tuple:
+        # Edited notes get a new key, so they are summarized again
+        stamp = []
+        for n in notes:
+            try:
+                st = Path(n).stat()
+                stamp.append((n, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append((n, None, None))
+        return tuple(stamp)
 
     # Class selector and notes checklist
     class_select_ref = ft.Ref[ft.Dropdown]()
@@ -1777,9 +1792,19 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
 
         # Call backend summarizer via callbacks (blocking call)
         gen_cb = callbacks.get('generate_summary')
-        if gen_cb and cls and selected_notes:
+        all_cb = callbacks.get('generate_all_summaries') if sum_all_modes.value else None
+        if (gen_cb or all_cb) and cls and selected_notes:
             try:
-                result = gen_cb(class_name=cls, notes=selected_notes, query=q, mode=mode_val)
+                if all_cb:
+                    key = (cls, _notes_stamp(selected_notes), q)
+                    summary_last["key"] = key
+                    results = summary_cache.get(key) or all_cb(class_name=cls, notes=selected_notes, query=q)
+                    # Errors are shown but not cached, so the next click retries
+                    if not any(str(v).startswith("[LLM error]") for v in results.values()):
+                        summary_cache[key] = results
+                    result = results.get(mode_val, "")
+                else:
+                    result = gen_cb(class_name=cls, notes=selected_notes, query=q, mode=mode_val)
                 # put result into output
                 if sum_output_ref.current:
                     sum_output_ref.current.value = result
@@ -1793,6 +1818,18 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
 
     sum_btn.on_click = _generate_summary
 
+    def _show_cached_mode(e):
+        # Modes generated together are already cached: swap the text without a new request
+        cached = summary_cache.get(summary_last["key"])
+        if not cached or not sum_output_ref.current:
+            return
+        text = cached.get(getattr(sum_mode, 'value', 'Topics'))
+        if text:
+            sum_output_ref.current.value = text
+            sum_output_ref.current.update()
+
+    sum_mode.on_change = _show_cached_mode
+
     # --- Summarizer Chat Interface ---
     # Replaces the previous one-shot summary UI with an interactive chat
     class_selector_ref = ft.Ref[ft.Dropdown]()
@@ -1802,6 +1839,9 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
     # Header ref for AI chat so we can update the title with active class
     ai_chat_header = ft.Ref[ft.Text]()
 
+    # Chat log session id per class (fallback persistence); a new one per Start Session
+    chat_session: dict[str, str] = {}
+
     # Top controls: class selector, multi-select files, start session
     # Handlers for Start Session (bind class only) and Send (auto-start on first send)
     def start_session_handler(e=None):
@@ -1817,6 +1857,7 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
                 active_class.current = selected
             except Exception:
                 pass
+            chat_session.pop(selected, None)
 
             # Try to persist selection using provided callback if available
             try:
@@ -1824,16 +1865,10 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
                 if callable(save_cb):
                     save_cb('active_class', selected)
                 else:
-                    # Fallback: persist to class_data.json (best-effort)
+                    # Fallback: persist to class_data.json (best-effort, atomic write-through)
                     try:
-                        cd_path = Path('class_data.json')
-                        if cd_path.exists():
-                            data = json.loads(cd_path.read_text(encoding='utf-8'))
-                        else:
-                            data = {}
-                        data.setdefault('current_classes', {})
-                        data['current_classes']['selected'] = selected
-                        cd_path.write_text(json.dumps(data, indent=2), encoding='utf-8')
+                        from app import storage
+                        storage.get_store().set_selected(selected)
                     except Exception:
                         pass
             except Exception:
@@ -1938,18 +1973,16 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
                 except Exception:
                     pass
             else:
-                # Fallback: append to data/classes/<class>/ai_sessions/chat_log.json
+                # Fallback: append to data/classes/<class>/ai_sessions/chat_log.jsonl (append-only)
                 try:
-                    base = Path('data/classes') / active_class.current / 'ai_sessions'
-                    base.mkdir(parents=True, exist_ok=True)
-                    log_file = base / 'chat_log.json'
-                    entry_user = {'timestamp': datetime.datetime.utcnow().isoformat()+'Z', 'role': 'user', 'text': msg}
-                    arr = json.loads(log_file.read_text(encoding='utf-8') or '[]') if log_file.exists() else []
-                    arr.append(entry_user)
+                    from app import chat_store
+                    store = chat_store.get_store(active_class.current)
+                    if chat_session.get(active_class.current) is None:
+                        chat_session[active_class.current] = store.new_session()
+                    session = chat_session[active_class.current]
+                    store.append(session, 'user', msg)
                     if assistant_reply:
-                        entry_assist = {'timestamp': datetime.datetime.utcnow().isoformat()+'Z', 'role': 'assistant', 'text': assistant_reply}
-                        arr.append(entry_assist)
-                    log_file.write_text(json.dumps(arr, indent=2), encoding='utf-8')
+                        store.append(session, 'assistant', assistant_reply)
                 except Exception:
                     pass
         except Exception:
@@ -2074,12 +2107,32 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
         hint_style=ft.TextStyle(color=ft.colors.OUTLINE, italic=True),
     )
 
-    async def do_ask(_):
-        """Ask AI question - UI ONLY"""
-        # TODO: Wire in main.py to call appropriate manager via main.py
-        pass
+    def do_ask(_):
+        """Answer the question from the active class's notes (semantic search + LLM)."""
+        cls = getattr(active_class, 'current', None)
+        if not cls:
+            try:
+                cls = class_select_ref.current.value
+            except Exception:
+                cls = None
+        question = ask_input_ref.current.value or ""
+        ask_cb = callbacks.get('study_buddy_ask')
+        if not cls:
+            page.snack_bar = ft.SnackBar(ft.Text("⚠ Please select a class first!"))
+            page.snack_bar.open = True
+            page.update()
+            return
+        if not callable(ask_cb) or not question.strip():
+            return
+        ask_output_ref.current.value = "Thinking..."
+        page.update()
+        try:
+            ask_output_ref.current.value = ask_cb(cls, question)
+        except Exception as ex:
+            ask_output_ref.current.value = f"❌ {ex}"
+        page.update()
 
-    ask_btn.on_click = lambda e: None  # TODO: was `do_ask` -> wire in main.py to call appropriate manager via main.py
+    ask_btn.on_click = do_ask
 
     study_tab = ft.Column([
         # Question section
@@ -2344,6 +2397,9 @@ def build_ui(page: ft.Page, callbacks: dict | None = None):
     def create_nav_handler(index):
         """Create navigation handler with proper view references"""
         def handler(_):
+            # Leaving the AI Assistant closes the chat: release its cached context
+            if current_nav["selected"] == 2 and index != 2 and callbacks.get('end_session'):
+                callbacks.get('end_session')()
             current_nav["selected"] = index
             if index == 0:
                 main_content.content = notes_view
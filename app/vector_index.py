@@ -0,0 +1,431 @@
+"""Persistent per-class semantic index over notes, transcripts and summaries.
+
+    index = vector_index.get_index("Math_201")
+    index.update()                                   # embed new / changed files only
+    for hit in index.search("how do I diagonalize a matrix?", k=5):
+        print(hit.source, hit.score, hit.text)
+    index.context_for("eigenvalues", budget_tokens=1500)   # labelled hits for a prompt
+    python -m app.vector_index --class Math_201 [--rebuild] [--query "..."]
+
+Files live in data/classes/<Class>/vectors/:
+
+    vectors.f32  float32 matrix, one L2-normalised row per chunk, memory-mapped
+                 for search and only ever appended to (or compacted)
+    table.json   embedder name/dim, row -> [file, start, end] (character span
+                 of the chunk in its source) and file -> {stamp, hash, rows}
+
+`update()` compares each file's (mtime, size) and then its content hash with
+the table; only changed files are re-chunked and embedded. Their old rows are
+tombstoned and the matrix is compacted once more than half of it is dead.
+Search is a vectorized dot product over all live rows; above ANN_THRESHOLD
+rows an inverted-file index (k-means centroids, probing the nearest lists) is
+built in memory and used instead. summarize_file keeps the index current;
+ChatAgent (large selections, next to BM25) and StudyBuddy read from it.
+
+Embedders are pluggable (`register_embedder`, STUDYAI_EMBEDDER). The default
+"hashing" embedder is local and deterministic (signed feature hashing of
+words and word pairs), so indexing works offline and in tests; "gemini" uses
+the embedding endpoint of the configured Gemini provider. Changing embedder
+rebuilds the index.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from app import storage
+from app.extractive import content_words
+from integrations import tokens
+
+CHUNK_CHARS = 1200
+EMBED_BATCH = 64
+# Live rows above which search goes through the inverted-file index
+ANN_THRESHOLD = int(os.getenv("STUDYAI_ANN_THRESHOLD", "20000"))
+ANN_PROBES = 8
+# Compact once at least this many rows (and over half of the matrix) are dead
+COMPACT_MIN = 256
+
+
+# ---------- embedders ----------
+
+class Embedder(ABC):
+    name = "base"
+    dim = 0
+
+    @abstractmethod
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix with L2-normalised rows."""
+
+
+def _normalise(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return (mat / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+class HashingEmbedder(Embedder):
+    """Signed feature hashing of content words and adjacent word pairs (no model, no network)."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            words = content_words(text)
+            features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+            if not features:
+                continue
+            hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32,
+                                 count=len(features))
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(out[i], (hashes % self.dim).astype(np.int64), signs)
+        # Sublinear term frequency
+        out = np.sign(out) * np.log1p(np.abs(out))
+        return _normalise(out)
+
+
+class GeminiEmbedder(Embedder):
+    """Gemini embedding model, through the configured provider's pooled session."""
+
+    def __init__(self, model: str = "text-embedding-004", dim: int = 768):
+        self.model = model
+        self.dim = dim
+        self.name = f"gemini-{model}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        from integrations import providers
+        from integrations.resilience import LLMConfigError
+
+        provider = providers.get_provider()
+        if not isinstance(provider, providers.GeminiProvider):
+            raise LLMConfigError(f"Embedder {self.name} needs the gemini backend, not {provider.name}")
+        model = f"models/{self.model}"
+        rows = []
+        for i in range(0, len(texts), 100):
+            body = {"requests": [{"model": model, "content": {"parts": [{"text": t}]}}
+                                 for t in texts[i:i + 100]]}
+            resp = provider.session.post(provider._url(self.model, "batchEmbedContents"),
+                                         data=json.dumps(body), timeout=providers.HTTP_TIMEOUT)
+            provider._raise_for_status(resp)
+            rows.extend(e["values"] for e in resp.json().get("embeddings", []))
+        return _normalise(np.asarray(rows, dtype=np.float32).reshape(len(texts), self.dim))
+
+
+_embedders: dict[str, Callable[[], Embedder]] = {
+    "hashing": HashingEmbedder,
+    "gemini": GeminiEmbedder,
+}
+
+
+def register_embedder(name: str, factory: Callable[[], Embedder]) -> None:
+    """Make an embedder selectable via STUDYAI_EMBEDDER=<name>."""
+    _embedders[name] = factory
+
+
+def get_embedder(name: str | None = None) -> Embedder:
+    name = (name or os.getenv("STUDYAI_EMBEDDER", "hashing")).lower()
+    if name not in _embedders:
+        raise ValueError(f"Unknown embedder: {name}")
+    return _embedders[name]()
+
+
+# ---------- chunking ----------
+
+def _spans(text: str, max_chars: int = CHUNK_CHARS) -> list[tuple[int, int]]:
+    """Character spans of ~max_chars chunks, cut at paragraph breaks, else at whitespace."""
+    spans = []
+    start, n = 0, len(text)
+    while start < n:
+        while start < n and text[start].isspace():
+            start += 1
+        if start >= n:
+            break
+        end = min(start + max_chars, n)
+        if end < n:
+            cut = text.rfind("\n\n", start + max_chars // 2, end)
+            if cut < 0:
+                cut = max(text.rfind(" ", start + max_chars // 2, end), text.rfind("\n", start + max_chars // 2, end))
+            end = cut if cut > start else end
+        spans.append((start, end))
+        start = end
+    return spans
+
+
+@dataclass
+class Hit:
+    source: Path
+    start: int
+    end: int
+    score: float
+    text: str
+
+
+# ---------- index ----------
+
+class VectorIndex:
+    def __init__(self, class_name: str, root: Path | None = None, embedder: Embedder | None = None):
+        self.class_name = class_name
+        self.root = (Path(root) if root is not None else storage.class_dir(class_name)).resolve()
+        self.embedder = embedder or get_embedder()
+        self.dir = self.root / "vectors"
+        self.matrix_path = self.dir / "vectors.f32"
+        self.table_path = self.dir / "table.json"
+        self._lock = threading.RLock()
+        self._table = self._load()
+        self._mat: np.memmap | None = None
+        self._ivf: tuple | None = None
+
+    # ---------- table ----------
+
+    def _empty(self) -> dict:
+        return {"embedder": self.embedder.name, "dim": self.embedder.dim, "chunks": [], "files": {}}
+
+    def _load(self) -> dict:
+        if self.table_path.exists():
+            try:
+                table = json.loads(self.table_path.read_text(encoding="utf-8"))
+                if table.get("embedder") == self.embedder.name and table.get("dim") == self.embedder.dim:
+                    return table
+                print(f"🔁 Embedder changed to {self.embedder.name}, re-indexing {self.class_name}")
+            except Exception as e:
+                print(f"⚠️ Re-indexing {self.class_name}, unreadable vector table: {e}")
+        self.matrix_path.unlink(missing_ok=True)
+        return self._empty()
+
+    def _save(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.table_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._table, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.table_path)
+
+    def _key(self, path: Path) -> str:
+        return Path(path).resolve().relative_to(self.root).as_posix()
+
+    def sources(self) -> list[Path]:
+        """Notes, transcripts and lecture summaries of the class."""
+        notes = [p for p in (self.root / "notes").rglob("*") if p.suffix.lower() in (".txt", ".md")]
+        return sorted(notes + list((self.root / "transcripts").glob("*.txt"))
+                      + list((self.root / "summaries").glob("*.txt")))
+
+    def __len__(self) -> int:
+        return sum(c is not None for c in self._table["chunks"])
+
+    # ---------- updates ----------
+
+    def _drop(self, key: str) -> None:
+        entry = self._table["files"].pop(key, None)
+        for row in (entry or {}).get("rows", []):
+            self._table["chunks"][row] = None
+
+    def update(self, paths: list[Path] | None = None) -> int:
+        """Embed new or changed files (all sources, or just `paths`). Returns chunks embedded.
+
+        With no `paths`, files that disappeared are dropped from the index too.
+        """
+        with self._lock:
+            files = self._table["files"]
+            if paths is None:
+                current = {self._key(p): p for p in self.sources()}
+                gone = [k for k in files if k not in current]
+            else:
+                current = {}
+                for p in paths:
+                    if Path(p).resolve().is_relative_to(self.root):
+                        current[self._key(p)] = Path(p)
+                    else:
+                        print(f"⚠️ Not indexing {p}: outside {self.root}")
+                gone = [k for k, p in current.items() if not p.exists()]
+
+            work, touched = [], bool(gone)
+            for key, path in current.items():
+                if not path.exists():
+                    continue
+                st = path.stat()
+                stamp = [st.st_mtime_ns, st.st_size]
+                entry = files.get(key)
+                if entry and entry["stamp"] == stamp:
+                    continue
+                text = path.read_text(encoding="utf-8", errors="replace")
+                digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+                if entry and entry["hash"] == digest:
+                    entry["stamp"], touched = stamp, True  # touched but unchanged
+                    continue
+                work.append((key, stamp, digest, text, _spans(text)))
+
+            # Embed everything first, so a failing embedder leaves the index as it was
+            texts = [text[s:e] for _, _, _, text, spans in work for s, e in spans]
+            vectors = [self.embedder.embed(texts[i:i + EMBED_BATCH]) for i in range(0, len(texts), EMBED_BATCH)]
+            vectors = np.vstack(vectors) if vectors else np.zeros((0, self.embedder.dim), dtype=np.float32)
+
+            for key in gone:
+                self._drop(key)
+            chunks = self._table["chunks"]
+            for key, stamp, digest, _, spans in work:
+                self._drop(key)
+                rows = list(range(len(chunks), len(chunks) + len(spans)))
+                chunks.extend([key, s, e] for s, e in spans)
+                files[key] = {"stamp": stamp, "hash": digest, "rows": rows}
+            if work:
+                self._append(vectors)
+            if work or touched:
+                self._maybe_compact()
+                self._save()
+            return len(texts)
+
+    def _append(self, vectors: np.ndarray) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._mat, self._ivf = None, None
+        rows_before = len(self._table["chunks"]) - len(vectors)
+        # Drop rows a crashed update may have written past the table
+        size = rows_before * self.embedder.dim * 4
+        if self.matrix_path.exists() and self.matrix_path.stat().st_size != size:
+            os.truncate(self.matrix_path, size)
+        with open(self.matrix_path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+
+    def _maybe_compact(self) -> None:
+        chunks = self._table["chunks"]
+        alive = [r for r, c in enumerate(chunks) if c is not None]
+        dead = len(chunks) - len(alive)
+        if dead < COMPACT_MIN or dead * 2 < len(chunks):
+            return
+        kept = np.array(self._matrix()[alive]) if alive else np.zeros((0, self.embedder.dim), dtype=np.float32)
+        self._mat, self._ivf = None, None
+        tmp = self.matrix_path.with_suffix(".tmp")
+        tmp.write_bytes(np.ascontiguousarray(kept, dtype=np.float32).tobytes())
+        os.replace(tmp, self.matrix_path)
+        new_row = {old: new for new, old in enumerate(alive)}
+        self._table["chunks"] = [chunks[r] for r in alive]
+        for entry in self._table["files"].values():
+            entry["rows"] = [new_row[r] for r in entry["rows"]]
+
+    def rebuild(self) -> int:
+        """Forget everything and embed all sources again."""
+        with self._lock:
+            self._mat, self._ivf = None, None
+            self.matrix_path.unlink(missing_ok=True)
+            self._table = self._empty()
+            return self.update()
+
+    # ---------- search ----------
+
+    def _matrix(self) -> np.ndarray:
+        rows = len(self._table["chunks"])
+        if rows == 0:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        if self._mat is None or self._mat.shape[0] != rows:
+            self._mat = np.memmap(self.matrix_path, dtype=np.float32, mode="r", shape=(rows, self.embedder.dim))
+        return self._mat
+
+    def _alive(self) -> np.ndarray:
+        return np.fromiter((r for r, c in enumerate(self._table["chunks"]) if c is not None), dtype=np.int64)
+
+    def _build_ivf(self, mat: np.ndarray, alive: np.ndarray) -> tuple:
+        """k-means centroids over the live rows plus each centroid's row list (CSR)."""
+        rng = np.random.default_rng(0)
+        k = max(1, int(math.sqrt(len(alive))))
+        sample = np.asarray(mat[np.sort(rng.choice(alive, min(len(alive), k * 40), replace=False))])
+        centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+        for _ in range(10):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            filled = np.bincount(assign, minlength=k) > 0
+            centroids[filled] = _normalise(sums[filled])
+        labels = np.empty(len(alive), dtype=np.int64)
+        for i in range(0, len(alive), 8192):
+            labels[i:i + 8192] = np.argmax(np.asarray(mat[alive[i:i + 8192]]) @ centroids.T, axis=1)
+        order = np.argsort(labels, kind="stable")
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=k))])
+        return centroids, indptr, alive[order]
+
+    def search(self, query: str, k: int = 5, refresh: bool = True,
+               paths: list[Path] | None = None) -> list[Hit]:
+        """Best `k` chunks for `query` by cosine similarity (files re-checked first unless refresh=False).
+
+        With `paths`, only chunks of those files are considered.
+        """
+        if refresh:
+            self.update()
+        with self._lock:
+            mat, alive = self._matrix(), self._alive()
+            if paths is not None:
+                files = self._table["files"]
+                keys = {self._key(p) for p in paths if Path(p).resolve().is_relative_to(self.root)}
+                alive = np.array(sorted(r for key in keys for r in files.get(key, {}).get("rows", [])), dtype=np.int64)
+            if not len(alive):
+                return []
+            q = self.embedder.embed([query])[0]
+            if paths is None and len(alive) > ANN_THRESHOLD:
+                if self._ivf is None:
+                    self._ivf = self._build_ivf(mat, alive)
+                centroids, indptr, rows = self._ivf
+                probes = np.argsort(-(centroids @ q))[:ANN_PROBES]
+                candidates = np.sort(np.concatenate([rows[indptr[c]:indptr[c + 1]] for c in probes]))
+            else:
+                candidates = alive
+            scores = np.asarray(mat[candidates]) @ q
+            top = np.argsort(-scores, kind="stable")[:k]
+            hits = []
+            for i in top:
+                key, start, end = self._table["chunks"][candidates[i]]
+                path = self.root / key
+                try:
+                    text = path.read_text(encoding="utf-8", errors="replace")[start:end]
+                except OSError:
+                    continue
+                hits.append(Hit(path, start, end, float(scores[i]), text))
+            return hits
+
+    def context_for(self, query: str, budget_tokens: int, k: int = 8,
+                    paths: list[Path] | None = None, refresh: bool = False) -> str:
+        """Best hits for `query` that fit in `budget_tokens`, each labelled with its file."""
+        picked, used = [], 0
+        for hit in self.search(query, k, refresh=refresh, paths=paths):
+            block = f"[{hit.source.relative_to(self.root).as_posix()}]\n{hit.text.strip()}"
+            cost = tokens.estimate_tokens(block)
+            if used + cost > budget_tokens:
+                continue
+            picked.append(block)
+            used += cost
+        return "\n\n".join(picked)
+
+
+_indexes: dict[str, VectorIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(class_name: str, root: Path | None = None) -> VectorIndex:
+    """One shared index per class folder (uses the STUDYAI_EMBEDDER embedder)."""
+    root = (Path(root) if root is not None else storage.class_dir(class_name)).resolve()
+    with _indexes_lock:
+        if str(root) not in _indexes:
+            _indexes[str(root)] = VectorIndex(class_name, root)
+        return _indexes[str(root)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query a class's semantic index")
+    parser.add_argument("--class", dest="class_name", required=True)
+    parser.add_argument("--rebuild", action="store_true", help="embed every source again")
+    parser.add_argument("--query", default=None)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+    index = get_index(args.class_name)
+    n = index.rebuild() if args.rebuild else index.update()
+    print(f"🧮 {args.class_name}: {n} chunk(s) embedded, {len(index)} indexed")
+    if args.query:
+        for hit in index.search(args.query, args.k, refresh=False):
+            snippet = re.sub(r"\s+", " ", hit.text)[:160]
+            print(f"{hit.score:.3f}  {hit.source.relative_to(index.root)}  {snippet}")
@@ -0,0 +1,55 @@
+"""Background warm-up of heavy optional stacks.
+
+Startup only imports Flet and the landing page. Once the window is up, this
+imports Whisper/torch, ReportLab (via the summarizer) and the Google client
+libraries on a daemon thread, and opens the shared LLM connection pool, so
+the first upload / Drive connect / chat message does not pay that cost on
+the UI thread. Import failures are ignored here; the
+feature that needs the module will report them when used.
+"""
+import importlib
+import threading
+import time
+
+# Imported in this order: most likely to be needed first
+WARMUP_MODULES = [
+    "app.summarizer",
+    "app.transcription",
+    "googleapiclient.discovery",
+    "integrations.drive_api",
+]
+
+_started = False
+_lock = threading.Lock()
+timings: dict[str, float] = {}
+
+
+def _warm(modules: list[str]) -> None:
+    for name in modules:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception:
+            continue
+        timings[name] = time.perf_counter() - start
+
+    # Open a keep-alive connection in the shared provider pool
+    start = time.perf_counter()
+    try:
+        from integrations.providers import get_provider
+        get_provider().warm()
+        timings["llm_pool"] = time.perf_counter() - start
+    except Exception:
+        pass
+
+
+def start_warmup(modules: list[str] | None = None) -> threading.Thread | None:
+    """Start the warm-up thread once per process. Returns the thread (or None)."""
+    global _started
+    with _lock:
+        if _started:
+            return None
+        _started = True
+    t = threading.Thread(target=_warm, args=(modules or WARMUP_MODULES,), name="studyai-warmup", daemon=True)
+    t.start()
+    return t
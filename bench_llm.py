@@ -0,0 +1,115 @@
+# bench_llm.py
+"""Offline load / latency benchmark for the LLM pipeline.
+
+Runs summarizer, ChatAgent and FlashcardsAgent against the local fake backend
+(integrations/fake_llm.py), so no quota is burned:
+
+    python bench_llm.py --target all --requests 200 --concurrency 8 \
+        --latency lognormal:-1.5,0.6 --token-rate 80 --error-rate 0.05 --seed 1
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Must be set before gemini_api is imported. The fake has no quota, so lift the
+# client-side rate limit unless the caller wants to benchmark it too.
+os.environ.setdefault("STUDYAI_LLM_BACKEND", "fake")
+os.environ.setdefault("GEMINI_RPM", "1000000")
+
+from integrations import fake_llm  # noqa: E402
+
+SAMPLE_TEXT = (
+    "Today we covered recursion and how the call stack grows with each call. "
+    "The professor explained base cases, memoization and dynamic programming. "
+    "A student asked whether iteration is always faster than recursion. "
+) * 20
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def _make_task(target: str):
+    if target == "summarizer":
+        from app import summarizer
+        return lambda i: summarizer.summarize_text(f"{SAMPLE_TEXT} Lecture {i}.")
+    if target == "chat":
+        from app.agents.chat_agent import ChatAgent
+        from app.integrations.llm_client import LLMClient
+        client = LLMClient()
+        def run_chat(i):
+            agent = ChatAgent(llm_client=client)
+            agent.loaded_texts = [SAMPLE_TEXT]
+            return agent.chat(f"What was question {i} about?")
+        return run_chat
+    if target == "flashcards":
+        from app.agents.flashcards_agent import FlashcardsAgent
+        agent = FlashcardsAgent()
+        return lambda i: agent.generate_flashcards(f"{SAMPLE_TEXT} Note {i}.", 5)
+    raise ValueError(f"Unknown target: {target}")
+
+
+def run_benchmark(target: str, requests: int, concurrency: int) -> dict:
+    task = _make_task(target)
+    latencies: list[float] = []
+    errors = 0
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            task(i)
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, err in pool.map(timed, range(requests)):
+            latencies.append(elapsed)
+            if err is not None:
+                errors += 1
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "target": target,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the LLM pipeline against the fake backend")
+    parser.add_argument("--target", default="all", choices=["all", "summarizer", "chat", "flashcards"])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", default="fixed:0.05", help='e.g. "uniform:0.1,0.5" or "lognormal:-1.5,0.6"')
+    parser.add_argument("--token-rate", type=float, default=0.0, help="output tokens/sec (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print one JSON object per target")
+    args = parser.parse_args()
+
+    fake_llm.configure(latency=args.latency, token_rate=args.token_rate,
+                       error_rate=args.error_rate, seed=args.seed)
+
+    targets = ["summarizer", "chat", "flashcards"] if args.target == "all" else [args.target]
+    for t in targets:
+        result = run_benchmark(t, args.requests, args.concurrency)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"📊 {t:<11} {result['throughput_rps']:>8} req/s  p50 {result['p50_ms']}ms  "
+                  f"p95 {result['p95_ms']}ms  p99 {result['p99_ms']}ms  errors {result['errors']}")
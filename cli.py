@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# cli.py
+"""Headless lecture pipeline (no UI, safe for cron on a server).
+
+For every file of a class, runs
+
+    ingest → transcribe (audio) → summarize (.txt/.json) → PDF → flashcards
+
+    python cli.py --class Math_201                        # files already in data/classes/Math_201
+    python cli.py --class Math_201 --dir ~/lectures/wk3   # copy new files in first
+    python cli.py --class Math_201 --jobs 4 --json        # one JSON event per line
+
+Audio (.mp3/.wav/.m4a) is transcribed into transcripts/, text notes
+(.txt/.md) are copied into notes/. Outputs that are still fresh (per the
+class manifest, app/manifest.py) are skipped unless --force is given.
+Exits with status 1 if any step failed.
+"""
+import argparse
+import json
+import re
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+AUDIO_EXTS = (".mp3", ".wav", ".m4a")
+NOTE_EXTS = (".txt", ".md")
+STEPS = ("transcribe", "summarize", "flashcards")
+
+
+class Pipeline:
+    def __init__(self, class_name: str, steps=STEPS, force: bool = False, whisper_model: str = "tiny",
+                 transcribe_jobs: int = 1, flashcards: int = 10, as_json: bool = False):
+        from app import manifest, storage
+        # "Math_201" and "Math 201" name the same class folder
+        self.class_name = storage.class_name(class_name)
+        self.class_dir = storage.class_dir(class_name)
+        self.steps = set(steps)
+        self.force = force
+        self.whisper_model = whisper_model
+        self.flashcards = flashcards
+        self.as_json = as_json
+        self.deps = manifest.get_manifest(self.class_name)
+        self.counts = {"done": 0, "skipped": 0, "failed": 0}
+        # Whisper is CPU/RAM heavy: cap concurrent transcriptions separately
+        self._whisper_slots = threading.Semaphore(max(1, transcribe_jobs))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # ---------- progress ----------
+
+    def emit(self, step: str, file: Path | str, status: str, started: float | None = None, **extra) -> None:
+        event = {"event": "step", "step": step, "file": str(file), "status": status}
+        if started is not None:
+            event["seconds"] = round(time.monotonic() - started, 2)
+        event.update(extra)
+        with self._lock:
+            if status in self.counts:
+                self.counts[status] += 1
+            if self.as_json:
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+            else:
+                icon = {"done": "✅", "skipped": "⏭️", "failed": "❌"}.get(status, "▶️")
+                tail = f" ({extra['error']})" if "error" in extra else ""
+                print(f"{icon} {step:<10} {Path(file).name}{tail}", flush=True)
+
+    def _run(self, step: str, file: Path, fn):
+        """Run one step, reporting it; returns fn's result or None on failure."""
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self.emit(step, file, "failed", started, error=str(e)[:300])
+            return None
+        self.emit(step, file, "done", started)
+        return result
+
+    # ---------- steps ----------
+
+    def ingest(self, src_dir: Path) -> list[Path]:
+        """Copy new audio and notes from `src_dir` into the class folder."""
+        copied = []
+        for src in sorted(p for p in Path(src_dir).rglob("*") if p.is_file()):
+            ext = src.suffix.lower()
+            sub = "audio" if ext in AUDIO_EXTS else "notes" if ext in NOTE_EXTS else None
+            if sub is None:
+                continue
+            dest = self.class_dir / sub / src.name
+            if dest.exists() and dest.stat().st_size == src.stat().st_size and dest.read_bytes() == src.read_bytes():
+                self.emit("ingest", src, "skipped")
+                continue
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, dest)
+            copied.append(dest)
+            self.emit("ingest", src, "done")
+        return copied
+
+    def _transcriber(self):
+        if getattr(self._local, "transcriber", None) is None:
+            from app.transcription import Transcriber
+            self._local.transcriber = Transcriber(model_size=self.whisper_model)
+        return self._local.transcriber
+
+    def transcribe(self, audio: Path) -> Path:
+        out = self.class_dir / "transcripts" / (audio.stem + ".txt")
+        if not self.force and out.exists() and out.stat().st_mtime >= audio.stat().st_mtime:
+            self.emit("transcribe", audio, "skipped")
+            return out
+
+        def _do():
+            with self._whisper_slots:
+                text = self._transcriber().transcribe_file(str(audio))
+            # Same layout as the UI upload flow: one sentence per line
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text("\n".join(re.split(r'(?<=[.!?]) +', text)), encoding="utf-8")
+            return out
+        return self._run("transcribe", audio, _do)
+
+    def summarize(self, transcript: Path) -> Path | None:
+        from app import summarizer
+        existing = self.deps.output_for("summary", transcript)
+        if not self.force and existing is not None and self.deps.reason(existing, _current("summary")) is None:
+            self.emit("summarize", transcript, "skipped")
+            self.render_pdf(existing)
+            return existing
+        # Rebuilds keep the existing file name; wait so the PDF is part of this step
+        return self._run("summarize", transcript, lambda: summarizer.summarize_file(
+            transcript, existing, class_name=self.class_name, wait_pdf=True, allow_offline=False))
+
+    def render_pdf(self, summary_txt: Path) -> None:
+        """Re-render the PDF of a fresh summary if the PDF itself is missing or outdated."""
+        from app import pdf_render
+        pdf, json_path = summary_txt.with_suffix(".pdf"), summary_txt.with_suffix(".json")
+        if not self.force and self.deps.reason(pdf, _current("pdf")) is None:
+            return
+
+        def _do():
+            pdf_render.submit(json_path, pdf).result()  # metadata stored in the summary JSON
+            self.deps.record(pdf, "pdf", json_path, _current("pdf")["template"])
+            return pdf
+        self._run("pdf", summary_txt, _do)
+
+    def make_flashcards(self, source: Path) -> Path | None:
+        from app import batch_queue
+        from app.agents.flashcards_agent import FlashcardsAgent
+        from integrations import gemini_api, routing, telemetry
+
+        out = self.class_dir / "flashcards" / (source.stem + ".json")
+        if not self.force and self.deps.reason(out, _current("flashcards")) is None:
+            self.emit("flashcards", source, "skipped")
+            return out
+
+        def _do():
+            prompt = FlashcardsAgent.build_prompt(source.read_text(encoding="utf-8"), self.flashcards)
+            with telemetry.call_context("cli.flashcards", class_name=self.class_name):
+                resp = gemini_api.generate_text(prompt, models=routing.models_for("flashcards"))
+            if not FlashcardsAgent.parse(resp):
+                raise ValueError("model returned no usable flashcards")
+            job = {"target": {"source": str(source), "class_name": self.class_name}}
+            return batch_queue._write_flashcards(resp, job)
+        return self._run("flashcards", source, _do)
+
+    # ---------- driver ----------
+
+    def process(self, path: Path) -> None:
+        """Run every requested step for one class file."""
+        text = path
+        if path.suffix.lower() in AUDIO_EXTS:
+            if "transcribe" not in self.steps:
+                return
+            text = self.transcribe(path)
+            if text is None:
+                return
+        is_note = text.parent.name != "transcripts"
+        if "summarize" in self.steps and not is_note:
+            self.summarize(text)
+        if "flashcards" in self.steps:
+            self.make_flashcards(text)
+
+    def files(self) -> list[Path]:
+        audio = sorted(p for p in (self.class_dir / "audio").glob("*") if p.suffix.lower() in AUDIO_EXTS)
+        stems = {p.stem for p in audio}
+        # Transcripts of audio we have are handled through their audio file
+        transcripts = sorted(p for p in (self.class_dir / "transcripts").glob("*.txt") if p.stem not in stems)
+        notes = sorted(p for p in (self.class_dir / "notes").rglob("*") if p.suffix.lower() in NOTE_EXTS)
+        return audio + transcripts + notes
+
+    def run(self, jobs: int = 2) -> dict:
+        files = self.files()
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            list(pool.map(self.process, files))
+        return {"event": "finished", "class": self.class_name, "files": len(files), **self.counts}
+
+
+def _current(kind: str) -> dict:
+    from app import manifest
+    return manifest.current_steps()[kind]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the lecture pipeline without the UI")
+    parser.add_argument("--class", dest="class_name", required=True, help="class folder under data/classes")
+    parser.add_argument("--dir", type=Path, default=None, help="ingest audio/notes from this directory first")
+    parser.add_argument("--steps", default=",".join(STEPS), help=f"comma-separated subset of {','.join(STEPS)}")
+    parser.add_argument("--jobs", type=int, default=2, help="files processed concurrently")
+    parser.add_argument("--transcribe-jobs", type=int, default=1, help="concurrent Whisper transcriptions")
+    parser.add_argument("--whisper-model", default="tiny", choices=["tiny", "base", "small", "medium", "large"])
+    parser.add_argument("--flashcards", type=int, default=10, help="flashcards per file")
+    parser.add_argument("--force", action="store_true", help="redo steps even if their outputs are fresh")
+    parser.add_argument("--json", action="store_true", help="print one JSON event per line")
+    args = parser.parse_args(argv)
+
+    steps = [s.strip() for s in args.steps.split(",") if s.strip()]
+    unknown = set(steps) - set(STEPS)
+    if unknown:
+        parser.error(f"unknown steps: {', '.join(sorted(unknown))}")
+    if args.dir is not None and not args.dir.is_dir():
+        parser.error(f"not a directory: {args.dir}")
+
+    pipeline = Pipeline(args.class_name, steps, args.force, args.whisper_model,
+                        args.transcribe_jobs, args.flashcards, args.json)
+    if args.dir is not None:
+        pipeline.ingest(args.dir)
+    summary = pipeline.run(args.jobs)
+    if args.json:
+        print(json.dumps(summary), flush=True)
+    else:
+        print(f"🏁 {args.class_name}: {summary['done']} done, {summary['skipped']} skipped, "
+              f"{summary['failed']} failed ({summary['files']} files)")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+# fake_llm.py
+"""Local stand-in for the Gemini backend, for offline load and latency testing.
+
+Select it with STUDYAI_LLM_BACKEND=fake (no API key or network needed), or use
+the classes directly:
+
+    from integrations import fake_llm
+    fake_llm.configure(latency="lognormal:-1.2,0.5", error_rate=0.05, seed=7)
+    llm = fake_llm.get_fake()
+    llm.generate_text("Summarize: ...")
+
+It can also run as a tiny HTTP server that answers the Gemini REST routes
+(`:generateContent` and `:streamGenerateContent?alt=sse`):
+
+    python -m integrations.fake_llm --port 8089 --latency uniform:0.2,0.8
+
+Knobs (all also readable from FAKE_LLM_* environment variables):
+- latency: time-to-first-token distribution, "fixed:S", "uniform:A,B",
+  "normal:MEAN,STD" or "lognormal:MU,SIGMA" (seconds)
+- token_rate: output tokens per second after the first token (0 = instant)
+- prefill_rate: prompt tokens processed per second before the first token
+  (0 = prompt length is free), so prompt size shows up in latency
+- error_rate / error_codes: fraction of calls that fail and the HTTP statuses used
+- seed: makes latency and error sampling reproducible
+- canned: {substring: response} overrides, or a JSON file path in FAKE_LLM_CANNED
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+
+class FakeAPIError(Exception):
+    """Injected failure. Carries an HTTP status like the real SDK errors."""
+
+    def __init__(self, status_code: int, message: str = ""):
+        super().__init__(message or f"fake backend error {status_code}")
+        self.status_code = status_code
+        self.code = status_code
+
+
+def _parse_latency(spec: str):
+    """Turn "kind:a,b" into a sampler(rng) -> seconds."""
+    kind, _, args = (spec or "fixed:0").partition(":")
+    vals = [float(v) for v in args.split(",") if v.strip()] or [0.0]
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        return lambda rng: vals[0]
+    if kind == "uniform":
+        lo, hi = vals[0], vals[1] if len(vals) > 1 else vals[0]
+        return lambda rng: rng.uniform(lo, hi)
+    if kind == "normal":
+        mean, std = vals[0], vals[1] if len(vals) > 1 else 0.0
+        return lambda rng: max(0.0, rng.gauss(mean, std))
+    if kind == "lognormal":
+        mu, sigma = vals[0], vals[1] if len(vals) > 1 else 0.0
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _count_tokens(text: str) -> int:
+    return len(re.findall(r"\w+|[^\w\s]", text or ""))
+
+
+def _canned_response(prompt: str) -> str:
+    """Deterministic, shape-correct output for the prompts the app sends."""
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    words = re.findall(r"[A-Za-z]{5,}", prompt)
+    topics = list(dict.fromkeys(w.lower() for w in words))[-6:] or ["lecture"]
+
+    if "structured academic summarizer" in prompt:
+        bullets = "\n".join(f"- Discussed {t}." for t in topics)
+        return (
+            f"Title: Lecture notes {digest}\n"
+            f"TL;DR: The lecture covered {', '.join(topics[:3])}.\n"
+            f"Discussion:\n{bullets}\n"
+            f"Implications:\n- Review {topics[0]} before the next class.\n"
+            f"Advice/Actions:\n- Practice problems on {topics[-1]}."
+        )
+    if "flashcard generator" in prompt:
+        m = re.search(r"Create (\d+) study flashcards", prompt)
+        count = int(m.group(1)) if m else 5
+        cards = [
+            {"question": f"What is {topics[i % len(topics)]}?",
+             "answer": f"{topics[i % len(topics)].capitalize()} as described in the notes ({digest})."}
+            for i in range(count)
+        ]
+        return json.dumps(cards)
+    return f"[fake {digest}] Key points: " + ", ".join(topics) + "."
+
+
+class _Usage:
+    def __init__(self, prompt_tokens: int, output_tokens: int):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class FakeResponse:
+    """Mimics the bits of GenerateContentResponse the app reads."""
+
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        self.usage_metadata = _Usage(prompt_tokens, _count_tokens(text))
+
+
+class FakeLLM:
+    """In-process fake backend with latency, error and streaming controls."""
+
+    def __init__(self, latency: str = "fixed:0", token_rate: float = 0.0,
+                 error_rate: float = 0.0, error_codes: tuple[int, ...] = (429, 503),
+                 seed: int | None = None, canned: dict[str, str] | None = None,
+                 prefill_rate: float = 0.0, sleep=time.sleep):
+        self.latency_spec = latency
+        self._sample_latency = _parse_latency(latency)
+        self.token_rate = token_rate
+        self.prefill_rate = prefill_rate
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes) or (503,)
+        self.canned = dict(canned or {})
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sleep = sleep
+        self.calls = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeLLM":
+        canned = None
+        canned_path = os.getenv("FAKE_LLM_CANNED")
+        if canned_path and os.path.exists(canned_path):
+            with open(canned_path, "r", encoding="utf-8") as f:
+                canned = json.load(f)
+        seed = os.getenv("FAKE_LLM_SEED")
+        codes = os.getenv("FAKE_LLM_ERROR_CODES", "429,503")
+        return cls(
+            latency=os.getenv("FAKE_LLM_LATENCY", "fixed:0"),
+            token_rate=float(os.getenv("FAKE_LLM_TOKEN_RATE", "0")),
+            prefill_rate=float(os.getenv("FAKE_LLM_PREFILL_RATE", "0")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            error_codes=tuple(int(c) for c in codes.split(",") if c.strip()),
+            seed=int(seed) if seed else None,
+            canned=canned,
+        )
+
+    # ---------- internals ----------
+
+    def _draw(self) -> tuple[float, int | None]:
+        """Sample (first-token latency, injected error status or None)."""
+        with self._lock:
+            self.calls += 1
+            delay = self._sample_latency(self._rng)
+            failed = self._rng.random() < self.error_rate
+            code = self._rng.choice(self.error_codes) if failed else None
+        return delay, code
+
+    def respond(self, prompt: str) -> str:
+        for needle, text in self.canned.items():
+            if needle in prompt:
+                return text
+        return _canned_response(prompt)
+
+    def _output_delay(self, n_tokens: int) -> float:
+        return n_tokens / self.token_rate if self.token_rate > 0 else 0.0
+
+    def _prefill_delay(self, prompt: str) -> float:
+        return _count_tokens(prompt) / self.prefill_rate if self.prefill_rate > 0 else 0.0
+
+    # ---------- public interface ----------
+
+    def generate_content(self, prompt: str, generation_config: dict | None = None) -> FakeResponse:
+        delay, code = self._draw()
+        self._sleep(delay + self._prefill_delay(prompt))
+        if code is not None:
+            raise FakeAPIError(code)
+        text = self.respond(prompt)
+        max_tokens = (generation_config or {}).get("max_output_tokens")
+        if max_tokens and _count_tokens(text) > max_tokens:
+            text = " ".join(text.split(" ")[:max_tokens])
+        self._sleep(self._output_delay(_count_tokens(text)))
+        return FakeResponse(text, _count_tokens(prompt))
+
+    def stream_text(self, prompt: str, generation_config: dict | None = None) -> Iterator[str]:
+        """Yield the response in word-sized chunks at `token_rate` tokens/sec."""
+        delay, code = self._draw()
+        self._sleep(delay + self._prefill_delay(prompt))
+        if code is not None:
+            raise FakeAPIError(code)
+        pieces = re.findall(r"\S+\s*", self.respond(prompt))
+        per_piece = 1.0 / self.token_rate if self.token_rate > 0 else 0.0
+        for i, piece in enumerate(pieces):
+            if i and per_piece:
+                self._sleep(per_piece)
+            yield piece
+
+    def generate_text(self, prompt: str, generation_config: dict | None = None) -> str:
+        return self.generate_content(prompt, generation_config).text.strip()
+
+    def generate(self, prompt: str) -> str:
+        return self.generate_text(prompt)
+
+
+_default: FakeLLM | None = None
+_default_lock = threading.Lock()
+
+
+def get_fake() -> FakeLLM:
+    """Process-wide FakeLLM, created from FAKE_LLM_* env vars on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = FakeLLM.from_env()
+        return _default
+
+
+def configure(**kwargs) -> FakeLLM:
+    """Replace the process-wide FakeLLM (same keyword args as FakeLLM)."""
+    global _default
+    with _default_lock:
+        _default = FakeLLM(**kwargs)
+        return _default
+
+
+# ---------------------------------------------------------------------------
+# Optional HTTP server speaking the Gemini REST shapes
+# ---------------------------------------------------------------------------
+
+def _prompt_from_body(body: dict) -> str:
+    parts = []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            parts.append(part.get("text", ""))
+    return "\n".join(parts)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):  # keep benchmark output clean
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        prompt = _prompt_from_body(body)
+        config = body.get("generationConfig") or {}
+        config = {"max_output_tokens": config.get("maxOutputTokens")} if config.get("maxOutputTokens") else {}
+        fake = get_fake()
+        try:
+            if ":streamGenerateContent" in self.path:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for piece in fake.stream_text(prompt, config):
+                    event = {"candidates": [{"content": {"parts": [{"text": piece}]}}]}
+                    chunk = f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8")
+                    self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+                return
+            resp = fake.generate_content(prompt, config)
+            self._send_json(200, {
+                "candidates": [{"content": {"parts": [{"text": resp.text}]}, "finishReason": "STOP"}],
+                "usageMetadata": {
+                    "promptTokenCount": resp.usage_metadata.prompt_token_count,
+                    "candidatesTokenCount": resp.usage_metadata.candidates_token_count,
+                },
+            })
+        except FakeAPIError as e:
+            self._send_json(e.status_code, {"error": {"code": e.status_code, "message": str(e)}})
+
+
+def serve(host: str = "127.0.0.1", port: int = 8089) -> ThreadingHTTPServer:
+    """Start the fake HTTP server on a daemon thread and return it."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Gemini backend for offline testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default=os.getenv("FAKE_LLM_LATENCY", "fixed:0"))
+    parser.add_argument("--token-rate", type=float, default=float(os.getenv("FAKE_LLM_TOKEN_RATE", "0")))
+    parser.add_argument("--prefill-rate", type=float, default=float(os.getenv("FAKE_LLM_PREFILL_RATE", "0")))
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")))
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    configure(latency=args.latency, token_rate=args.token_rate, prefill_rate=args.prefill_rate,
+              error_rate=args.error_rate, seed=args.seed)
+    httpd = ThreadingHTTPServer((args.host, args.port), _Handler)
+    print(f"🧪 Fake Gemini backend listening on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,43 +1,442 @@
 # app/integrations/gemini_api.py
 
-import google.generativeai as genai
+import contextvars
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
 from dotenv import load_dotenv
 
+from integrations import telemetry, tokens
+from integrations.hedging import HedgePolicy
+from integrations.providers import MIN_CACHE_TOKENS, POOL_SIZE, CachedContext, get_provider
+from integrations.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMConfigError,
+    LLMError,
+    LLMUnavailableError,
+    TokenBucket,
+    backoff_delay,
+    is_retryable,
+)
+from integrations.singleflight import SingleFlight, request_key
+
 load_dotenv()
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("❌ GEMINI_API_KEY not found in environment variables")
 
-genai.configure(api_key=api_key)
+# All calls go through the shared provider from integrations/providers.py
+# (Gemini REST over a pooled session, or the fake with STUDYAI_LLM_BACKEND=fake).
+# Nothing is configured at import time, so importing this module is cheap.
+
+DEFAULT_MODELS = [
+    "models/gemini-2.0-flash",
+    "models/gemini-2.5-flash-preview",
+    "models/gemini-1.5-pro",
+]
+
+DEFAULT_GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "top_p": 0.9,
+    "max_output_tokens": 800,
+}
+
+# Client-side quota: requests per minute shared by every caller in the process
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "15"))
+# Retries per model for 429 / transient 5xx before failing over to the next model
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "3"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 20.0
+
+# Lifetime of uploaded context caches (chat sessions release theirs earlier)
+CACHE_TTL_S = int(os.getenv("GEMINI_CACHE_TTL_S", "1800"))
+
+_rate_limiter = TokenBucket.per_minute(GEMINI_RPM, burst=3)
+_breakers: dict[str, CircuitBreaker] = {}
+# Identical prompts issued concurrently (double clicks, UI rebuilds) share one call
+_inflight = SingleFlight()
+
+# Hedged requests (integrations/hedging.py): off unless GEMINI_HEDGE=1 or hedge=True
+HEDGE_ENABLED = os.getenv("GEMINI_HEDGE", "0") == "1"
+_hedge_policy = HedgePolicy(
+    max_rate=float(os.getenv("GEMINI_HEDGE_MAX_RATE", "0.1")),
+    default_delay_ms=float(os.getenv("GEMINI_HEDGE_DELAY_MS", "2000")),
+)
+
+
+def _breaker_for(model_name: str) -> CircuitBreaker:
+    breaker = _breakers.get(model_name)
+    if breaker is None:
+        breaker = _breakers.setdefault(model_name, CircuitBreaker(failure_threshold=3, reset_timeout=60.0))
+    return breaker
+
+
+def _candidates(models: list[str] | None) -> list[str]:
+    return list(models) if models else list(DEFAULT_MODELS)
+
+
+def _request_for(model_name: str, prompt: str, context: CachedContext | None) -> tuple[str, dict]:
+    """(prompt to send, provider options) for one model, using the cache if it can."""
+    if context is None:
+        return prompt, {}
+    if context.cached and context.model == model_name:
+        return prompt, {"cached_content": context.name}
+    return context.inline(prompt), {}
+
+
+def _is_cache_miss(exc: BaseException) -> bool:
+    """True if a cached_content handle was rejected because the cache is gone."""
+    if getattr(exc, "status_code", None) == 404:
+        return True
+    message = str(exc).lower()
+    return "cachedcontent" in message and "not found" in message
 
-def generate_text(prompt: str, generation_config: dict | None = None) -> str:
+
+def create_context_cache(text: str, models: list[str] | None = None,
+                         ttl_s: int = CACHE_TTL_S) -> CachedContext:
+    """
+    Upload `text` once as cached context for the first healthy model.
+
+    Always returns a CachedContext: if the text is below the provider's minimum
+    cache size, or caching fails, the context is simply sent inline on each
+    call. Pass it as `context=` to generate_text / stream_text.
+    """
+    context = CachedContext(text=text, tokens=telemetry.estimate_tokens(text))
+    if context.tokens < MIN_CACHE_TOKENS:
+        return context
+
+    provider = get_provider()
+    for model_name in _candidates(models):
+        if _breaker_for(model_name).state != CircuitBreaker.CLOSED:
+            continue
+        start = time.perf_counter()
+        _rate_limiter.acquire()
+        try:
+            cached = provider.create_cache(model_name, text, ttl_s)
+        except Exception as e:
+            # Caching is an optimization; fall back to inline context
+            print(f"⚠️ Could not cache context on {model_name}: {e}")
+            continue
+        if cached is None:
+            break  # backend has no caching
+        telemetry.record(model=model_name, prompt_tokens=cached.tokens or context.tokens,
+                         latency_ms=(time.perf_counter() - start) * 1000, cache="create")
+        return cached
+    return context
+
+
+def release_context_cache(context: CachedContext | None) -> None:
+    """Delete a cache created by create_context_cache (no-op for inline contexts)."""
+    if context is None or not context.name:
+        return
+    try:
+        get_provider().delete_cache(context)
+    except Exception as e:
+        print(f"⚠️ Could not delete context cache {context.name}: {e}")
+    context.name = None
+
+
+def generate_text(prompt: str, generation_config: dict | None = None,
+                  models: list[str] | None = None, context: CachedContext | None = None,
+                  hedge: bool | None = None) -> str:
     """
     Try multiple Gemini models until one succeeds.
     You can pass generation_config, e.g. {"temperature": 0.3, "max_output_tokens": 800}
+    and an explicit `models` order (defaults to DEFAULT_MODELS).
+    `context` (from create_context_cache) is referenced by handle on the model
+    it was cached for and sent inline to any other model.
+
+    Retryable errors (429, 5xx, timeouts) are retried with jittered backoff before
+    moving on to the next model; models whose circuit is open are skipped.
+    Raises LLMUnavailableError if no model produced text, or PromptTooLargeError
+    (before any request) if the prompt exceeds every candidate's input limit.
+    Each call is recorded in the telemetry log (see integrations/telemetry.py).
+
+    Concurrent calls with the same prompt, config, models and context are
+    coalesced: only one request is sent and every caller gets its result.
+
+    With hedging (hedge=True, or GEMINI_HEDGE=1 when hedge is None), a slow
+    first model is raced against the next candidate; see _hedged_generate.
     """
-    candidate_models = [
-        "models/gemini-2.0-flash",
-        "models/gemini-2.5-flash-preview",
-        "models/gemini-1.5-pro",
-    ]
+    candidate_models = _candidates(models)
+    generation_config = generation_config or DEFAULT_GENERATION_CONFIG
+    # Fail before the network call if no candidate could accept the prompt
+    tokens.check(context.inline(prompt) if context else prompt, candidate_models)
+    key = request_key(prompt, generation_config, candidate_models, context.text if context else None)
+
+    start = time.perf_counter()
+    text, shared = _inflight.do(
+        key, lambda: _generate_text(prompt, generation_config, candidate_models, context, hedge))
+    if shared:
+        telemetry.record(model=None, latency_ms=(time.perf_counter() - start) * 1000, cache="coalesced")
+    return text
 
-    generation_config = generation_config or {
-        "temperature": 0.3,
-        "top_p": 0.9,
-        "max_output_tokens": 800,
-    }
 
+def _stream_into(provider, model_name: str, prompt: str, generation_config: dict, options: dict,
+                 cancel: threading.Event, events: queue.Queue) -> None:
+    """Hedge worker: stream one request and post ("first" | "done" | "error", model, payload)."""
+    chunks = provider.stream(model_name, prompt, generation_config, **options)
+    pieces: list[str] = []
+    try:
+        for chunk in chunks:
+            if cancel.is_set():
+                return
+            if not pieces:
+                events.put(("first", model_name, time.perf_counter()))
+            pieces.append(chunk)
+        events.put(("done", model_name, "".join(pieces)))
+    except Exception as e:
+        events.put(("error", model_name, e))
+    finally:
+        # Closing the stream releases the losing request's connection
+        chunks.close()
+
+
+def _hedged_generate(provider, prompt: str, generation_config: dict, candidate_models: list[str],
+                     context: CachedContext | None) -> str | None:
+    """
+    Race the first model against a delayed request to the next healthy candidate.
+
+    The hedge fires only if no first token arrived within the policy's delay
+    (recent p95) and the hedge-rate cap allows it. The first complete answer
+    wins and the other stream is cancelled. Returns None when nothing won, so
+    the caller falls back to ordinary retries and failover.
+    """
+    primary = candidate_models[0]
+    backup = next((m for m in candidate_models[1:] if _breaker_for(m).state == CircuitBreaker.CLOSED), None)
+    if backup is None or _breaker_for(primary).state != CircuitBreaker.CLOSED:
+        return None
+
+    events: queue.Queue = queue.Queue()
+    requests: dict[str, tuple[str, dict, float, threading.Event]] = {}
+
+    def launch(model_name: str) -> None:
+        sent_prompt, options = _request_for(model_name, prompt, context)
+        cancel = threading.Event()
+        requests[model_name] = (sent_prompt, options, time.perf_counter(), cancel)
+        threading.Thread(target=_stream_into, daemon=True,
+                         args=(provider, model_name, sent_prompt, generation_config, options, cancel, events)).start()
+
+    start = time.perf_counter()
+    _rate_limiter.acquire()
+    launch(primary)
+    hedge_at = start + _hedge_policy.delay_ms() / 1000
+    undecided = True  # no first token yet and the hedge has not been fired / declined
+    hedged = False
+    first_token_ms: dict[str, float] = {}
+    failed: dict[str, Exception] = {}
+    try:
+        while len(failed) < len(requests):
+            timeout = max(0.0, hedge_at - time.perf_counter()) if undecided else None
+            try:
+                kind, model_name, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                undecided = False
+                if _hedge_policy.allow_hedge() and _rate_limiter.try_acquire():
+                    print(f"🪁 {primary} is slow, hedging with {backup}")
+                    hedged = True
+                    launch(backup)
+                continue
+
+            if kind == "first":
+                undecided = False
+                first_token_ms[model_name] = (payload - requests[model_name][2]) * 1000
+                _hedge_policy.observe(first_token_ms[model_name])
+            elif kind == "done" and payload.strip():
+                _breaker_for(model_name).record_success()
+                for loser in failed:
+                    _breaker_for(loser).record_failure()
+                text = payload.strip()
+                sent_prompt, options, _, _ = requests[model_name]
+                telemetry.record(
+                    model=model_name, prompt_tokens=telemetry.estimate_tokens(sent_prompt),
+                    output_tokens=telemetry.estimate_tokens(text), ttft_ms=first_token_ms.get(model_name),
+                    latency_ms=(time.perf_counter() - start) * 1000, cache="hit" if options else "miss",
+                    hedged=hedged, hedge_winner=("hedge" if model_name != primary else "primary") if hedged else None,
+                )
+                return text
+            else:
+                failed[model_name] = payload if kind == "error" else LLMError(f"{model_name} returned an empty response")
+                print(f"⚠️ Gemini API error with {model_name}: {failed[model_name]}")
+        return None
+    finally:
+        for _, _, _, cancel in requests.values():
+            cancel.set()
+        _hedge_policy.record_call(hedged)
+
+
+def _generate_text(prompt: str, generation_config: dict, candidate_models: list[str],
+                   context: CachedContext | None, hedge: bool | None = None) -> str:
+    provider = get_provider()
+    if (HEDGE_ENABLED if hedge is None else hedge) and len(candidate_models) > 1:
+        text = _hedged_generate(provider, prompt, generation_config, candidate_models, context)
+        if text is not None:
+            return text
+
+    start = time.perf_counter()
+    attempts = 0
     last_error = None
+    model_name = None
     for model_name in candidate_models:
+        breaker = _breaker_for(model_name)
+        if not breaker.allow():
+            print(f"⏭️ Skipping {model_name}: circuit open")
+            last_error = CircuitOpenError(model_name, breaker.retry_in())
+            continue
+
+        attempt = 0
+        while attempt <= MAX_RETRIES:
+            _rate_limiter.acquire()
+            attempts += 1
+            sent_prompt, options = _request_for(model_name, prompt, context)
+            try:
+                print(f"⚡ Trying model: {model_name}")
+                resp = provider.generate(model_name, sent_prompt, generation_config, **options)
+                if resp.text and resp.text.strip():
+                    breaker.record_success()
+                    text = resp.text.strip()
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    # Reported prompt size includes cached context, so estimate the same
+                    estimated = tokens.raw_estimate(context.inline(prompt) if options else sent_prompt)
+                    tokens.observe(model_name, estimated, resp.prompt_tokens)
+                    telemetry.record(
+                        model=model_name,
+                        prompt_tokens=resp.prompt_tokens or estimated,
+                        output_tokens=resp.output_tokens or telemetry.estimate_tokens(text),
+                        ttft_ms=resp.ttft_ms, latency_ms=elapsed_ms, retries=attempts - 1,
+                        cache="hit" if options else "miss", cached_tokens=resp.cached_tokens,
+                        est_prompt_tokens=estimated,
+                    )
+                    return text
+                # Empty / blocked response: not transient, try the next model
+                last_error = LLMError(f"{model_name} returned an empty response")
+                breaker.record_success()
+                break
+            except Exception as e:
+                print(f"⚠️ Gemini API error with {model_name}: {e}")
+                last_error = e
+                if options and _is_cache_miss(e):
+                    # Cache expired or was evicted: release the handle and resend
+                    # inline straight away (not counted against the retry budget)
+                    release_context_cache(context)
+                    continue
+                if is_retryable(e) and attempt < MAX_RETRIES:
+                    time.sleep(backoff_delay(attempt, BACKOFF_BASE, BACKOFF_CAP))
+                    attempt += 1
+                    continue
+                breaker.record_failure()
+                break
+
+    telemetry.record(
+        model=model_name, prompt_tokens=telemetry.estimate_tokens(prompt),
+        latency_ms=(time.perf_counter() - start) * 1000, retries=max(0, attempts - 1),
+        ok=False, error=repr(last_error),
+    )
+    raise LLMUnavailableError(f"Could not generate text. Last error: {last_error}", last_error)
+
+
+def stream_text(prompt: str, generation_config: dict | None = None,
+                models: list[str] | None = None, context: CachedContext | None = None) -> Iterator[str]:
+    """
+    Stream the response as text chunks.
+
+    Failover and retries behave like generate_text until the first chunk
+    arrives; after that an error is raised as LLMError (the caller already has
+    partial output, so switching models mid-answer would garble it).
+    """
+    provider = get_provider()
+    generation_config = generation_config or DEFAULT_GENERATION_CONFIG
+    start = time.perf_counter()
+    attempts = 0
+    last_error = None
+    model_name = None
+    for model_name in _candidates(models):
+        breaker = _breaker_for(model_name)
+        if not breaker.allow():
+            last_error = CircuitOpenError(model_name, breaker.retry_in())
+            continue
+
+        attempt = 0
+        while attempt <= MAX_RETRIES:
+            _rate_limiter.acquire()
+            attempts += 1
+            ttft_ms = None
+            pieces: list[str] = []
+            sent_prompt, options = _request_for(model_name, prompt, context)
+            chunks = provider.stream(model_name, sent_prompt, generation_config, **options)
+            try:
+                for chunk in chunks:
+                    if ttft_ms is None:
+                        ttft_ms = (time.perf_counter() - start) * 1000
+                    pieces.append(chunk)
+                    yield chunk
+            except GeneratorExit:
+                # Consumer stopped reading: the model was answering fine, so the
+                # breaker (possibly a half-open probe) must still see an outcome
+                chunks.close()
+                breaker.record_success()
+                telemetry.record(model=model_name, prompt_tokens=telemetry.estimate_tokens(sent_prompt),
+                                 output_tokens=telemetry.estimate_tokens("".join(pieces)), ttft_ms=ttft_ms,
+                                 latency_ms=(time.perf_counter() - start) * 1000, retries=attempts - 1,
+                                 cache="hit" if options else "miss", streamed=True, cancelled=True)
+                raise
+            except Exception as e:
+                last_error = e
+                if pieces:
+                    breaker.record_failure()
+                    telemetry.record(model=model_name, prompt_tokens=telemetry.estimate_tokens(prompt),
+                                     ttft_ms=ttft_ms, latency_ms=(time.perf_counter() - start) * 1000,
+                                     retries=attempts - 1, ok=False, error=repr(e), streamed=True)
+                    raise LLMError(f"Stream from {model_name} failed mid-response: {e}") from e
+                print(f"⚠️ Gemini API error with {model_name}: {e}")
+                if options and _is_cache_miss(e):
+                    release_context_cache(context)
+                    continue
+                if is_retryable(e) and attempt < MAX_RETRIES:
+                    time.sleep(backoff_delay(attempt, BACKOFF_BASE, BACKOFF_CAP))
+                    attempt += 1
+                    continue
+                breaker.record_failure()
+                break
+
+            breaker.record_success()
+            if pieces:
+                text = "".join(pieces)
+                telemetry.record(model=model_name, prompt_tokens=telemetry.estimate_tokens(sent_prompt),
+                                 output_tokens=telemetry.estimate_tokens(text), ttft_ms=ttft_ms,
+                                 latency_ms=(time.perf_counter() - start) * 1000,
+                                 retries=attempts - 1, cache="hit" if options else "miss", streamed=True)
+                return
+            last_error = LLMError(f"{model_name} returned an empty response")
+            break
+
+    telemetry.record(model=model_name, prompt_tokens=telemetry.estimate_tokens(prompt),
+                     latency_ms=(time.perf_counter() - start) * 1000, retries=max(0, attempts - 1),
+                     ok=False, error=repr(last_error), streamed=True)
+    raise LLMUnavailableError(f"Could not stream text. Last error: {last_error}", last_error)
+
+
+def batch_generate(prompts: list[str], generation_config: dict | None = None,
+                   models: list[str] | None = None, max_workers: int = 4) -> list[str | LLMError]:
+    """
+    Run several prompts concurrently over the shared connection pool.
+
+    This is the only batch path: each item goes through generate_text, so it
+    gets the same rate limiting, retries, circuit breaking and telemetry.
+    Results keep the input order. A prompt that fails yields its LLMError in
+    place of the text, so one bad item does not sink the whole batch.
+    Telemetry labels (call_context) carry over into the worker threads.
+    """
+    get_provider()  # fail fast on configuration errors
+
+    def _one(prompt: str):
         try:
-            print(f"⚡ Trying model: {model_name}")
-            model = genai.GenerativeModel(model_name)
-            resp = model.generate_content(prompt, generation_config=generation_config)
-            if resp and getattr(resp, "text", None):
-                return resp.text.strip()
-        except Exception as e:
-            print(f"⚠️ Gemini API error with {model_name}: {e}")
-            last_error = e
+            return generate_text(prompt, generation_config, models)
+        except LLMError as e:
+            return e
 
-    return f"Error: Could not generate summary. Last error: {last_error}"
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, POOL_SIZE))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, _one, p) for p in prompts]
+        return [f.result() for f in futures]
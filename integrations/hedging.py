@@ -0,0 +1,57 @@
+# hedging.py
+"""Hedged requests for tail latency.
+
+If the primary model has not produced its first token within a delay derived
+from the recent p95 time-to-first-token, gemini_api fires the same request at
+the next candidate model, keeps whichever finishes first and cancels the other.
+
+HedgePolicy decides *when* to hedge and *how often*:
+- delay: p95 of recent first-token latencies (a fixed default until enough
+  samples have been seen), never below `min_delay_ms`
+- cap: at most `max_rate` of recent calls may be hedged, so a slow backend
+  cannot double our request volume
+"""
+import threading
+from collections import deque
+
+
+class HedgePolicy:
+    """Thread-safe hedge delay estimator and rate cap."""
+
+    def __init__(self, max_rate: float = 0.1, percentile: float = 95.0, window: int = 200,
+                 min_samples: int = 20, default_delay_ms: float = 2000.0, min_delay_ms: float = 250.0):
+        self.max_rate = max_rate
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay_ms = default_delay_ms
+        self.min_delay_ms = min_delay_ms
+        self._ttfts: deque[float] = deque(maxlen=window)
+        self._calls: deque[bool] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, ttft_ms: float) -> None:
+        """Feed one first-token latency from a completed request."""
+        with self._lock:
+            self._ttfts.append(ttft_ms)
+
+    def delay_ms(self) -> float:
+        with self._lock:
+            samples = sorted(self._ttfts)
+        if len(samples) < self.min_samples:
+            return max(self.min_delay_ms, self.default_delay_ms)
+        k = min(len(samples) - 1, int(round(self.percentile / 100 * (len(samples) - 1))))
+        return max(self.min_delay_ms, samples[k])
+
+    def allow_hedge(self) -> bool:
+        """True if hedging one more call keeps the recent hedge rate under the cap."""
+        with self._lock:
+            return (sum(self._calls) + 1) / (len(self._calls) + 1) <= self.max_rate
+
+    def record_call(self, hedged: bool) -> None:
+        """Count one hedge-eligible call (hedged or not) towards the rate."""
+        with self._lock:
+            self._calls.append(hedged)
+
+    def hedge_rate(self) -> float:
+        with self._lock:
+            return sum(self._calls) / len(self._calls) if self._calls else 0.0
@@ -0,0 +1,329 @@
+# providers.py
+"""LLM provider abstraction.
+
+Every backend implements the same small surface:
+
+    provider.generate(model, prompt, config) -> LLMResponse
+    provider.stream(model, prompt, config)   -> iterator of text chunks
+    provider.create_cache(model, text, ttl)  -> CachedContext | None
+    provider.delete_cache(context)
+
+`get_provider()` returns one process-wide instance (chosen by
+STUDYAI_LLM_BACKEND: "gemini" by default, or "fake"), so every agent shares
+the same warmed HTTP connection pool. New backends plug in with
+`register_provider(name, factory)`.
+
+Retries, circuit breaking, rate limiting, telemetry and batching live one
+level up in gemini_api; providers only do a single request.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from integrations.resilience import LLMConfigError, LLMError
+
+DEFAULT_GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+# Connections kept alive per host; sized for the UI plus a background drainer
+POOL_SIZE = int(os.getenv("STUDYAI_HTTP_POOL_SIZE", "8"))
+# (connect, read) timeouts in seconds
+HTTP_TIMEOUT = (10, 120)
+# Gemini rejects explicit caches below a minimum size; smaller contexts are
+# simply sent inline
+MIN_CACHE_TOKENS = int(os.getenv("STUDYAI_MIN_CACHE_TOKENS", "4096"))
+
+
+class ProviderHTTPError(LLMError):
+    """Non-2xx response from a provider. `status_code` drives retry decisions."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"HTTP {status_code}: {message}")
+        self.status_code = status_code
+
+
+@dataclass
+class LLMResponse:
+    text: str
+    model: str
+    prompt_tokens: int | None = None
+    output_tokens: int | None = None
+    ttft_ms: float | None = None
+    cached_tokens: int | None = None
+    raw: dict = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class CachedContext:
+    """Context (e.g. loaded class material) uploaded once and reused across calls.
+
+    `name` is the provider's cache handle, or None when the context could not be
+    cached; callers then send `text` inline. `model` is the only model that can
+    use the handle, so failover to another model also falls back to inline text.
+    """
+    text: str
+    model: str | None = None
+    name: str | None = None
+    tokens: int = 0
+    expires_at: float = 0.0
+
+    @property
+    def cached(self) -> bool:
+        return bool(self.name) and time.time() < self.expires_at
+
+    def inline(self, prompt: str) -> str:
+        return f"{self.text}\n\n{prompt}" if self.text else prompt
+
+
+def _camel(key: str) -> str:
+    head, *rest = key.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+def to_gemini_config(config: dict | None) -> dict:
+    """{"max_output_tokens": 800} -> {"maxOutputTokens": 800}"""
+    return {_camel(k): v for k, v in (config or {}).items() if v is not None}
+
+
+class LLMProvider(ABC):
+    """Base class. Subclasses implement generate() and usually stream()."""
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, model: str, prompt: str, config: dict | None = None, **options) -> LLMResponse:
+        """Send one request and return the full response."""
+
+    def stream(self, model: str, prompt: str, config: dict | None = None, **options) -> Iterator[str]:
+        # Default: one chunk with the whole response
+        yield self.generate(model, prompt, config, **options).text
+
+    def create_cache(self, model: str, text: str, ttl_s: int = 1800) -> CachedContext | None:
+        """Upload `text` as reusable context. None if the backend cannot cache."""
+        return None
+
+    def delete_cache(self, context: CachedContext) -> None:
+        pass
+
+    def warm(self) -> None:
+        """Open connections ahead of the first real request (optional)."""
+
+    def close(self) -> None:
+        pass
+
+
+class GeminiProvider(LLMProvider):
+    """Gemini REST API over a pooled, keep-alive requests.Session."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str | None = None, base_url: str | None = None,
+                 pool_size: int = POOL_SIZE):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not self.api_key:
+            raise LLMConfigError("❌ GEMINI_API_KEY not found in environment variables")
+        self.base_url = (base_url or os.getenv("GEMINI_BASE_URL") or DEFAULT_GEMINI_BASE_URL).rstrip("/")
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "x-goog-api-key": self.api_key,
+            "Content-Type": "application/json",
+            "Connection": "keep-alive",
+        })
+
+    # ---------- helpers ----------
+
+    def _url(self, model: str, method: str) -> str:
+        model = model if model.startswith(("models/", "tunedModels/")) else f"models/{model}"
+        return f"{self.base_url}/{model}:{method}"
+
+    @staticmethod
+    def _body(prompt: str, config: dict | None, **options) -> dict:
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if config:
+            body["generationConfig"] = to_gemini_config(config)
+        body.update({_camel(k): v for k, v in options.items() if v is not None})
+        return body
+
+    @staticmethod
+    def _raise_for_status(resp) -> None:
+        if resp.status_code < 300:
+            return
+        try:
+            message = resp.json().get("error", {}).get("message", resp.text)
+        except ValueError:
+            message = resp.text
+        raise ProviderHTTPError(resp.status_code, (message or "")[:500])
+
+    @staticmethod
+    def _text_of(payload: dict) -> str:
+        parts = []
+        for cand in payload.get("candidates", [])[:1]:
+            for part in (cand.get("content") or {}).get("parts", []):
+                parts.append(part.get("text", ""))
+        return "".join(parts)
+
+    # ---------- interface ----------
+
+    def generate(self, model: str, prompt: str, config: dict | None = None, **options) -> LLMResponse:
+        start = time.perf_counter()
+        resp = self.session.post(self._url(model, "generateContent"),
+                                 data=json.dumps(self._body(prompt, config, **options)),
+                                 timeout=HTTP_TIMEOUT)
+        self._raise_for_status(resp)
+        payload = resp.json()
+        usage = payload.get("usageMetadata", {})
+        return LLMResponse(
+            text=self._text_of(payload),
+            model=model,
+            prompt_tokens=usage.get("promptTokenCount"),
+            output_tokens=usage.get("candidatesTokenCount"),
+            ttft_ms=(time.perf_counter() - start) * 1000,
+            cached_tokens=usage.get("cachedContentTokenCount"),
+            raw=payload,
+        )
+
+    def stream(self, model: str, prompt: str, config: dict | None = None, **options) -> Iterator[str]:
+        resp = self.session.post(self._url(model, "streamGenerateContent") + "?alt=sse",
+                                 data=json.dumps(self._body(prompt, config, **options)),
+                                 timeout=HTTP_TIMEOUT, stream=True)
+        try:
+            self._raise_for_status(resp)
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = self._text_of(json.loads(line[5:].strip()))
+                except ValueError:
+                    continue
+                if chunk:
+                    yield chunk
+        finally:
+            # Closing early (e.g. a cancelled request) releases the connection
+            resp.close()
+
+    def create_cache(self, model: str, text: str, ttl_s: int = 1800) -> CachedContext | None:
+        model = model if model.startswith("models/") else f"models/{model}"
+        body = {
+            "model": model,
+            "contents": [{"role": "user", "parts": [{"text": text}]}],
+            "ttl": f"{int(ttl_s)}s",
+        }
+        resp = self.session.post(f"{self.base_url}/cachedContents", data=json.dumps(body), timeout=HTTP_TIMEOUT)
+        self._raise_for_status(resp)
+        payload = resp.json()
+        tokens = (payload.get("usageMetadata") or {}).get("totalTokenCount") or 0
+        return CachedContext(text=text, model=model, name=payload.get("name"),
+                             tokens=tokens, expires_at=time.time() + ttl_s)
+
+    def delete_cache(self, context: CachedContext) -> None:
+        if context.name:
+            self.session.delete(f"{self.base_url}/{context.name}", timeout=HTTP_TIMEOUT)
+
+    def warm(self) -> None:
+        try:
+            self.session.get(f"{self.base_url}/models", params={"pageSize": 1}, timeout=HTTP_TIMEOUT)
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class FakeProvider(LLMProvider):
+    """Adapter for the local fake backend (integrations/fake_llm.py)."""
+
+    name = "fake"
+
+    def __init__(self, fake=None):
+        from integrations import fake_llm
+        self._fake = fake
+        self._get_fake = fake_llm.get_fake
+        self._caches: dict[str, str] = {}
+        self._cache_ids = itertools.count(1)
+        self._cache_lock = threading.Lock()
+
+    @property
+    def fake(self):
+        return self._fake or self._get_fake()
+
+    def generate(self, model: str, prompt: str, config: dict | None = None, **options) -> LLMResponse:
+        start = time.perf_counter()
+        # Cached context costs nothing per call; only the new prompt is "sent"
+        cached_name = options.get("cached_content")
+        if cached_name and cached_name not in self._caches:
+            raise ProviderHTTPError(404, f"{cached_name} not found")
+        resp = self.fake.generate_content(prompt, config)
+        usage = resp.usage_metadata
+        return LLMResponse(text=resp.text, model=model,
+                           prompt_tokens=usage.prompt_token_count,
+                           output_tokens=usage.candidates_token_count,
+                           ttft_ms=(time.perf_counter() - start) * 1000,
+                           cached_tokens=len(self._caches[cached_name]) // 4 if cached_name else None)
+
+    def stream(self, model: str, prompt: str, config: dict | None = None, **options) -> Iterator[str]:
+        cached_name = options.get("cached_content")
+        if cached_name and cached_name not in self._caches:
+            raise ProviderHTTPError(404, f"{cached_name} not found")
+        yield from self.fake.stream_text(prompt, config)
+
+    def create_cache(self, model: str, text: str, ttl_s: int = 1800) -> CachedContext | None:
+        with self._cache_lock:
+            name = f"cachedContents/fake-{next(self._cache_ids)}"
+            self._caches[name] = text
+        return CachedContext(text=text, model=model, name=name,
+                             tokens=len(text) // 4, expires_at=time.time() + ttl_s)
+
+    def delete_cache(self, context: CachedContext) -> None:
+        with self._cache_lock:
+            self._caches.pop(context.name or "", None)
+
+
+_factories: dict[str, Callable[[], LLMProvider]] = {
+    "gemini": GeminiProvider,
+    "fake": FakeProvider,
+}
+_provider: LLMProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def register_provider(name: str, factory: Callable[[], LLMProvider]) -> None:
+    """Make a backend selectable via STUDYAI_LLM_BACKEND=<name>."""
+    _factories[name] = factory
+
+
+def backend_name() -> str:
+    return os.getenv("STUDYAI_LLM_BACKEND", "gemini").lower() or "gemini"
+
+
+def get_provider() -> LLMProvider:
+    """Process-wide provider instance (created on first use)."""
+    global _provider
+    if _provider is not None:
+        return _provider
+    with _provider_lock:
+        if _provider is None:
+            name = backend_name()
+            factory = _factories.get(name)
+            if factory is None:
+                raise LLMConfigError(f"Unknown LLM backend: {name}")
+            _provider = factory()
+    return _provider
+
+
+def set_provider(provider: LLMProvider | None) -> None:
+    """Install a specific provider (tests, benchmarks). None resets to env default."""
+    global _provider
+    with _provider_lock:
+        if _provider is not None and _provider is not provider:
+            _provider.close()
+        _provider = provider
@@ -0,0 +1,217 @@
+# resilience.py
+"""Rate limiting, retry and circuit breaking for LLM calls.
+
+Everything here is SDK-agnostic so it can wrap Gemini or any other backend:
+- TokenBucket: client-side limiter matching our requests-per-minute quota
+- backoff_delay: full-jitter exponential backoff for retryable errors
+- CircuitBreaker: stops calling a model that keeps failing, probes it again later
+- LLMError and friends: typed exceptions callers get instead of error text
+"""
+import random
+import threading
+import time
+from typing import Callable
+
+
+class LLMError(Exception):
+    """Base class for every failure surfaced by the LLM integration."""
+
+
+class RetryableLLMError(LLMError):
+    """Transient failure (429, 5xx, timeout) that is worth retrying."""
+
+
+class LLMConfigError(LLMError):
+    """The backend is not set up (e.g. missing API key). Not retryable."""
+
+
+class CircuitOpenError(LLMError):
+    """The circuit for a model is open; the call was not attempted."""
+
+    def __init__(self, model: str, retry_in: float):
+        super().__init__(f"circuit open for {model}, retry in {retry_in:.1f}s")
+        self.model = model
+        self.retry_in = retry_in
+
+
+class LLMUnavailableError(LLMError):
+    """Every candidate model failed. `last_error` holds the final cause."""
+
+    def __init__(self, message: str, last_error: Exception | None = None):
+        super().__init__(message)
+        self.last_error = last_error
+
+
+# HTTP status codes we treat as transient
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# google.api_core exception class names for the same conditions, so we do not
+# need to import google.api_core just to classify errors
+_RETRYABLE_NAMES = {
+    "TooManyRequests",
+    "ResourceExhausted",
+    "InternalServerError",
+    "BadGateway",
+    "ServiceUnavailable",
+    "GatewayTimeout",
+    "DeadlineExceeded",
+    "RetryError",
+    "Timeout",
+    "ConnectionError",
+}
+
+
+def _status_code(exc: BaseException) -> int | None:
+    """Best-effort HTTP status extraction from SDK / requests exceptions."""
+    for attr in ("code", "status_code"):
+        val = getattr(exc, attr, None)
+        if callable(val):
+            try:
+                val = val()
+            except Exception:
+                val = None
+        val = getattr(val, "value", val)  # grpc StatusCode enums
+        if isinstance(val, int):
+            return val
+    resp = getattr(exc, "response", None)
+    val = getattr(resp, "status_code", None)
+    return val if isinstance(val, int) else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for rate-limit / transient server errors."""
+    if isinstance(exc, RetryableLLMError):
+        return True
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    if type(exc).__name__ in _RETRYABLE_NAMES:
+        return True
+    return _status_code(exc) in RETRYABLE_STATUS
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0,
+                  rng: random.Random | None = None) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    rng = rng or random
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Thread-safe token bucket.
+
+    `rate` tokens are added per second up to `capacity`. `acquire` blocks until
+    a token is available (or `timeout` elapses, returning False).
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, rpm: float, burst: float | None = None, **kwargs) -> "TokenBucket":
+        return cls(rate=rpm / 60.0, capacity=burst if burst is not None else max(1.0, rpm / 60.0), **kwargs)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            self._sleep(wait)
+
+
+class CircuitBreaker:
+    """Classic closed → open → half-open breaker for a single model.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected for `reset_timeout` seconds. The next call after that is a
+    single probe: success closes the circuit, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            # half-open: let exactly one probe through
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
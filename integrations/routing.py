@@ -0,0 +1,122 @@
+# routing.py
+"""Task-aware model routing.
+
+Each task type maps to a model tier, and each tier is an ordered list of
+candidate models (first = preferred, the rest = failover):
+
+    models = routing.models_for("flashcards")                  # fast tier
+    models = routing.models_for("summary:Detailed", tokens=90_000)
+
+Prompts above LONG_CONTEXT_TOKENS always use the long-context tier. Within a
+tier, the order adapts to our own telemetry (integrations/telemetry.py):
+models failing often are moved to the back, and a model that is clearly
+faster (at least 2x lower p50) moves ahead of slower ones. Models with too
+few recent calls keep their configured place.
+
+    python -m integrations.routing     # show the current routing table
+"""
+import math
+import os
+import threading
+import time
+
+from integrations import telemetry
+
+TIERS: dict[str, list[str]] = {
+    # Cheap and quick: bulk work, short prompts
+    "fast": ["models/gemini-2.0-flash", "models/gemini-2.5-flash-preview", "models/gemini-1.5-pro"],
+    # Better reasoning for detailed write-ups
+    "strong": ["models/gemini-2.5-flash-preview", "models/gemini-1.5-pro", "models/gemini-2.0-flash"],
+    # Largest context window first
+    "long_context": ["models/gemini-1.5-pro", "models/gemini-2.5-flash-preview", "models/gemini-2.0-flash"],
+}
+
+# Task -> tier. Summary modes match the `sum_mode` dropdown in the UI.
+ROUTES: dict[str, str] = {
+    "summary": "fast",           # lecture transcript summaries (summarizer.py)
+    "summary:Topics": "fast",
+    "summary:Q&A": "fast",
+    "summary:Detailed": "strong",
+    "chat": "fast",
+    "chat:memory": "fast",       # folding old chat turns into a running summary
+    "flashcards": "fast",
+    "quiz": "fast",
+    "ocr": "fast",               # OCR text clean-up
+}
+DEFAULT_TIER = "fast"
+
+# Prompts this large go to the long-context tier whatever the task
+LONG_CONTEXT_TOKENS = int(os.getenv("STUDYAI_LONG_CONTEXT_TOKENS", "100000"))
+# Adaptive ordering: recent window, minimum evidence and thresholds
+STATS_WINDOW = 2000
+STATS_REFRESH_S = 60.0
+MIN_CALLS = 10
+DEMOTE_ERROR_RATE = 0.3
+
+_stats: dict[str, dict] = {}
+_stats_at = 0.0
+_lock = threading.Lock()
+
+
+def model_stats(refresh: bool = False) -> dict[str, dict]:
+    """Per-model calls / error_rate / p50_ms from recent telemetry (cached)."""
+    global _stats, _stats_at
+    with _lock:
+        if refresh or time.monotonic() - _stats_at > STATS_REFRESH_S:
+            rows = [r for r in telemetry.load_records()[-STATS_WINDOW:] if r.get("model")]
+            stats = {}
+            for model, s in telemetry.summarize(rows, by="model").items():
+                stats[model] = {"calls": s["calls"], "p50_ms": s["p50_ms"],
+                                "error_rate": s["errors"] / s["calls"] if s["calls"] else 0.0}
+            _stats, _stats_at = stats, time.monotonic()
+        return _stats
+
+
+def _adapt(models: list[str], stats: dict[str, dict]) -> list[str]:
+    known = {m: s for m, s in stats.items() if s["calls"] >= MIN_CALLS and m in models}
+    healthy = [m for m in models if known.get(m, {}).get("error_rate", 0.0) < DEMOTE_ERROR_RATE]
+    failing = [m for m in models if m not in healthy]
+    if not known:
+        return healthy + failing
+
+    # Latency buckets of 2x: within a bucket the configured tier order wins
+    def bucket(model: str) -> int:
+        p50 = known.get(model, {}).get("p50_ms")
+        if not p50:
+            p50 = known.get(healthy[0], {}).get("p50_ms") if healthy else None
+        return int(math.log2(max(p50, 1.0))) if p50 else 0
+
+    return sorted(healthy, key=bucket) + failing
+
+
+def tier_for(task: str | None, tokens: int = 0) -> str:
+    if tokens > LONG_CONTEXT_TOKENS:
+        return "long_context"
+    if task in ROUTES:
+        return ROUTES[task]
+    # "summary:Something" falls back to the plain task's route
+    return ROUTES.get((task or "").split(":", 1)[0], DEFAULT_TIER)
+
+
+def models_for(task: str | None, tokens: int = 0, adaptive: bool = True) -> list[str]:
+    """Ordered candidate models for `task` with a prompt of about `tokens` tokens."""
+    models = list(TIERS[tier_for(task, tokens)])
+    if not adaptive:
+        return models
+    try:
+        return _adapt(models, model_stats())
+    except Exception:
+        return models
+
+
+if __name__ == "__main__":
+    stats = model_stats(refresh=True)
+    print(f"🧭 Routing table (telemetry: {sum(s['calls'] for s in stats.values())} recent calls)\n")
+    for task, tier in ROUTES.items():
+        print(f"{task:<18} {tier:<13} {' > '.join(m.split('/')[-1] for m in models_for(task))}")
+    print(f"{'> ' + str(LONG_CONTEXT_TOKENS) + ' tokens':<18} {'long_context':<13} "
+          f"{' > '.join(m.split('/')[-1] for m in models_for(None, LONG_CONTEXT_TOKENS + 1))}")
+    if stats:
+        print()
+        for model, s in sorted(stats.items()):
+            print(f"{model:<40} calls={s['calls']:<5} p50={s['p50_ms']:<8} errors={s['error_rate']:.0%}")
@@ -0,0 +1,59 @@
+# singleflight.py
+"""In-flight request coalescing ("single flight").
+
+Concurrent callers that ask for the same key share one execution: the first
+caller runs the function, everyone else who arrives while it is still running
+waits on the same Future and gets the same result (or exception). Once the
+call finishes the key is forgotten, so later calls run fresh; this is not a
+cache.
+
+    flight = SingleFlight()
+    text, shared = flight.do(key, lambda: provider.generate(...))
+"""
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+
+def request_key(*parts: Any) -> str:
+    """Stable hash of the request parameters (prompt, config, models, ...)."""
+    blob = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Thread-safe map of key -> in-flight Future."""
+
+    def __init__(self):
+        self._calls: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Run `fn` once per key among concurrent callers.
+        Returns (result, shared); `shared` is True for callers that waited on
+        someone else's call. Exceptions from `fn` are raised in every caller.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result(), False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,191 @@
+# telemetry.py
+"""Per-call LLM telemetry.
+
+Every LLM call appends one JSON line to data/metrics/llm_calls.jsonl
+(override with STUDYAI_METRICS_LOG, disable with STUDYAI_METRICS=0):
+
+    {"ts": ..., "call_site": "ChatAgent.chat", "class_name": "Math 201",
+     "model": "models/gemini-2.0-flash", "prompt_tokens": 812, "output_tokens": 240,
+     "ttft_ms": 640.2, "latency_ms": 1510.7, "retries": 0, "cache": "miss", "ok": true}
+
+`cache` is "miss", "hit" (context cache used), "create" (context uploaded) or
+"coalesced" (the caller shared another caller's identical in-flight request,
+so no tokens were spent). Hedged calls (gemini_api._hedged_generate) carry
+"hedged": true and "hedge_winner": "primary" | "hedge".
+
+Callers label their calls with `call_context`, which the integration layer
+reads when it records:
+
+    with telemetry.call_context("ChatAgent.chat", class_name=self.class_name):
+        reply = llm.generate(prompt)
+
+Report:
+    python -m integrations.telemetry report [--by call_site|class_name|model]
+"""
+import argparse
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from integrations import tokens
+
+METRICS_PATH = Path(os.getenv("STUDYAI_METRICS_LOG", "data/metrics/llm_calls.jsonl"))
+
+_call_site: contextvars.ContextVar[str | None] = contextvars.ContextVar("llm_call_site", default=None)
+_class_name: contextvars.ContextVar[str | None] = contextvars.ContextVar("llm_class_name", default=None)
+_write_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return os.getenv("STUDYAI_METRICS", "1") != "0"
+
+
+@contextmanager
+def call_context(call_site: str, class_name: str | None = None) -> Iterator[None]:
+    """Label every LLM call made inside the block with a call site / class."""
+    site_token = _call_site.set(call_site)
+    class_token = _class_name.set(class_name if class_name is not None else _class_name.get())
+    try:
+        yield
+    finally:
+        _call_site.reset(site_token)
+        _class_name.reset(class_token)
+
+
+def current_context() -> tuple[str | None, str | None]:
+    return _call_site.get(), _class_name.get()
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate (integrations/tokens.py) for backends that report no usage."""
+    return tokens.raw_estimate(text)
+
+
+def record(*, model: str | None, prompt_tokens: int = 0, output_tokens: int = 0,
+           ttft_ms: float | None = None, latency_ms: float = 0.0, retries: int = 0,
+           cache: str | None = None, ok: bool = True, error: str | None = None,
+           call_site: str | None = None, class_name: str | None = None, **extra) -> dict:
+    """Append one call record to the metrics log and return it."""
+    ctx_site, ctx_class = current_context()
+    entry = {
+        "ts": round(time.time(), 3),
+        "call_site": call_site or ctx_site or "unknown",
+        "class_name": class_name or ctx_class,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+        "latency_ms": round(latency_ms, 1),
+        "retries": retries,
+        "cache": cache,
+        "ok": ok,
+    }
+    if error:
+        entry["error"] = error[:300]
+    entry.update(extra)
+
+    if enabled():
+        try:
+            line = json.dumps(entry, ensure_ascii=False) + "\n"
+            with _write_lock:
+                METRICS_PATH.parent.mkdir(parents=True, exist_ok=True)
+                with open(METRICS_PATH, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except Exception as e:
+            print(f"⚠️ Could not write LLM metrics: {e}")
+    return entry
+
+
+def load_records(path: Path | None = None) -> list[dict]:
+    path = path or METRICS_PATH
+    if not path.exists():
+        return []
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                out.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # tolerate a torn last line
+    return out
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(records: Iterable[dict], by: str = "call_site") -> dict[str, dict]:
+    """Group records by `by` and compute count, errors, p50/p95 and token totals."""
+    groups: dict[str, list[dict]] = {}
+    for r in records:
+        groups.setdefault(str(r.get(by) or "-"), []).append(r)
+
+    out = {}
+    for key, rows in sorted(groups.items()):
+        latencies = [r.get("latency_ms") or 0.0 for r in rows if r.get("ok")]
+        ttfts = [r["ttft_ms"] for r in rows if r.get("ok") and r.get("ttft_ms") is not None]
+        out[key] = {
+            "calls": len(rows),
+            "errors": sum(1 for r in rows if not r.get("ok")),
+            "p50_ms": round(_percentile(latencies, 50), 1),
+            "p95_ms": round(_percentile(latencies, 95), 1),
+            "ttft_p50_ms": round(_percentile(ttfts, 50), 1),
+            "prompt_tokens": sum(r.get("prompt_tokens") or 0 for r in rows),
+            "output_tokens": sum(r.get("output_tokens") or 0 for r in rows),
+            "retries": sum(r.get("retries") or 0 for r in rows),
+            "cache_hits": sum(1 for r in rows if r.get("cache") == "hit"),
+            "coalesced": sum(1 for r in rows if r.get("cache") == "coalesced"),
+            "hedged": sum(1 for r in rows if r.get("hedged")),
+        }
+    return out
+
+
+def format_report(stats: dict[str, dict], title: str) -> str:
+    header = f"{title:<28} {'calls':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'in tok':>9} {'out tok':>9} {'retry':>6} {'hits':>5} {'shared':>6} {'hedged':>6}"
+    lines = [header, "-" * len(header)]
+    for key, s in stats.items():
+        lines.append(
+            f"{key[:28]:<28} {s['calls']:>6} {s['errors']:>4} {s['p50_ms']:>9} {s['p95_ms']:>9} "
+            f"{s['prompt_tokens']:>9} {s['output_tokens']:>9} {s['retries']:>6} {s['cache_hits']:>5} {s['coalesced']:>6} {s['hedged']:>6}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM call telemetry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("report", help="p50/p95 latency and token totals")
+    rep.add_argument("--by", action="append", choices=["call_site", "class_name", "model"],
+                     help="grouping (repeatable; default: call_site and class_name)")
+    rep.add_argument("--log", type=Path, default=None, help="metrics log path")
+    rep.add_argument("--since-hours", type=float, default=None)
+    rep.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    rows = load_records(args.log)
+    if args.since_hours is not None:
+        cutoff = time.time() - args.since_hours * 3600
+        rows = [r for r in rows if (r.get("ts") or 0) >= cutoff]
+
+    groupings = args.by or ["call_site", "class_name"]
+    if args.json:
+        print(json.dumps({g: summarize(rows, g) for g in groupings}, indent=2))
+    else:
+        print(f"📈 {len(rows)} LLM calls in {args.log or METRICS_PATH}\n")
+        for g in groupings:
+            print(format_report(summarize(rows, g), g))
+            print()
@@ -0,0 +1,215 @@
+# tokens.py
+"""Local token estimation and prompt budgets.
+
+Every prompt builder sizes its variable part (transcript, notes, loaded files)
+with this module before anything goes over the network:
+
+    body = tokens.fit_into(frame, notes, reserve_output=800)
+    parts = tokens.chunk(transcript, max_tokens=room)
+
+`estimate_tokens` is a cheap heuristic (characters and words, no tokenizer
+download). Gemini reports the real prompt size, so gemini_api logs both the
+estimate and the actual count; the per-model correction factor learns from
+those pairs in-process, and can be recomputed from the telemetry log:
+
+    python -m integrations.tokens calibrate [--save]
+"""
+import argparse
+import json
+import os
+import threading
+from pathlib import Path
+
+from integrations.resilience import LLMError
+
+# Input context limits (tokens) of the models we fail over between
+MODEL_INPUT_LIMITS = {
+    "models/gemini-2.0-flash": 1_048_576,
+    "models/gemini-2.5-flash-preview": 1_048_576,
+    "models/gemini-1.5-pro": 2_097_152,
+}
+# Unknown models are assumed to be as small as this
+FALLBACK_INPUT_LIMIT = 32_768
+# Soft cap on what we are willing to send per call, whatever the model allows
+PROMPT_BUDGET = int(os.getenv("STUDYAI_PROMPT_BUDGET", "100000"))
+# Room kept free for the answer when nothing more specific is known
+DEFAULT_RESERVE_OUTPUT = 800
+
+CALIBRATION_PATH = Path(os.getenv("STUDYAI_TOKEN_CALIBRATION", "data/metrics/token_calibration.json"))
+# Weight of each new (estimate, actual) pair in the running correction factor
+_EMA_ALPHA = 0.1
+
+TRUNCATION_MARK = "\n[... truncated to fit the prompt budget ...]"
+
+_factors: dict[str, float] | None = None
+_lock = threading.Lock()
+
+
+class PromptTooLargeError(LLMError):
+    """The prompt cannot fit the model's input limit. Not retryable."""
+
+
+def _model_key(model: str | None) -> str | None:
+    if not model:
+        return None
+    return model if model.startswith(("models/", "tunedModels/")) else f"models/{model}"
+
+
+def _load_factors() -> dict[str, float]:
+    global _factors
+    if _factors is None:
+        with _lock:
+            if _factors is None:
+                try:
+                    _factors = {k: float(v) for k, v in json.loads(CALIBRATION_PATH.read_text(encoding="utf-8")).items()}
+                except Exception:
+                    _factors = {}
+    return _factors
+
+
+def raw_estimate(text: str) -> int:
+    """Uncalibrated estimate: mean of the ~4 chars/token and ~1.33 tokens/word rules."""
+    if not text:
+        return 0
+    return max(1, round((len(text) / 4 + len(text.split()) * 4 / 3) / 2))
+
+
+def estimate_tokens(text: str, model: str | None = None) -> int:
+    """Estimated token count, corrected for `model` once calibration data exists."""
+    estimate = raw_estimate(text)
+    factor = _load_factors().get(_model_key(model) or "", 1.0) if model else 1.0
+    return round(estimate * factor)
+
+
+def observe(model: str | None, estimated: int, actual: int | None) -> None:
+    """Fold one (raw estimate, reported count) pair into the model's factor."""
+    key = _model_key(model)
+    if not key or not estimated or not actual:
+        return
+    factors = _load_factors()
+    with _lock:
+        ratio = actual / estimated
+        factors[key] = factors[key] + _EMA_ALPHA * (ratio - factors[key]) if key in factors else ratio
+
+
+def input_limit(model: str | None = None) -> int:
+    """Model's input limit; with no model, the smallest limit we might fail over to."""
+    key = _model_key(model)
+    if key is None:
+        return min(MODEL_INPUT_LIMITS.values())
+    return MODEL_INPUT_LIMITS.get(key, FALLBACK_INPUT_LIMIT)
+
+
+def budget_for(model: str | None = None, reserve_output: int = DEFAULT_RESERVE_OUTPUT) -> int:
+    """Prompt tokens we allow for one call to `model` (or any default model)."""
+    return max(0, min(input_limit(model), PROMPT_BUDGET) - reserve_output)
+
+
+def check(prompt: str, models: list[str] | None = None) -> None:
+    """Raise PromptTooLargeError if `prompt` exceeds the input limit of every candidate."""
+    limits = [input_limit(m) for m in models] if models else [input_limit()]
+    estimate = estimate_tokens(prompt, models[0] if models else None)
+    if estimate > max(limits):
+        raise PromptTooLargeError(f"Prompt is ~{estimate} tokens; the model limit is {max(limits)}")
+
+
+def fit(text: str, max_tokens: int, keep: str = "head", model: str | None = None) -> str:
+    """
+    Trim `text` to about `max_tokens`, cutting on whitespace.
+    keep="head" drops the end, keep="tail" drops the start (e.g. oldest chat).
+    """
+    if max_tokens <= 0:
+        return ""
+    estimate = estimate_tokens(text, model)
+    if estimate <= max_tokens:
+        return text
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARK, model)
+    chars = int(len(text) * budget / estimate)
+    while chars > 0:
+        if keep == "tail":
+            piece = text[-chars:]
+            cut = piece.find(" ")
+            piece = piece[cut + 1:] if 0 <= cut < 40 else piece
+            trimmed = TRUNCATION_MARK.lstrip("\n") + "\n" + piece
+        else:
+            piece = text[:chars]
+            cut = piece.rfind(" ")
+            piece = piece[:cut] if cut > len(piece) - 40 else piece
+            trimmed = piece + TRUNCATION_MARK
+        if estimate_tokens(trimmed, model) <= max_tokens:
+            return trimmed
+        chars = int(chars * 0.9)
+    return ""
+
+
+def chunk(text: str, max_tokens: int, model: str | None = None) -> list[str]:
+    """Split `text` on paragraph boundaries into pieces of at most ~`max_tokens`."""
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if estimate_tokens(text, model) <= max_tokens:
+        return [text] if text else []
+
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for para in text.split("\n\n"):
+        para_tokens = estimate_tokens(para, model)
+        if para_tokens > max_tokens:
+            # A single huge paragraph (e.g. an unpunctuated transcript): split by words
+            words = para.split()
+            step = max(1, int(len(words) * max_tokens / para_tokens * 0.95))
+            pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            pieces = [para]
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece, model)
+            if current and size + piece_tokens > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def fit_into(frame: str, body: str, model: str | None = None,
+             reserve_output: int = DEFAULT_RESERVE_OUTPUT, keep: str = "head") -> str:
+    """Trim `body` so that `frame` (the fixed prompt text) plus `body` fits the budget."""
+    room = budget_for(model, reserve_output) - estimate_tokens(frame, model)
+    return fit(body, room, keep, model)
+
+
+def calibrate(records: list[dict]) -> dict[str, float]:
+    """Per-model median of actual / estimated prompt tokens from telemetry rows."""
+    ratios: dict[str, list[float]] = {}
+    for r in records:
+        est, actual = r.get("est_prompt_tokens"), r.get("prompt_tokens")
+        if r.get("ok") and r.get("model") and est and actual:
+            ratios.setdefault(r["model"], []).append(actual / est)
+    out = {}
+    for model, values in sorted(ratios.items()):
+        values.sort()
+        out[model] = round(values[len(values) // 2], 3)
+    return out
+
+
+if __name__ == "__main__":
+    from integrations import telemetry
+
+    parser = argparse.ArgumentParser(description="Token estimator calibration")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cal = sub.add_parser("calibrate", help="fit per-model correction factors from the metrics log")
+    cal.add_argument("--log", type=Path, default=None, help="metrics log path")
+    cal.add_argument("--save", action="store_true", help=f"write factors to {CALIBRATION_PATH}")
+    args = parser.parse_args()
+
+    factors = calibrate(telemetry.load_records(args.log))
+    if not factors:
+        print("⚠️ No calls with both estimated and reported prompt tokens yet")
+    for model, factor in factors.items():
+        print(f"{model:<40} {factor:>6}")
+    if args.save and factors:
+        CALIBRATION_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CALIBRATION_PATH.write_text(json.dumps(factors, indent=2), encoding="utf-8")
+        print(f"✅ Saved calibration to {CALIBRATION_PATH}")
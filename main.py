@@ -8,6 +8,7 @@ import logging
 import flet as ft
 from app.ui import build_ui
 from app.button_manager import ButtonManager
+from app.warmup import start_warmup
 
 # Suppress TensorFlow/absl and gRPC debug spam
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"  # hides INFO & WARNING logs from TF/absl
@@ -23,7 +24,20 @@ def create_connected_ui(page: ft.Page):
     callbacks = button_manager.get_callbacks()
     
     # Build the UI and connect the callbacks
-    return build_ui(page, callbacks)
+    ui = build_ui(page, callbacks)
+
+    # Free the chat's server-side context cache when the window goes away
+    page.on_disconnect = button_manager.end_chat_session
+
+    # Load Whisper / ReportLab / Google clients in the background now that the
+    # landing page is up, instead of blocking startup on them
+    start_warmup()
+
+    # Resume offline batch jobs left over from a previous run
+    from app import batch_queue
+    if batch_queue.QUEUE_PATH.exists():
+        batch_queue.get_queue().start_drainer()
+    return ui
 
 def main():
     """Launch the StudyAI application."""
@@ -0,0 +1,41 @@
+import json
+
+from app import batch_queue
+from integrations import fake_llm, gemini_api, telemetry
+from integrations.providers import FakeProvider, set_provider
+from integrations.resilience import TokenBucket
+
+
+def test_jobs_survive_restart_and_are_written_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "data" / "classes" / "Bio 101"
+    notes = base / "notes" / "cells.txt"
+    notes.parent.mkdir(parents=True)
+    notes.write_text("Cells are the basic unit of life.", encoding="utf-8")
+    transcript = base / "transcripts" / "lec1.txt"
+    transcript.parent.mkdir()
+    transcript.write_text("Cells divide by mitosis. " * 20, encoding="utf-8")
+    log = tmp_path / "queue.jsonl"
+
+    q = batch_queue.BatchQueue(log)
+    assert q.submit_class("Bio_101") == 3
+    assert q.submit_flashcards(notes, "Bio_101") is None  # already pending
+
+    # "Restart": a new queue replays the log
+    q = batch_queue.BatchQueue(log)
+    assert len(q.pending()) == 3
+    set_provider(FakeProvider(fake_llm.FakeLLM()))
+    try:
+        q.drain(pace_s=0)
+    finally:
+        set_provider(None)
+
+    assert q.pending() == [] and batch_queue.BatchQueue(log).pending() == []
+    # Summaries, flashcards and quizzes all land in the one class folder
+    cards = json.loads((base / "flashcards" / "cells.json").read_text(encoding="utf-8"))
+    assert cards and {"question", "answer"} <= set(cards[0])
+    assert (base / "quizzes" / "cells.txt").read_text(encoding="utf-8")
+    assert list((base / "summaries").glob("*.txt"))
+    assert [p.parent.name for p in (tmp_path / "data" / "classes").glob("*/manifest.json")] == ["Bio 101"]
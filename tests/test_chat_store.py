@@ -0,0 +1,64 @@
+import json
+
+from app import chat_store
+
+
+def test_append_and_read_sessions(tmp_path):
+    store = chat_store.ChatStore("Bio", tmp_path / "Bio")
+    a, b = "s1", "s2"
+    for i in range(5):
+        store.append(a, "user", f"a{i}")
+        store.append(b, "user", f"b{i}")
+    assert [m["text"] for m in store.read(a)] == [f"a{i}" for i in range(5)]
+    assert [m["text"] for m in store.read(b, limit=2)] == ["b3", "b4"]
+    assert store.sessions() == ["s1", "s2"]
+    store.close()
+
+    # Reopened from the saved index
+    again = chat_store.ChatStore("Bio", tmp_path / "Bio")
+    assert [m["text"] for m in again.read(b)] == [f"b{i}" for i in range(5)]
+    again.close()
+
+
+def test_unindexed_tail_is_recovered_and_torn_line_dropped(tmp_path):
+    store = chat_store.ChatStore("Bio", tmp_path / "Bio")
+    store.append("s1", "user", "indexed")
+    store.flush()
+    store.append("s1", "assistant", "only in the log")  # index not saved again
+    store._file.close()
+    with open(store.log_path, "ab") as f:
+        f.write(b'{"session": "s1", "role": "us')  # crash mid-write
+
+    again = chat_store.ChatStore("Bio", tmp_path / "Bio")
+    assert [m["text"] for m in again.read("s1")] == ["indexed", "only in the log"]
+    assert again.log_path.read_bytes().endswith(b"\n")
+    again.append("s1", "user", "after recovery")
+    assert again.read("s1")[-1]["text"] == "after recovery"
+    again.close()
+
+
+def test_compaction_keeps_newest_sessions(tmp_path):
+    store = chat_store.ChatStore("Bio", tmp_path / "Bio")
+    for s in ("old", "mid", "new"):
+        for i in range(3):
+            store.append(s, "user", f"{s}{i}")
+    freed = store.compact(keep_sessions=2)
+    assert freed > 0 and store.sessions() == ["mid", "new"]
+    assert [m["text"] for m in store.read("new")] == ["new0", "new1", "new2"]
+    store.append("new", "user", "new3")
+    assert len(store.log_path.read_text(encoding="utf-8").splitlines()) == 7
+    store.close()
+
+
+def test_legacy_json_log_is_imported(tmp_path):
+    base = tmp_path / "Bio" / "ai_sessions"
+    base.mkdir(parents=True)
+    (base / "chat_log.json").write_text(json.dumps([
+        {"timestamp": "2025-01-01T00:00:00Z", "role": "user", "text": "hi"},
+        {"timestamp": "2025-01-01T00:00:01Z", "role": "assistant", "text": "hello"},
+    ]), encoding="utf-8")
+    store = chat_store.ChatStore("Bio", tmp_path / "Bio")
+    assert [m["text"] for m in store.read("legacy")] == ["hi", "hello"]
+    assert store.read("legacy")[0]["ts"] == "2025-01-01T00:00:00Z"
+    assert (base / "chat_log.json.migrated").exists() and not (base / "chat_log.json").exists()
+    store.close()
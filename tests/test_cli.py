@@ -0,0 +1,108 @@
+import json
+
+import cli
+from integrations import fake_llm, gemini_api, telemetry
+from integrations.providers import FakeProvider, set_provider
+from integrations.resilience import TokenBucket
+
+CARDS = '[{"question": "What do enzymes do?", "answer": "Speed up reactions"}]'
+
+
+def _events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+
+
+def test_pipeline_runs_then_skips_fresh_outputs(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    (inbox / "enzymes.md").write_text("Enzymes lower activation energy. " * 10, encoding="utf-8")
+    transcripts = tmp_path / "data" / "classes" / "Bio" / "transcripts"
+    transcripts.mkdir(parents=True)
+    (transcripts / "lec1.txt").write_text("Cells divide by mitosis. " * 30, encoding="utf-8")
+
+    set_provider(FakeProvider(fake_llm.FakeLLM(canned={"flashcard generator": CARDS})))
+    try:
+        assert cli.main(["--class", "Bio", "--dir", str(inbox), "--json"]) == 0
+        first = _events(capsys)
+        assert cli.main(["--class", "Bio", "--json"]) == 0
+        second = _events(capsys)
+    finally:
+        set_provider(None)
+
+    done = {(e["step"], e["file"].rsplit("/", 1)[-1]) for e in first if e.get("status") == "done"}
+    assert done == {("ingest", "enzymes.md"), ("summarize", "lec1.txt"),
+                    ("flashcards", "lec1.txt"), ("flashcards", "enzymes.md")}
+    assert (tmp_path / "data" / "classes" / "Bio" / "flashcards" / "enzymes.json").exists()
+    assert first[-1]["failed"] == 0
+    assert second[-1]["done"] == 0 and second[-1]["skipped"] == 3
+
+
+def test_failures_give_a_nonzero_exit(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    notes = tmp_path / "data" / "classes" / "Bio" / "notes"
+    notes.mkdir(parents=True)
+    (notes / "n.txt").write_text("Some notes about enzymes.", encoding="utf-8")
+    set_provider(FakeProvider(fake_llm.FakeLLM(canned={"flashcard generator": "not json"})))
+    try:
+        assert cli.main(["--class", "Bio", "--json", "--steps", "flashcards"]) == 1
+    finally:
+        set_provider(None)
+    assert _events(capsys)[-1]["failed"] == 1
+
+
+def test_class_names_with_spaces_use_one_folder(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    transcripts = tmp_path / "data" / "classes" / "Math 201" / "transcripts"
+    transcripts.mkdir(parents=True)
+    (transcripts / "lec1.txt").write_text("Eigenvalues of a matrix. " * 30, encoding="utf-8")
+
+    set_provider(FakeProvider(fake_llm.FakeLLM()))
+    try:
+        assert cli.main(["--class", "Math 201", "--json", "--steps", "summarize"]) == 0
+        first = _events(capsys)
+        # The underscored (file name) form resolves to the same class folder
+        assert cli.main(["--class", "Math_201", "--json", "--steps", "summarize"]) == 0
+        second = _events(capsys)
+    finally:
+        set_provider(None)
+
+    assert first[-1]["done"] == 1 and second[-1]["done"] == 0 and second[-1]["skipped"] == 1
+    assert [p.parent.name for p in (tmp_path / "data" / "classes").glob("*/manifest.json")] == ["Math 201"]
+    assert list((transcripts.parent / "summaries").glob("Math_201_*.txt"))
+
+
+def test_offline_fallback_fails_the_run_and_stays_stale(tmp_path, monkeypatch, capsys):
+    from app import manifest
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    monkeypatch.setattr(gemini_api, "_breakers", {})
+    transcripts = tmp_path / "data" / "classes" / "Bio" / "transcripts"
+    transcripts.mkdir(parents=True)
+    (transcripts / "lec1.txt").write_text("Cells divide by mitosis. Mitosis has four phases. " * 20, encoding="utf-8")
+
+    set_provider(FakeProvider(fake_llm.FakeLLM(error_rate=1.0, error_codes=(400,))))
+    try:
+        assert cli.main(["--class", "Bio", "--json", "--steps", "summarize"]) == 1
+    finally:
+        set_provider(None)
+    assert _events(capsys)[-1]["failed"] == 1
+    # The extractive stand-in was kept, but is reported stale
+    [(out, entry, why)] = manifest.get_manifest("Bio").stale()
+    assert out.exists() and why == "offline fallback"
+
+    monkeypatch.setattr(gemini_api, "_breakers", {})
+    set_provider(FakeProvider(fake_llm.FakeLLM()))
+    try:
+        assert cli.main(["--class", "Bio", "--json", "--steps", "summarize"]) == 0
+    finally:
+        set_provider(None)
+    assert _events(capsys)[-1]["done"] == 1
+    assert manifest.get_manifest("Bio").stale() == []
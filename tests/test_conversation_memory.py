@@ -0,0 +1,71 @@
+import threading
+
+from app.conversation_memory import ConversationMemory
+from integrations import tokens
+
+
+def test_old_turns_are_folded_in_the_background():
+    release = threading.Event()
+    prompts = []
+
+    def summarize(prompt):
+        prompts.append(prompt)
+        release.wait(5)
+        return "Student asked about mitosis phases."
+
+    memory = ConversationMemory(summarize, keep_turns=2, budget_tokens=500)
+    for i in range(3):
+        memory.add(f"question {i}", f"answer {i}")  # returns while the fold is still running
+    # Until the fold lands, the unfolded turns are still sent verbatim
+    assert "question 0" in memory.render()
+    release.set()
+    memory.wait(5)
+    rendered = memory.render()
+    assert "Student asked about mitosis phases." in rendered
+    assert "question 0" not in rendered and "question 1" in rendered and "question 2" in rendered
+    assert "question 0" in prompts[0]
+
+
+def test_history_stays_within_budget_over_a_long_session():
+    memory = ConversationMemory(None, keep_turns=4, budget_tokens=300)
+    for i in range(200):
+        memory.add(f"question {i} " + "about eigenvalues " * 30, f"answer {i} " + "because " * 30)
+        memory.wait(5)
+        assert tokens.estimate_tokens(memory.render()) <= 300
+    rendered = memory.render()
+    assert "question 199" in rendered and "Conversation summary:" in rendered
+
+
+def test_failing_summarizer_falls_back_to_condensed_turns():
+    def summarize(prompt):
+        raise RuntimeError("quota")
+
+    memory = ConversationMemory(summarize, keep_turns=1)
+    memory.add("What is a Fourier series?\nmore detail", "A sum of sines.")
+    memory.add("And a transform?", "The continuous version.")
+    memory.wait(5)
+    assert "- Q: What is a Fourier series? / A: A sum of sines." in memory.render()
+
+
+def test_chat_agent_sends_recent_turns_with_follow_ups(tmp_path):
+    from app.agents.chat_agent import ChatAgent
+
+    class Recorder:
+        def __init__(self):
+            self.prompts = []
+
+        def generate(self, prompt, task=None):
+            self.prompts.append(prompt)
+            return f"answer {len(self.prompts)}"
+
+    notes = tmp_path / "notes.txt"
+    notes.write_text("Mitosis has four phases.", encoding="utf-8")
+    llm = Recorder()
+    agent = ChatAgent(llm_client=llm)
+    agent.start_session("Bio 101", [str(notes)])
+    agent.chat("what are the phases of mitosis?")
+    agent.chat("and the first one?")
+    assert "User: what are the phases of mitosis?\nAssistant: answer 1" in llm.prompts[-1]
+    agent.start_session("Bio 101", [str(notes)])
+    agent.chat("hello")
+    assert "mitosis?" not in llm.prompts[-1]
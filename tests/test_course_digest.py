@@ -0,0 +1,50 @@
+from app import course_digest, summary_model
+from integrations import fake_llm, gemini_api, telemetry
+from integrations.providers import FakeProvider, set_provider
+from integrations.resilience import TokenBucket
+
+
+def _summary(tmp_path, name, points):
+    path = tmp_path / "Bio" / "summaries" / f"{name}.json"
+    text = "Title: Lecture\nDiscussion:\n" + "\n".join(f"- {p}" for p in points)
+    return summary_model.save_json(summary_model.parse(text), path)
+
+
+def test_only_topics_touched_by_a_new_lecture_are_resynthesized(tmp_path, monkeypatch):
+    log = tmp_path / "m.jsonl"
+    monkeypatch.setattr(telemetry, "METRICS_PATH", log)
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    course_digest.merge(_summary(tmp_path, "Bio_01-02-25", [
+        "Enzymes lower the activation energy of reactions.",
+        "Mitosis produces two identical daughter cells.",
+    ]))
+    assert course_digest.merge(_summary(tmp_path, "Bio_01-09-25", [
+        "Enzymes lower the activation energy of reactions.",   # repeat: dropped
+        "Enzymes bind substrates at the active site.",
+    ])) == 2
+
+    set_provider(FakeProvider(fake_llm.FakeLLM(canned={"course digest": "Topic: Biology\n- merged"})))
+    try:
+        out = course_digest.build("Bio", tmp_path / "Bio")
+        assert len(telemetry.load_records(log)) == 2
+
+        assert course_digest.merge(_summary(tmp_path, "Bio_01-16-25", [
+            "Mitosis has four phases: prophase, metaphase, anaphase, telophase.",
+        ])) == 1
+        course_digest.build("Bio", tmp_path / "Bio")
+        assert len(telemetry.load_records(log)) == 3
+    finally:
+        set_provider(None)
+
+    state = (tmp_path / "Bio" / "digest" / "state.json").read_text(encoding="utf-8")
+    assert state.count("activation energy") == 1
+    assert out.read_text(encoding="utf-8").startswith("Course so far: Bio (3 lectures)")
+
+
+def test_rebuilt_summary_replaces_its_points(tmp_path):
+    path = _summary(tmp_path, "Bio_01-02-25", ["Enzymes lower the activation energy of reactions."])
+    course_digest.merge(path)
+    _summary(tmp_path, "Bio_01-02-25", ["Ribosomes translate messenger RNA into proteins."])
+    course_digest.merge(path)
+    state = (tmp_path / "Bio" / "digest" / "state.json").read_text(encoding="utf-8")
+    assert "activation" not in state and "Ribosomes" in state
@@ -0,0 +1,43 @@
+from PyPDF2 import PdfReader
+
+from app import course_pack, pdf_render, summary_model
+
+
+def _lecture(tmp_path, name, title):
+    s = summary_model.parse(f"Title: {title}\nTL;DR: Short.\nDiscussion:\n- A point about {title}.")
+    pdf = tmp_path / "data" / "classes" / "Bio" / "summaries" / f"{name}.pdf"
+    summary_model.save_json(s, pdf.with_suffix(".json"))
+    pdf_render.render(s, pdf, {"course_name": "Bio"})
+    return pdf
+
+
+def test_pack_appends_new_lectures_without_rereading_old_ones(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _lecture(tmp_path, "Bio_01-09-25", "Enzymes")
+    _lecture(tmp_path, "Bio_01-02-25", "Cells")
+    pack = course_pack.build("Bio")
+    outline = [item.title for item in PdfReader(str(pack)).outline]
+    assert outline == ["Contents", "01/02/25 — Cells", "01/09/25 — Enzymes"]
+
+    _lecture(tmp_path, "Bio_01-16-25", "Mitosis")
+    opened = []
+    real_reader = course_pack.PdfReader
+    monkeypatch.setattr(course_pack, "PdfReader", lambda src: opened.append(str(src)) or real_reader(src))
+    course_pack.build("Bio")
+    # only the new lecture's PDF is read; old pages come from the existing pack
+    assert [p for p in opened if "summaries" in p] == ["data/classes/Bio/summaries/Bio_01-16-25.pdf"]
+
+    reader = PdfReader(str(pack))
+    assert [item.title for item in reader.outline][-1] == "01/16/25 — Mitosis"
+    assert len(reader.pages) == 1 + 3
+
+
+def test_changed_lecture_triggers_a_full_rebuild(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _lecture(tmp_path, "Bio_01-02-25", "Cells")
+    _lecture(tmp_path, "Bio_01-09-25", "Enzymes")
+    course_pack.build("Bio")
+    _lecture(tmp_path, "Bio_01-02-25", "Cell biology")
+    pack = course_pack.build("Bio")
+    assert [item.title for item in PdfReader(str(pack)).outline][1] == "01/02/25 — Cell biology"
+    assert course_pack.build("Bio") == pack  # nothing new: left as is
@@ -0,0 +1,33 @@
+from app import extractive
+from integrations import tokens
+
+KEY = [
+    "Photosynthesis converts light energy into chemical energy stored in glucose.",
+    "The light reactions take place in the thylakoid membranes of the chloroplast.",
+    "The Calvin cycle fixes carbon dioxide into sugar using ATP and NADPH.",
+]
+FILLER = "Um so yeah, you know, we will get to that later I think okay."
+
+
+def _lecture() -> str:
+    parts = []
+    for i in range(60):
+        parts.append(KEY[i % 3])
+        parts.append(FILLER)
+        parts.append(f"Somebody asked about parking lot number {i} which is unrelated to biology today.")
+    return " ".join(parts)
+
+
+def test_compress_hits_ratio_and_keeps_key_content():
+    text = _lecture()
+    short = extractive.compress(text, ratio=0.3, min_tokens=100)
+    assert tokens.estimate_tokens(short) <= 0.35 * tokens.estimate_tokens(text)
+    assert all(k in short for k in KEY)
+    # Repeated sentences are not picked twice
+    assert short.count(KEY[0]) == 1
+    assert extractive.compress("Too short to bother.", ratio=0.3) == "Too short to bother."
+
+
+def test_offline_summary_layout():
+    summary = extractive.offline_summary(_lecture())
+    assert summary.startswith("Title:") and "TL;DR:" in summary and "- " in summary
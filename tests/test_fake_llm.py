@@ -0,0 +1,47 @@
+import json
+import urllib.request
+
+import pytest
+
+from integrations import fake_llm
+from integrations.resilience import is_retryable
+
+
+def test_fake_is_deterministic_and_shaped():
+    llm = fake_llm.FakeLLM(seed=3)
+    prompt = "You are a flashcard generator.\nCreate 3 study flashcards from these notes.\nNotes:\nmitochondria powerhouse"
+    first = llm.generate_text(prompt)
+    assert first == fake_llm.FakeLLM(seed=99).generate_text(prompt)
+    assert len(json.loads(first)) == 3
+
+
+def test_fake_injects_retryable_errors():
+    llm = fake_llm.FakeLLM(error_rate=1.0, error_codes=(429,), seed=1)
+    with pytest.raises(fake_llm.FakeAPIError) as exc:
+        llm.generate_text("hello")
+    assert exc.value.status_code == 429
+    assert is_retryable(exc.value)
+
+
+def test_fake_streams_at_token_rate():
+    slept = []
+    llm = fake_llm.FakeLLM(latency="fixed:0.2", token_rate=10, canned={"hi": "one two three"}, sleep=slept.append)
+    assert "".join(llm.stream_text("hi")) == "one two three"
+    assert slept == [0.2, 0.1, 0.1]
+
+
+def test_fake_http_server_speaks_gemini_rest():
+    fake_llm.configure(canned={"ping": "pong"})
+    server = fake_llm.serve(port=0)
+    try:
+        port = server.server_address[1]
+        body = json.dumps({"contents": [{"parts": [{"text": "ping"}]}]}).encode()
+        req = urllib.request.Request(
+            f"http://127.0.0.1:{port}/v1beta/models/gemini-2.0-flash:generateContent",
+            data=body, headers={"Content-Type": "application/json"},
+        )
+        payload = json.loads(urllib.request.urlopen(req, timeout=5).read())
+        assert payload["candidates"][0]["content"]["parts"][0]["text"] == "pong"
+    finally:
+        server.shutdown()
+        fake_llm.configure()
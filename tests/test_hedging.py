@@ -0,0 +1,54 @@
+import time
+
+from integrations import gemini_api, telemetry
+from integrations.hedging import HedgePolicy
+from integrations.providers import LLMProvider, LLMResponse, set_provider
+from integrations.resilience import TokenBucket
+
+
+class SlowFirstModel(LLMProvider):
+    """The "slow" model takes seconds to start; every other model answers at once."""
+
+    name = "slow-first"
+
+    def generate(self, model, prompt, config=None, **options):
+        return LLMResponse(text="".join(self.stream(model, prompt, config)), model=model)
+
+    def stream(self, model, prompt, config=None, **options):
+        if model == "slow":
+            time.sleep(2.0)
+        yield f"answer from {model}"
+
+
+def test_policy_delay_tracks_p95_and_caps_rate():
+    policy = HedgePolicy(max_rate=0.25, min_samples=5, default_delay_ms=1000, min_delay_ms=10)
+    assert policy.delay_ms() == 1000
+    for ms in range(100, 2100, 100):
+        policy.observe(ms)
+    assert policy.delay_ms() == 1900
+
+    assert not policy.allow_hedge()  # 1 hedge in 1 call would be 100%
+    for _ in range(3):
+        policy.record_call(False)
+    assert policy.allow_hedge()
+    policy.record_call(True)
+    assert not policy.allow_hedge() and policy.hedge_rate() == 0.25
+
+
+def test_slow_primary_is_hedged(tmp_path, monkeypatch):
+    log = tmp_path / "m.jsonl"
+    monkeypatch.setattr(telemetry, "METRICS_PATH", log)
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    policy = HedgePolicy(max_rate=1.0, default_delay_ms=100, min_delay_ms=10)
+    monkeypatch.setattr(gemini_api, "_hedge_policy", policy)
+    set_provider(SlowFirstModel())
+    try:
+        start = time.perf_counter()
+        assert gemini_api.generate_text("Q", models=["slow", "fast"], hedge=True) == "answer from fast"
+        assert time.perf_counter() - start < 1.0
+    finally:
+        set_provider(None)
+
+    row = telemetry.load_records(log)[-1]
+    assert row["hedged"] and row["hedge_winner"] == "hedge" and row["model"] == "fast"
+    assert telemetry.summarize([row])["unknown"]["hedged"] == 1
@@ -0,0 +1,30 @@
+from app.incremental_summarizer import IncrementalSummarizer
+from integrations import fake_llm, gemini_api, telemetry
+from integrations.providers import FakeProvider, set_provider
+from integrations.resilience import TokenBucket
+
+
+def test_only_new_text_is_folded(tmp_path, monkeypatch):
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    fake = fake_llm.FakeLLM(canned={"NEW TRANSCRIPT": "- enzymes lower activation energy"})
+    set_provider(FakeProvider(fake))
+    transcript = tmp_path / "lecture.mp3.txt"
+    try:
+        transcript.write_text("Enzymes are proteins that speed up reactions. " * 40, encoding="utf-8")
+        inc = IncrementalSummarizer(transcript, min_new_tokens=50)
+        assert inc.update() and fake.calls == 1
+        first_offset = inc.state["offset"]
+        assert 0 < first_offset <= transcript.stat().st_size
+
+        assert not inc.update()  # nothing new: no model call
+        assert fake.calls == 1
+
+        with open(transcript, "a", encoding="utf-8") as f:
+            f.write("They lower the activation energy of a reaction. " * 40)
+        # A restarted app picks up the saved state
+        inc = IncrementalSummarizer(transcript, min_new_tokens=50)
+        assert inc.state["offset"] == first_offset and inc.update()
+        assert inc.state["folds"] == 2 and inc.notes == "- enzymes lower activation energy"
+    finally:
+        set_provider(None)
@@ -0,0 +1,86 @@
+from app import manifest, pdf_render, summarizer
+from integrations import fake_llm, gemini_api, telemetry
+from integrations.providers import FakeProvider, set_provider
+from integrations.resilience import TokenBucket
+
+SUMMARY = "Title: Enzymes\nTL;DR: Enzymes speed up reactions.\nDiscussion:\n- Active sites bind substrates."
+
+
+def _transcript(tmp_path, name, text):
+    path = tmp_path / "data" / "classes" / "Bio" / "transcripts" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_same_day_summaries_of_other_lectures_get_a_suffix(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lec1 = _transcript(tmp_path, "lec1.txt", "first lecture")
+    lec2 = _transcript(tmp_path, "lec2.txt", "second lecture")
+    first = summarizer.save_summary(SUMMARY, "Bio", source=lec1)
+    second = summarizer.save_summary(SUMMARY, "Bio", source=lec2)
+    again = summarizer.save_summary(SUMMARY, "Bio", source=lec1)
+    pdf_render.wait(timeout=60)
+    assert second.name == first.stem + "_2.txt"
+    assert again == first
+    assert manifest.get_manifest("Bio").stale() == []
+
+
+def test_rebuild_redoes_only_stale_summaries(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    lec1 = _transcript(tmp_path, "lec1.txt", "Enzymes lower activation energy. " * 20)
+    set_provider(FakeProvider(fake_llm.FakeLLM()))
+    try:
+        out = summarizer.summarize_file(lec1, None, class_name="Bio", wait_pdf=True)
+        deps = manifest.get_manifest("Bio")
+        assert deps.stale() == []
+
+        lec1.write_text("Enzymes are proteins. " * 20, encoding="utf-8")
+        _transcript(tmp_path, "lec2.txt", "Ribosomes build proteins. " * 20)
+        [(stale_out, entry, why)] = deps.stale()
+        assert (stale_out.resolve(), entry["kind"], why) == (out.resolve(), "summary", "source changed")
+        assert [p.name for p in deps.untracked_transcripts()] == ["lec2.txt"]
+
+        assert manifest.rebuild("Bio", workers=2) == (2, 0)
+    finally:
+        set_provider(None)
+    assert deps.stale() == [] and deps.untracked_transcripts() == []
+    assert out.exists() and out.with_suffix(".pdf").exists()
+
+
+def test_rebuild_finds_transcripts_and_metadata_of_classes_with_spaces(tmp_path, monkeypatch):
+    import json
+    from concurrent.futures import Future
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "class_data.json").write_text(json.dumps(
+        {"class_data": {"Math 201": {"course_name": "Calculus II", "date": "09/14/25"}}}), encoding="utf-8")
+    transcripts = tmp_path / "data" / "classes" / "Math 201" / "transcripts"
+    transcripts.mkdir(parents=True)
+    lec1 = transcripts / "lec1.txt"
+    lec1.write_text("first lecture", encoding="utf-8")
+    txt = summarizer.save_summary(SUMMARY, "Math 201", wait_pdf=True, source=lec1)
+    (transcripts / "lec2.txt").write_text("second lecture", encoding="utf-8")
+
+    deps = manifest.get_manifest("Math_201")
+    assert deps.root.name == "Math 201" and txt.parent.parent.resolve() == deps.root
+    assert [p.name for p in deps.untracked_transcripts()] == ["lec2.txt"]
+
+    rendered = []
+    real_render = pdf_render.render
+    monkeypatch.setattr(pdf_render, "render", lambda s, p, metadata=None: rendered.append(metadata) or real_render(s, p, metadata))
+
+    def submit(json_path, pdf_path, metadata=None):
+        # In this process, so the spy above sees what the worker would render
+        done = Future()
+        done.set_result(pdf_render.render_file(str(json_path), str(pdf_path), metadata))
+        return done
+    monkeypatch.setattr(pdf_render, "submit", submit)
+    # Metadata changed since the summary was written: the PDF keeps the lecture's own
+    (tmp_path / "class_data.json").write_text(json.dumps(
+        {"class_data": {"Math 201": {"course_name": "Calculus II", "date": "10/01/25"}}}), encoding="utf-8")
+    txt.with_suffix(".pdf").unlink()
+    assert manifest.rebuild("Math_201", include_new=False) == (1, 0)
+    assert rendered[0]["course_name"] == "Calculus II" and rendered[0]["date"] == "09/14/25"
@@ -0,0 +1,22 @@
+from app import pdf_render, summary_model, summarizer
+
+TEXT = "Title: Enzymes\nTL;DR: Enzymes speed up reactions.\nDiscussion:\n- Active sites bind substrates."
+
+
+def test_save_summary_returns_txt_and_renders_pdf_in_background(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    txt = summarizer.save_summary(TEXT, "Bio")
+    assert txt.read_text(encoding="utf-8") == TEXT
+    saved = summary_model.load(txt.with_suffix(".json"))
+    assert saved.title == "Enzymes"
+    # Course and date travel with the summary, for later re-renders
+    assert saved.metadata["class"] == "Bio" and saved.metadata["course_name"] == "Bio" and saved.metadata["date"]
+    assert pdf_render.wait(timeout=60)
+    assert txt.with_suffix(".pdf").read_bytes().startswith(b"%PDF")
+
+
+def test_rerender_all_from_json(tmp_path):
+    for course in ("Bio", "Chem"):
+        summary_model.save_json(summary_model.parse(TEXT), tmp_path / course / "summaries" / f"{course}_01-02-25.json")
+    assert pdf_render.rerender_all(tmp_path, workers=2) == (2, 0)
+    assert (tmp_path / "Chem" / "summaries" / "Chem_01-02-25.pdf").exists()
@@ -0,0 +1,98 @@
+from integrations import fake_llm, gemini_api
+from integrations.resilience import CircuitBreaker, TokenBucket
+from integrations.providers import FakeProvider, GeminiProvider, set_provider, to_gemini_config
+
+
+def test_gemini_provider_against_fake_server():
+    fake_llm.configure(canned={"ping": "pong pong"})
+    server = fake_llm.serve(port=0)
+    provider = GeminiProvider(api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1beta")
+    try:
+        resp = provider.generate("gemini-2.0-flash", "ping", {"max_output_tokens": 50})
+        assert resp.text == "pong pong" and resp.output_tokens == 2
+        assert "".join(provider.stream("gemini-2.0-flash", "ping")) == "pong pong"
+    finally:
+        provider.close()
+        server.shutdown()
+        fake_llm.configure()
+
+
+def test_generate_surface_shares_one_provider(tmp_path, monkeypatch):
+    from integrations import telemetry
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    set_provider(FakeProvider(fake_llm.FakeLLM(canned={"Q": "answer"})))
+    try:
+        assert gemini_api.generate_text("Q1") == "answer"
+        assert "".join(gemini_api.stream_text("Q2")) == "answer"
+        assert gemini_api.batch_generate(["Q3", "Q4"]) == ["answer", "answer"]
+    finally:
+        set_provider(None)
+
+
+def test_generation_config_is_camel_cased():
+    assert to_gemini_config({"max_output_tokens": 10, "top_p": 0.9}) == {"maxOutputTokens": 10, "topP": 0.9}
+
+
+def test_chat_context_is_cached_once_per_session(tmp_path, monkeypatch):
+    from app.agents.chat_agent import ChatAgent
+    from app.integrations.llm_client import LLMClient
+    from integrations import telemetry
+    log = tmp_path / "m.jsonl"
+    monkeypatch.setattr(telemetry, "METRICS_PATH", log)
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    monkeypatch.setattr(gemini_api, "MIN_CACHE_TOKENS", 1)
+    notes = tmp_path / "notes.txt"
+    notes.write_text("Mitosis has four phases. " * 50, encoding="utf-8")
+    provider = FakeProvider(fake_llm.FakeLLM(canned={"User:": "sure"}))
+    set_provider(provider)
+    try:
+        agent = ChatAgent(llm_client=LLMClient())
+        agent.start_session("Bio 101", [str(notes)])
+        assert agent._context is not None and agent._context.cached
+        assert agent.chat("what are the phases?") == "sure"
+        assert agent.chat("and the first one?") == "sure"
+        agent.end_session()
+        assert provider._caches == {}
+    finally:
+        set_provider(None)
+
+    rows = telemetry.load_records(log)
+    assert [r["cache"] for r in rows] == ["create", "hit", "hit"]
+
+
+def test_closing_a_stream_still_settles_the_breaker(tmp_path, monkeypatch):
+    from integrations import telemetry
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()  # open, immediately eligible for a half-open probe
+    monkeypatch.setattr(gemini_api, "_breakers", {"m": breaker})
+    set_provider(FakeProvider(fake_llm.FakeLLM(canned={"Q": "a long streamed answer"})))
+    try:
+        stream = gemini_api.stream_text("Q", models=["m"])
+        next(stream)
+        stream.close()
+    finally:
+        set_provider(None)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+
+def test_evicted_cache_is_resent_inline_without_a_retry(tmp_path, monkeypatch):
+    from integrations import telemetry
+    monkeypatch.setattr(telemetry, "METRICS_PATH", tmp_path / "m.jsonl")
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    monkeypatch.setattr(gemini_api, "MIN_CACHE_TOKENS", 1)
+    monkeypatch.setattr(gemini_api, "MAX_RETRIES", 0)
+    provider = FakeProvider(fake_llm.FakeLLM(canned={"Q": "answer"}))
+    set_provider(provider)
+    try:
+        first = gemini_api.create_context_cache("notes " * 100, models=["m"])
+        second = gemini_api.create_context_cache("other notes " * 100, models=["m"])
+        provider._caches.pop(first.name)  # server-side expiry
+        assert gemini_api.generate_text("Q", models=["m"], context=first) == "answer"
+        assert first.name is None
+        third = gemini_api.create_context_cache("more notes " * 100, models=["m"])
+        assert third.name != second.name and second.name in provider._caches
+    finally:
+        set_provider(None)
@@ -0,0 +1,56 @@
+from integrations.resilience import (
+    CircuitBreaker,
+    RetryableLLMError,
+    TokenBucket,
+    backoff_delay,
+    is_retryable,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=2, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() and bucket.acquire()
+    assert not bucket.try_acquire()
+    assert bucket.acquire()
+    assert abs(clock.now - 0.5) < 1e-9
+
+
+def test_circuit_breaker_opens_and_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.allow()        # single half-open probe
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_classification_and_backoff():
+    class ResourceExhausted(Exception):
+        pass
+
+    class HttpErr(Exception):
+        status_code = 503
+
+    assert is_retryable(ResourceExhausted())
+    assert is_retryable(HttpErr())
+    assert is_retryable(RetryableLLMError())
+    assert not is_retryable(ValueError("bad request"))
+    assert all(0 <= backoff_delay(a, base=1, cap=5) <= 5 for a in range(10))
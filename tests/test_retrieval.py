@@ -0,0 +1,78 @@
+from app import retrieval
+from integrations import tokens
+
+
+def test_bm25_ranks_the_relevant_chunk_first():
+    filler = "The lecture covered many unrelated administrative details about the course. " * 30
+    index = retrieval.BM25Index.from_sources([
+        ("admin.txt", filler),
+        ("fourier.txt", "A Fourier series writes a periodic function as a sum of sines and cosines. " * 3),
+        ("mitosis.txt", "Mitosis has four phases: prophase, metaphase, anaphase and telophase. " * 3),
+    ], chunk_tokens=100)
+    hits = index.search("what is a fourier series?", k=3)
+    assert hits and hits[0][0].source == "fourier.txt"
+    assert all(c.source != "mitosis.txt" for c, _ in hits)
+    assert index.search("quantum chromodynamics") == []
+
+
+class _Recorder:
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, task=None):
+        self.prompts.append(prompt)
+        return "ok"
+
+
+def test_chat_prompt_stays_bounded_for_large_selections(tmp_path, monkeypatch):
+    from app.agents import chat_agent
+    monkeypatch.setattr(chat_agent, "SMALL_CORPUS_TOKENS", 2000)
+    files = []
+    for i in range(20):
+        f = tmp_path / f"lecture{i}.txt"
+        f.write_text(f"Lecture {i} discusses topic{i} in depth. " * 400, encoding="utf-8")
+        files.append(str(f))
+    files[7:7] = [str(tmp_path / "eigen.md")]
+    (tmp_path / "eigen.md").write_text("Eigenvalues are the roots of the characteristic polynomial. " * 20,
+                                       encoding="utf-8")
+
+    llm = _Recorder()
+    agent = chat_agent.ChatAgent(llm_client=llm)
+    agent.start_session("Math 201", files)
+    assert agent._index is not None and len(agent._index) > 20
+    assert agent.chat("how do I find eigenvalues?") == "ok"
+    prompt = llm.prompts[-1]
+    assert "[eigen.md]" in prompt and "characteristic polynomial" in prompt
+    assert tokens.estimate_tokens(prompt) <= chat_agent.RETRIEVAL_TOKENS + 200
+    agent.end_session()
+    assert agent._index is None
+
+
+def test_chat_adds_semantic_hits_from_the_class_index(tmp_path, monkeypatch):
+    from app import vector_index
+    from app.agents import chat_agent
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(vector_index, "_indexes", {})
+    monkeypatch.setattr(chat_agent, "SMALL_CORPUS_TOKENS", 2000)
+    notes = tmp_path / "data" / "classes" / "Math 201" / "notes"
+    notes.mkdir(parents=True)
+    files = []
+    for i in range(10):
+        f = notes / f"lecture{i}.txt"
+        f.write_text(f"Lecture {i} discusses topic{i} in depth. " * 400, encoding="utf-8")
+        files.append(str(f))
+    (notes / "eigen.md").write_text("Eigenvalues are the roots of the characteristic polynomial. " * 20,
+                                    encoding="utf-8")
+    files.append(str(notes / "eigen.md"))
+
+    llm = _Recorder()
+    agent = chat_agent.ChatAgent(llm_client=llm)
+    agent.start_session("Math_201", files)
+    assert agent._semantic is not None
+    agent.chat("how do I find eigenvalues?")
+    prompt = llm.prompts[-1]
+    # Keyword chunks are labelled by file name, semantic passages by their path in the class folder
+    assert "[eigen.md]" in prompt and "[notes/eigen.md]" in prompt
+    assert tokens.estimate_tokens(prompt) <= chat_agent.RETRIEVAL_TOKENS + 200
+    agent.end_session()
+    assert agent._semantic is None
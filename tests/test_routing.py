@@ -0,0 +1,23 @@
+from integrations import routing
+
+
+def test_routes_by_task_and_prompt_size(monkeypatch):
+    monkeypatch.setattr(routing, "model_stats", lambda refresh=False: {})
+    assert routing.models_for("flashcards")[0] == routing.TIERS["fast"][0]
+    assert routing.models_for("summary:Detailed") == routing.TIERS["strong"]
+    assert routing.models_for("summary:key_topics") == routing.TIERS["fast"]
+    assert routing.models_for("chat", tokens=routing.LONG_CONTEXT_TOKENS + 1) == routing.TIERS["long_context"]
+
+
+def test_order_adapts_to_measured_latency_and_errors(monkeypatch):
+    fast, balanced, pro = routing.TIERS["fast"]
+    stats = {
+        fast: {"calls": 50, "p50_ms": 4000.0, "error_rate": 0.0},
+        balanced: {"calls": 50, "p50_ms": 900.0, "error_rate": 0.0},  # >2x faster: promoted
+        pro: {"calls": 3, "p50_ms": 100.0, "error_rate": 0.0},        # too few calls to judge
+    }
+    monkeypatch.setattr(routing, "model_stats", lambda refresh=False: stats)
+    assert routing.models_for("quiz") == [balanced, fast, pro]
+
+    stats[balanced]["error_rate"] = 0.5
+    assert routing.models_for("quiz")[-1] == balanced
@@ -0,0 +1,47 @@
+import threading
+import time
+
+from integrations import fake_llm, gemini_api, telemetry
+from integrations.providers import FakeProvider, set_provider
+from integrations.resilience import TokenBucket
+from integrations.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert {text for text, _ in results} == {"done"}
+    assert flight.in_flight() == 0
+
+
+def test_identical_prompts_are_coalesced(tmp_path, monkeypatch):
+    log = tmp_path / "m.jsonl"
+    monkeypatch.setattr(telemetry, "METRICS_PATH", log)
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    set_provider(FakeProvider(fake_llm.FakeLLM(latency="fixed:0.2", canned={"Summarize": "ok"})))
+    try:
+        threads = [threading.Thread(target=gemini_api.generate_text, args=("Summarize this",)) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        set_provider(None)
+
+    caches = sorted(r["cache"] for r in telemetry.load_records(log))
+    assert caches == ["coalesced", "coalesced", "miss"]
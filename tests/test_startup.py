@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Modules that must not be imported before the landing page renders
+HEAVY_MODULES = [
+    "whisper",
+    "torch",
+    "reportlab",
+    "googleapiclient",
+    "google_auth_oauthlib",
+    "google.generativeai",
+    "pytesseract",
+]
+
+# Generous ceiling for importing the app shell (Flet dominates this)
+STARTUP_BUDGET_S = 5.0
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _measure(target: str) -> dict:
+    code = _PROBE.format(target=target, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_integration_and_handler_packages_import_lazily():
+    result = _measure("app.integrations, app.handlers, app.agents.chat_agent, app.agents.flashcards_agent, integrations.gemini_api")
+    assert result["loaded"] == []
+
+
+def test_app_startup_time():
+    result = _measure("main")
+    print(f"\n⏱️ app startup imports: {result['elapsed'] * 1000:.0f} ms")
+    assert result["loaded"] == []
+    assert result["elapsed"] < STARTUP_BUDGET_S
@@ -0,0 +1,48 @@
+import json
+import os
+
+from app import storage
+
+
+def test_metadata_is_cached_until_the_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "class_data.json"
+    path.write_text(json.dumps({"current_classes": {"classes": ["Math 201"], "selected": "Math 201"},
+                                "class_data": {"Math 201": {"course_name": "Calculus II", "date": "09/14/25"}}}),
+                    encoding="utf-8")
+    store = storage.MetadataStore((path,))
+    assert store.class_metadata("Math 201")["course_name"] == "Calculus II"
+    assert store.class_metadata("Other")["course_name"] == "Other"
+
+    reads = []
+    original = type(path).read_text
+    monkeypatch.setattr(type(path), "read_text", lambda self, *a, **k: reads.append(self) or original(self, *a, **k))
+    assert store.selected_class() == "Math 201"
+    assert reads == []
+
+    data = json.loads(original(path, encoding="utf-8"))
+    data["class_data"]["Math 201"]["course_name"] = "Calculus 2"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    os.utime(path, ns=(1, 1))  # a different mtime even on coarse clocks
+    assert store.class_metadata("Math 201")["course_name"] == "Calculus 2"
+    assert len(reads) == 1
+
+
+def test_writes_are_atomic_and_keep_other_data(tmp_path):
+    path = tmp_path / "class_data.json"
+    path.write_text(json.dumps({"class_data": {"General": {"notes": "keep me"}}}), encoding="utf-8")
+    store = storage.MetadataStore((path,))
+    store.set_selected("Bio 101")
+    store.set_class_metadata("Bio 101", course_name="Biology", class_code="BIO101")
+
+    fresh = storage.MetadataStore((path,))
+    assert fresh.selected_class() == "Bio 101" and fresh.classes() == ["Bio 101"]
+    assert fresh.class_metadata("Bio 101")["class_code"] == "BIO101"
+    assert fresh.data()["class_data"]["General"]["notes"] == "keep me"
+    assert not path.with_suffix(".tmp").exists()
+
+
+def test_class_folder_resolves_underscored_names(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "classes" / "Math 201").mkdir(parents=True)
+    assert storage.class_dir("Math_201") == storage.class_dir("Math 201") == storage.CLASSES_DIR / "Math 201"
+    assert storage.class_dir("Bio_101") == storage.CLASSES_DIR / "Bio_101"  # unknown: used as given
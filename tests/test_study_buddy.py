@@ -0,0 +1,33 @@
+from app import vector_index
+from app.agents.study_buddy import StudyBuddy
+
+
+class _Recorder:
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt, task=None):
+        self.prompts.append(prompt)
+        return "answer"
+
+
+def test_study_buddy_answers_from_the_class_index(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(vector_index, "_indexes", {})
+    root = tmp_path / "data" / "classes" / "Bio 101"
+    (root / "notes").mkdir(parents=True)
+    (root / "transcripts").mkdir()
+    (root / "notes" / "cells.md").write_text("Mitochondria produce ATP through cellular respiration.",
+                                             encoding="utf-8")
+    (root / "transcripts" / "lec1.txt").write_text("Photosynthesis happens in the chloroplast.",
+                                                   encoding="utf-8")
+
+    llm = _Recorder()
+    buddy = StudyBuddy(llm_client=llm)
+    assert buddy.ask("Bio_101", "Where is ATP produced by the mitochondria?") == "answer"
+    assert "[notes/cells.md]" in llm.prompts[0] and "Mitochondria produce ATP" in llm.prompts[0]
+    assert (root / "vectors" / "table.json").exists()
+
+    # Without a model the passages themselves are returned
+    assert "Photosynthesis" in StudyBuddy().ask("Bio 101", "chloroplast photosynthesis")
+    assert "select a class" in buddy.ask("Chem 300", "anything")
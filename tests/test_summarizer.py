@@ -1,5 +1,5 @@
 from pathlib import Path
-from app import summarizer
+from app import pdf_render, storage, summarizer
 
 
 def test_summarizer():
@@ -7,17 +7,19 @@ def test_summarizer():
     input_txt = Path("data/classes/General/transcripts/sample.mp3.txt")
 
     # Load metadata directly (so test is in sync with summarizer logic)
-    metadata = summarizer._load_class_metadata("General")
+    metadata = storage.class_metadata("General")
 
     course = metadata.get("course_name", "General").replace(" ", "_")
     date_str = metadata.get("date") or "unknown-date"
 
-    summary_dir = Path(f"data/classes/{course}/summaries")
+    summary_dir = storage.class_dir("General") / "summaries"
     expected_txt = summary_dir / f"{course}_{date_str.replace('/', '-')}.txt"
     expected_pdf = summary_dir / f"{course}_{date_str.replace('/', '-')}.pdf"
 
     # Run summarization
-    summarizer.summarize_file(input_txt, None, class_name=course)
+    summarizer.summarize_file(input_txt, None, class_name="General")
+    # The PDF is rendered in the background pool
+    pdf_render.wait(timeout=60)
 
     # Verify outputs exist
     assert expected_txt.exists(), f"Summary text file was not generated at {expected_txt}"
@@ -0,0 +1,40 @@
+import json
+
+from integrations import fake_llm, gemini_api, telemetry
+from integrations.providers import FakeProvider, set_provider
+from integrations.resilience import TokenBucket
+
+
+def test_split_modes_on_markers():
+    from app.agents.summarizer_agent import split_modes
+    text = "=== TOPICS ===\n- cells\n\n=== Q&A ===\nQ: why?\nA: because\n=== DETAILED ===\nLong text."
+    assert split_modes(text) == {"Topics": "- cells", "Q&A": "Q: why?\nA: because", "Detailed": "Long text."}
+
+
+def test_all_modes_in_one_request_and_missing_sections_filled(tmp_path, monkeypatch):
+    from app.agents.summarizer_agent import SummarizerAgent
+    from app.integrations.llm_client import LLMClient
+    monkeypatch.chdir(tmp_path)
+    log = tmp_path / "m.jsonl"
+    monkeypatch.setattr(telemetry, "METRICS_PATH", log)
+    monkeypatch.setattr(gemini_api, "_rate_limiter", TokenBucket(rate=1000, capacity=100))
+    notes = tmp_path / "data" / "classes" / "Bio 101" / "notes"
+    notes.mkdir(parents=True)
+    (notes / "cells.txt").write_text("Cells divide by mitosis. " * 20, encoding="utf-8")
+    set_provider(FakeProvider(fake_llm.FakeLLM(canned={
+        "Write ALL": "=== TOPICS ===\n- mitosis\n=== DETAILED ===\nCells divide.",
+        "Q&A: the questions": "Q: how do cells divide?\nA: mitosis",
+    })))
+    try:
+        result = SummarizerAgent(llm_client=LLMClient()).summarize_all_modes("Bio_101", ["cells.txt"])
+    finally:
+        set_provider(None)
+
+    assert result == {"Topics": "- mitosis", "Detailed": "Cells divide.",
+                      "Q&A": "Q: how do cells divide?\nA: mitosis"}
+    # one sectioned call, plus one for the section the model left out
+    assert len(telemetry.load_records(log)) == 2
+    # Saved into the class folder the notes came from ("Bio_101" names the "Bio 101" class)
+    (saved,) = (tmp_path / "data" / "classes" / "Bio 101" / "summaries" / "modes").iterdir()
+    assert (saved / "QA.txt").read_text(encoding="utf-8") == result["Q&A"]
+    assert json.loads((saved / "meta.json").read_text(encoding="utf-8"))["sources"] == ["cells.txt"]
@@ -0,0 +1,47 @@
+from app import summary_model, summarizer
+
+TEXT = """Title: Cell division
+TL;DR: Cells copy their DNA and split in two.
+Discussion:
+- Mitosis has four phases.
+- Cytokinesis splits the cytoplasm.
+Implications:
+- Errors cause mutations.
+Advice/Actions:
+- Review the phase diagram.
+Glossary:
+- Chromatid — one copy of a duplicated chromosome
+"""
+
+
+def test_parse_fields_and_round_trip():
+    s = summary_model.parse(TEXT)
+    assert s.title == "Cell division"
+    assert s.tldr.startswith("Cells copy")
+    assert s.discussion == ["Mitosis has four phases.", "Cytokinesis splits the cytoplasm."]
+    assert s.actions == ["Review the phase diagram."]
+    assert s.glossary == [("Chromatid", "one copy of a duplicated chromosome")]
+    assert summary_model.parse(s.to_text()) == s
+
+
+def test_unknown_sections_are_kept():
+    s = summary_model.parse("Title: T\nNotes:\n- extra point\nstray line")
+    assert s.extra == {"Notes": ["extra point", "stray line"]}
+
+
+def test_json_load_is_cached_until_the_file_changes(tmp_path):
+    path = tmp_path / "Bio" / "summaries" / "Bio_01-02-25.json"
+    summary_model.save_json(summary_model.parse(TEXT), path)
+    first = summary_model.load(path)
+    assert summary_model.load(path) is first
+    [(found, loaded)] = list(summary_model.load_all(tmp_path))
+    assert found == path and loaded is first
+
+    summary_model.save_json(summary_model.parse(TEXT.replace("Cell division", "Meiosis")), path)
+    assert summary_model.load(path).title == "Meiosis"
+
+
+def test_pdf_renders_from_the_structure(tmp_path):
+    out = tmp_path / "s.pdf"
+    summarizer.save_summary_pdf(summary_model.parse(TEXT), out, {"course_name": "Bio", "date": "01/02/25"})
+    assert out.read_bytes().startswith(b"%PDF")
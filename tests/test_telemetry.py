@@ -0,0 +1,22 @@
+from integrations import telemetry
+
+
+def test_records_are_labelled_and_summarized(tmp_path, monkeypatch):
+    log = tmp_path / "llm_calls.jsonl"
+    monkeypatch.setattr(telemetry, "METRICS_PATH", log)
+
+    with telemetry.call_context("ChatAgent.chat", class_name="Math 201"):
+        for ms in (100, 200, 300, 400):
+            telemetry.record(model="m", prompt_tokens=10, output_tokens=5, latency_ms=ms, cache="miss")
+    telemetry.record(model="m", latency_ms=50, ok=False, error="boom", call_site="summarizer.summarize_text")
+
+    rows = telemetry.load_records(log)
+    assert len(rows) == 5
+    assert rows[0]["call_site"] == "ChatAgent.chat" and rows[0]["class_name"] == "Math 201"
+
+    by_site = telemetry.summarize(rows, "call_site")
+    chat = by_site["ChatAgent.chat"]
+    assert chat["calls"] == 4 and chat["prompt_tokens"] == 40 and chat["output_tokens"] == 20
+    assert chat["p50_ms"] == 250.0
+    assert by_site["summarizer.summarize_text"]["errors"] == 1
+    assert "Math 201" in telemetry.summarize(rows, "class_name")
@@ -0,0 +1,33 @@
+import pytest
+
+from integrations import tokens
+
+
+def test_estimate_is_close_to_common_rules():
+    text = "The mitochondria is the powerhouse of the cell. " * 20
+    estimate = tokens.raw_estimate(text)
+    assert len(text) // 5 < estimate < len(text) // 3
+    assert tokens.raw_estimate("") == 0
+
+
+def test_fit_and_chunk_respect_the_budget():
+    text = "\n\n".join(f"Paragraph {i}: " + "word " * 200 for i in range(10))
+    trimmed = tokens.fit(text, 300)
+    assert tokens.estimate_tokens(trimmed) <= 300 and trimmed.endswith(tokens.TRUNCATION_MARK)
+    assert tokens.fit(text, 300, keep="tail").rstrip().endswith("word")
+
+    parts = tokens.chunk(text, 500)
+    assert len(parts) > 1 and all(tokens.estimate_tokens(p) <= 500 for p in parts)
+    assert "".join(parts).count("Paragraph") == 10
+
+
+def test_calibration_and_hard_limit(monkeypatch):
+    monkeypatch.setattr(tokens, "_factors", {})
+    tokens.observe("gemini-2.0-flash", 100, 150)
+    assert tokens.estimate_tokens("word " * 100, "gemini-2.0-flash") > tokens.raw_estimate("word " * 100)
+    rows = [{"ok": True, "model": "m", "est_prompt_tokens": 100, "prompt_tokens": p} for p in (110, 120, 130)]
+    assert tokens.calibrate(rows) == {"m": 1.2}
+
+    monkeypatch.setattr(tokens, "MODEL_INPUT_LIMITS", {"models/tiny": 50})
+    with pytest.raises(tokens.PromptTooLargeError):
+        tokens.check("word " * 500, ["tiny"])
@@ -0,0 +1,86 @@
+import numpy as np
+
+from app import vector_index
+
+
+def _class_dir(tmp_path):
+    root = tmp_path / "Math_201"
+    (root / "notes").mkdir(parents=True)
+    (root / "transcripts").mkdir()
+    (root / "notes" / "eigen.md").write_text(
+        "Eigenvalues are roots of the characteristic polynomial of a matrix. " * 5, encoding="utf-8")
+    (root / "transcripts" / "lec1.txt").write_text(
+        "Today we integrate by parts and use substitution for definite integrals. " * 5, encoding="utf-8")
+    return root
+
+
+def test_hashing_embedder_is_deterministic_and_normalised():
+    emb = vector_index.HashingEmbedder(dim=128)
+    a = emb.embed(["matrix eigenvalues", "matrix eigenvalues", ""])
+    assert a.shape == (3, 128) and a.dtype == np.float32
+    assert np.allclose(a[0], a[1]) and np.isclose(np.linalg.norm(a[0]), 1.0)
+    assert not a[2].any()
+
+
+def test_index_is_persistent_and_incremental(tmp_path):
+    root = _class_dir(tmp_path)
+    index = vector_index.VectorIndex("Math_201", root, vector_index.HashingEmbedder(dim=256))
+    assert index.update() == 2
+    hits = index.search("characteristic polynomial eigenvalues", k=1)
+    assert hits[0].source.name == "eigen.md" and "characteristic" in hits[0].text
+
+    # Nothing changed: nothing re-embedded
+    assert index.update() == 0
+    (root / "summaries").mkdir()
+    (root / "summaries" / "Math_201_09-14-25.txt").write_text("Gaussian elimination solves linear systems.",
+                                                              encoding="utf-8")
+    assert index.update() == 1
+
+    # A fresh instance reads the memory-mapped matrix back
+    reopened = vector_index.VectorIndex("Math_201", root, vector_index.HashingEmbedder(dim=256))
+    assert len(reopened) == 3
+    assert reopened.search("gaussian elimination", k=1, refresh=False)[0].source.suffix == ".txt"
+
+    (root / "notes" / "eigen.md").unlink()
+    reopened.update()
+    assert all(h.source.name != "eigen.md" for h in reopened.search("eigenvalues", k=3))
+
+
+def test_changed_embedder_rebuilds(tmp_path):
+    root = _class_dir(tmp_path)
+    vector_index.VectorIndex("Math_201", root, vector_index.HashingEmbedder(dim=64)).update()
+    index = vector_index.VectorIndex("Math_201", root, vector_index.HashingEmbedder(dim=32))
+    assert len(index) == 0 and index.update() == 2
+    assert index.matrix_path.stat().st_size == 2 * 32 * 4
+
+
+def test_compaction_and_approximate_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "COMPACT_MIN", 1)
+    monkeypatch.setattr(vector_index, "ANN_THRESHOLD", 10)
+    root = _class_dir(tmp_path)
+    for i in range(30):
+        (root / "notes" / f"topic{i}.txt").write_text(f"Topic{i} keyword{i} explained in detail.", encoding="utf-8")
+    index = vector_index.VectorIndex("Math_201", root, vector_index.HashingEmbedder(dim=256))
+    index.update()
+    for i in range(20):
+        (root / "notes" / f"topic{i}.txt").unlink()
+    index.update()
+    assert len(index._table["chunks"]) == len(index) == 12  # dead rows compacted away
+    hits = index.search("keyword25 topic25", k=1)
+    assert hits[0].source.name == "topic25.txt"
+
+
+def test_context_for_selected_files_and_paths_outside_are_reported(tmp_path, capsys):
+    root = _class_dir(tmp_path)
+    index = vector_index.VectorIndex("Math_201", root, vector_index.HashingEmbedder(dim=256))
+    stray = tmp_path / "elsewhere.txt"
+    stray.write_text("Eigenvalues again.", encoding="utf-8")
+    assert index.update([root / "notes" / "eigen.md", stray]) == 1
+    assert "Not indexing" in capsys.readouterr().out
+
+    index.update()
+    context = index.context_for("eigenvalues of a matrix", budget_tokens=400)
+    assert context.startswith("[notes/eigen.md]\n")
+    # Restricted to the transcript, the eigenvalue note is never returned
+    only = index.context_for("eigenvalues of a matrix", budget_tokens=400, paths=[root / "transcripts" / "lec1.txt"])
+    assert only.startswith("[transcripts/lec1.txt]") and "eigen.md" not in only